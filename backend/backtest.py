@@ -0,0 +1,83 @@
+"""Backtest a trigger definition over historical weather.
+
+Replays a CSV/Parquet file of observations (or the history store) through
+the monitor's trigger semantics for a range of candidate thresholds:
+
+    python -m backend.backtest history.csv --trigger-type rainfall \\
+        --thresholds 20:120:0.5 --duration-hours 6 --payout 10000 --workers 4
+
+    python -m backend.backtest --history-cells s14kvr7,s14kvr8 --start 2024-01-01 \\
+        --trigger-type wind_speed --thresholds 10,15,20
+
+Prints fire frequency and annual payout percentiles per threshold, or
+writes them with --output (.csv or .json).
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+import numpy as np
+from .models.schemas import TriggerType
+from .services.backtest import Backtester, history_series, load_series
+from .services.timeseries import TimeSeriesStore
+
+def parse_thresholds(spec: str) -> np.ndarray:
+    """"start:stop:step" (stop exclusive) or a comma-separated list"""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        return np.arange(start, stop, step)
+    return np.array([float(part) for part in spec.split(",") if part])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", help="CSV or Parquet file of observations")
+    parser.add_argument("--history-cells", help="Comma-separated grid cells to read from the history store instead")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(1970, 1, 1))
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--key-column", default="location_id")
+    parser.add_argument("--time-column", default="timestamp")
+    parser.add_argument("--trigger-type", type=TriggerType, required=True)
+    parser.add_argument("--operator", choices=["gt", "gte", "lt", "lte", "eq"], default="gt")
+    parser.add_argument("--thresholds", type=parse_thresholds, required=True, help='"start:stop:step" or "a,b,c"')
+    parser.add_argument("--duration-hours", type=float, default=1)
+    parser.add_argument("--payout", type=float, default=0.0, help="Paid per alert")
+    parser.add_argument("--hysteresis", type=float, default=None, help="Defaults to ALERT_HYSTERESIS_RATIO")
+    parser.add_argument("--max-gap-seconds", type=float, default=None, help="Defaults to 3 sampling intervals")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="Write results to a .csv or .json file")
+    args = parser.parse_args(argv)
+
+    if args.history_cells:
+        cells = [cell for cell in args.history_cells.split(",") if cell]
+        series = history_series(TimeSeriesStore(), cells, args.start, args.end or datetime.utcnow())
+    elif args.source:
+        series = load_series(args.source, args.key_column, args.time_column)
+    else:
+        parser.error("give a source file or --history-cells")
+    if not series:
+        parser.error("no observations found")
+
+    rows = Backtester(args.hysteresis, args.max_gap_seconds, args.workers).run(
+        series, args.trigger_type, args.thresholds, args.operator, args.duration_hours, args.payout
+    )
+    samples = sum(len(s.times) for s in series)
+    print(f"{len(series)} series, {samples:,} samples, {len(rows)} thresholds")
+
+    if args.output:
+        if args.output.endswith(".json"):
+            with open(args.output, "w") as f:
+                json.dump(rows, f, indent=2)
+        else:
+            import pandas as pd
+            pd.DataFrame(rows).to_csv(args.output, index=False)
+        print(f"Wrote {args.output}")
+        return
+    print(f"{'threshold':>10} {'events':>8} {'per year':>9} {'years hit':>9} {'mean payout':>12} {'p90':>10} {'p99':>10}")
+    for row in rows:
+        print(
+            f"{row['threshold']:10.2f} {row['events']:8d} {row['events_per_year']:9.3f} {row['years_with_event']:9.1%} "
+            f"{row['payout_mean']:12,.0f} {row['payout_p90']:10,.0f} {row['payout_p99']:10,.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,115 @@ import os
 
 class Settings(BaseSettings):
     weather_api_key: str = os.getenv("WEATHER_API_KEY", "")
+    weather_api_base_url: str = os.getenv("WEATHER_API_BASE_URL", "https://api.openweathermap.org/data/2.5")
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./hyperlocal.db")
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     alert_webhook_url: Optional[str] = os.getenv("ALERT_WEBHOOK_URL")
     
+    # API process
+    reload: bool = False  # `python -m backend.main` restarts on code changes; local development only
+    
+    # Database connection pool (ignored for SQLite)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    
+    # Bulk NDJSON/CSV imports
+    bulk_import_chunk_size: int = 1000  # Rows validated and inserted per batch
+    bulk_import_max_errors: int = 1000  # Per-row errors returned before truncating
+    bulk_import_max_line_bytes: int = 65536  # Longer rows are reported as errors without being buffered
+    
+    # Monitor placement: in the API process, or sharded across `python -m backend.worker` processes
+    monitor_enabled: bool = True  # Turn off in the API when dedicated workers run the monitor
+    monitor_shards: int = 64
+    lease_backend: str = os.getenv("LEASE_BACKEND", "database")  # "redis", "database" or "local" (one process only)
+    lease_ttl_seconds: Optional[int] = None  # Defaults to 3 check intervals
+    
     # Monitoring intervals
-    check_interval_seconds: int = 300  # 5 minutes
+    check_interval_seconds: int = 300  # 5 minutes; how often locations are re-synced (and polled, without adaptive polling)
     forecast_update_interval: int = 3600  # 1 hour
+    cycle_deadline_seconds: Optional[int] = None  # Defaults to check_interval_seconds
+    sync_overlap_seconds: int = 60  # Syncs re-read rows this much older than the last sync, so late commits aren't missed
+    
+    # Adaptive polling: each cell's interval shrinks from the max towards the min as it nears a threshold
+    adaptive_polling: bool = True  # False polls every cell every check_interval_seconds
+    poll_min_interval_seconds: int = 60  # At or past a threshold, or while an alert or sustained run is open
+    poll_max_interval_seconds: int = 1800  # Far from every threshold
+    poll_calm_ratio: float = 0.5  # Value/threshold ratio at or below which proximity adds no urgency
+    poll_budget_per_minute: int = 0  # Upstream polls per minute across all workers; 0 is unlimited
+    
+    # Alert lifecycle
+    alert_hysteresis_ratio: float = 0.1  # Fraction of the threshold a value must retreat to close an alert
+    trigger_max_gap_seconds: Optional[int] = None  # Sample gap that breaks a sustained run; defaults to 3 cycles
+    alert_retention_days: int = 0  # 0 keeps resolved alerts forever (they are payout records); else deleted past this age
+    alert_compaction_interval_seconds: int = 3600
+    
+    # Alert webhook delivery to ALERT_WEBHOOK_URL, off the monitoring path
+    webhook_queue_size: int = 10000
+    webhook_workers: int = 4
+    webhook_batch_size: int = 100  # Alerts per POST
+    webhook_batch_wait_seconds: float = 0.2  # How long a worker waits to fill a batch
+    webhook_max_retries: int = 5  # Then the batch goes to the dead-letter table
+    webhook_backoff_base_seconds: float = 0.5
+    webhook_backoff_max_seconds: float = 30.0
+    webhook_overflow: str = "block"  # Full queue: "block" (backpressure) or "shed" (dead-letter)
+    
+    # Observation and forecast history, as columnar segments per UTC day
+    timeseries_enabled: bool = True
+    timeseries_path: str = os.getenv("TIMESERIES_PATH", "./data/timeseries")  # Shared by every worker
+    timeseries_flush_seconds: int = 60  # Buffered samples are written at least this often
+    timeseries_flush_rows: int = 50000
+    timeseries_downsample_after_days: int = 30  # Then kept at timeseries_downsample_seconds; 0 keeps full resolution
+    timeseries_downsample_seconds: int = 3600
+    timeseries_retention_days: int = 730  # 0 keeps history forever
+    timeseries_maintenance_interval_seconds: int = 3600  # Merging, downsampling and expiry
+    
+    # Spatial search over locations (/api/locations/search)
+    location_index_leaf_size: int = 256  # Quadtree leaf capacity before it splits
+    location_index_refresh_seconds: int = 30  # How often locations written by other processes are picked up
+    
+    # Portfolio payout exposure
+    exposure_horizon_hours: int = 48
+    exposure_region_precision: int = 3  # Geohash length of a region (~156km x 156km)
+    exposure_refresh_seconds: int = 300  # Minimum gap between incremental refreshes
+    
+    # Forecast pre-alerting: early warnings for triggers the forecast says will fire
+    prealert_enabled: bool = False  # Refreshes exposure in the background and runs the pre-alert stage, in the process running the monitor
+    prealert_interval_seconds: int = 900  # Forecasts are cached for forecast_update_interval, so most refreshes change little
+    
+    # Diagnostics: Prometheus metrics and on-demand cycle profiles
+    metrics_port: Optional[int] = None  # Serves /metrics from `python -m backend.worker`; the API always does
+    profile_dir: str = os.getenv("PROFILE_DIR", "./data/profiles")  # Folded stacks from profiled monitor cycles
+    profile_interval_seconds: float = 0.005  # Stack sampling period
+    
+    # Server-sent event push stream
+    stream_max_pending_events: int = 1000  # Per subscriber, after coalescing; oldest dropped beyond this
+    stream_heartbeat_seconds: float = 15.0
+    stream_relay: str = os.getenv("STREAM_RELAY", "none")  # "redis" carries events from backend.worker to the API; "local" or "none"
+    stream_relay_channel: str = "stream:events"
+    
+    # Upstream fetch scheduling
+    max_concurrent_fetches: int = 50
+    upstream_rate_limit_per_second: float = 10.0  # 0 disables rate limiting
+    upstream_rate_burst: int = 20
+    fetch_max_retries: int = 3
+    fetch_backoff_base_seconds: float = 0.5
+    fetch_backoff_max_seconds: float = 10.0
+    
+    # Upstream HTTP connection pool
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 50
+    http_keepalive_expiry_seconds: float = 30.0
+    http_timeout_seconds: float = 10.0
+    http_connect_timeout_seconds: float = 5.0
+    http2_enabled: bool = True
+    
+    # Locations sharing a geohash cell of this length share one upstream fetch
+    spatial_cell_precision: int = 7  # ~150m x 150m cells
+    
+    # Weather/forecast cache (forecasts are kept for forecast_update_interval)
+    cache_backend: str = os.getenv("CACHE_BACKEND", "local")  # "redis", "local" or "none"
+    cache_max_entries: int = 10000
+    weather_cache_ttl_seconds: int = 60
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,57 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from .models.tables import Base
+from .config import settings
+
+def async_database_url(url: str) -> str:
+    """Map a plain database URL onto its async driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+class Database:
+    """Async engine and session factory shared by the API and the monitor"""
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = async_database_url(url or settings.database_url)
+        self.engine: Optional[AsyncEngine] = None
+        self.session_factory: Optional[async_sessionmaker] = None
+
+    @property
+    def dialect(self) -> str:
+        return self.connect().engine.dialect.name
+
+    def connect(self) -> "Database":
+        if self.engine is None:
+            if self.url.startswith("sqlite"):
+                # SQLite connections are cheap to open and must not be shared across event loops
+                options = {"poolclass": NullPool}
+            else:
+                options = {
+                    "pool_size": settings.db_pool_size,
+                    "max_overflow": settings.db_max_overflow,
+                    "pool_pre_ping": True,
+                }
+            self.engine = create_async_engine(self.url, **options)
+            self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+        return self
+
+    async def create_tables(self):
+        async with self.connect().engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    def session(self) -> AsyncSession:
+        return self.connect().session_factory()
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self.session_factory = None
+
+database = Database()
@@ -0,0 +1,123 @@
+"""Services shared by the API routes, built by the app's lifespan.
+
+Routes receive them with ``Depends(get_services)`` rather than importing
+module-level singletons, so importing a router constructs nothing. Each
+service is created, and its module imported, the first time something asks
+for it: an API process with the monitor and pre-alerting turned off never
+loads the numpy-backed engines, the history store or the spatial index
+until a route needs one.
+"""
+from functools import cached_property
+from typing import TYPE_CHECKING, Optional
+from fastapi import Request
+from .services.metrics import component_samples
+from .config import settings
+
+if TYPE_CHECKING:
+    from .services.broadcaster import Broadcaster
+    from .services.cache import CachedWeatherService
+    from .services.exposure import ExposureEngine
+    from .services.location_index import LocationIndex
+    from .services.monitor import ParametricMonitor
+    from .services.prealert import PreAlerter
+    from .services.relay import EventRelay
+    from .services.risk_engine import RiskEngine
+    from .services.scheduler import TokenBucket
+    from .services.timeseries import TimeSeriesStore
+    from .services.webhooks import WebhookDispatcher
+
+class Services:
+    """One API process's shared state; see the module docstring"""
+
+    def __init__(self):
+        self.monitor: Optional["ParametricMonitor"] = None
+        self.notifier: Optional["WebhookDispatcher"] = None
+        self.relay: Optional["EventRelay"] = None  # Events from backend.worker into the broadcaster
+
+    def built(self, name: str):
+        """The service if it has been created, without creating it"""
+        return self.__dict__.get(name)
+
+    @cached_property
+    def weather_service(self) -> "CachedWeatherService":
+        """One pooled HTTP client shared by the API routes and the monitor"""
+        from .services.cache import CachedWeatherService
+        return CachedWeatherService()
+
+    @cached_property
+    def rate_limiter(self) -> "TokenBucket":
+        """The upstream quota, shared by the monitor's and the exposure engine's fetches"""
+        from .services.scheduler import TokenBucket
+        return TokenBucket(settings.upstream_rate_limit_per_second, settings.upstream_rate_burst)
+
+    @cached_property
+    def risk_engine(self) -> "RiskEngine":
+        from .services.risk_engine import RiskEngine
+        return RiskEngine()
+
+    @cached_property
+    def broadcaster(self) -> "Broadcaster":
+        from .services.broadcaster import Broadcaster
+        return Broadcaster()
+
+    @cached_property
+    def history(self) -> Optional["TimeSeriesStore"]:
+        """Written by the monitor and the exposure engine, read by the history routes"""
+        if not settings.timeseries_enabled:
+            return None
+        from .services.timeseries import TimeSeriesStore
+        return TimeSeriesStore()
+
+    @cached_property
+    def prealerter(self) -> "PreAlerter":
+        from .services.prealert import PreAlerter
+        return PreAlerter(broadcaster=self.broadcaster)
+
+    @cached_property
+    def exposure(self) -> "ExposureEngine":
+        """Shares the forecast cache with the forecast routes, and feeds their potential_triggers"""
+        from .services.exposure import ExposureEngine
+        from .services.scheduler import FetchScheduler
+        return ExposureEngine(
+            weather_service=self.weather_service,
+            scheduler=FetchScheduler(rate_limiter=self.rate_limiter),
+            history=self.history,
+            stages=[self.prealerter.update],
+            coordinator=self.monitor.coordinator if self.monitor else None
+        )
+
+    @cached_property
+    def location_index(self) -> "LocationIndex":
+        from .services.location_index import LocationIndex
+        return LocationIndex()
+
+    def metric_samples(self):
+        """Component gauges for /metrics, from whatever this process is running"""
+        weather_service = self.built("weather_service")
+        return component_samples(
+            scheduler=self.monitor.scheduler if self.monitor else None,
+            cache=weather_service.cache if weather_service else None,
+            notifier=self.notifier,
+            broadcaster=self.built("broadcaster"),
+            cadence=self.monitor.cadence if self.monitor else None,
+            history=self.built("history")
+        )
+
+    async def aclose(self):
+        """Stop background work and release connections, in dependency order"""
+        if self.built("exposure"):
+            await self.exposure.stop()
+        if self.monitor:
+            await self.monitor.stop()
+            await self.monitor.coordinator.store.aclose()
+        if self.notifier:
+            await self.notifier.stop()
+        if self.relay:
+            await self.relay.stop()
+        if self.built("history"):
+            await self.history.flush(force=True)
+        if self.built("weather_service"):
+            await self.weather_service.aclose()
+
+def get_services(request: Request) -> Services:
+    return request.app.state.services
@@ -1,21 +1,55 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
-import uvicorn
+from typing import List, Optional
 
-from .routers import locations, alerts, forecasts, triggers
-from .services.monitor import ParametricMonitor
+from .routers import locations, alerts, forecasts, triggers, stream, exposure, history
+from .dependencies import Services, get_services
+from .models.schemas import DeadLetter
+from .services.repository import DeadLetterRepository
+from .services.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from .database import database
 from .config import settings
 
-monitor = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global monitor
-    monitor = ParametricMonitor()
-    await monitor.start()
+    # Services are built here, not at import, and only for the features this process runs
+    services = app.state.services = Services()
+    await database.create_tables()
+    registry.add_collector(services.metric_samples)
+    if settings.monitor_enabled:
+        from .services.monitor import ParametricMonitor
+        from .services.scheduler import FetchScheduler
+        from .services.sharding import ShardCoordinator
+        if settings.alert_webhook_url:
+            from .services.webhooks import WebhookDispatcher
+            services.notifier = WebhookDispatcher()
+            services.notifier.start()
+        services.monitor = ParametricMonitor(
+            weather_service=services.weather_service,
+            scheduler=FetchScheduler(rate_limiter=services.rate_limiter),
+            notifier=services.notifier,
+            broadcaster=services.broadcaster,
+            coordinator=ShardCoordinator(),
+            history=services.history
+        )
+        await services.monitor.start()
+    if settings.stream_relay != "none":
+        from .services.relay import EventRelay, create_event_channel
+        services.relay = EventRelay(create_event_channel(), services.broadcaster)
+        services.relay.start()
+    if settings.prealert_enabled and services.monitor:
+        services.exposure.start()
     yield
-    await monitor.stop()
+    await services.aclose()
+    await database.dispose()
+    registry.remove_collector(services.metric_samples)
+
+def running_monitor(services: Services = Depends(get_services)):
+    if services.monitor is None:
+        raise HTTPException(status_code=503, detail="Monitor not running")
+    return services.monitor
 
 app = FastAPI(
     title="Hyperlocal Intelligence Platform",
@@ -38,12 +72,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[alerts.NEXT_CURSOR_HEADER],
 )
+# Outermost, so the timings include CORS handling
+app.add_middleware(MetricsMiddleware, untimed={"/api/stream/"})  # Streams stay open for as long as the client listens
 
 app.include_router(locations.router, prefix="/api/locations", tags=["locations"])
 app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
 app.include_router(forecasts.router, prefix="/api/forecast", tags=["forecasts"])
 app.include_router(triggers.router, prefix="/api/triggers", tags=["triggers"])
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
+app.include_router(exposure.router, prefix="/api/exposure", tags=["exposure"])
+app.include_router(history.router, prefix="/api/history", tags=["history"])
 
 @app.get("/")
 async def root():
@@ -53,7 +93,65 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/monitor/stats")
+async def monitor_stats(monitor=Depends(running_monitor)):
+    """Metrics from the most recent monitoring cycle"""
+    return {
+        "cycles": monitor.scheduler.cycles,
+        "last_cycle": monitor.scheduler.last_cycle,
+        "sharding": monitor.coordinator.stats(),
+        "cadence": monitor.cadence.stats() if monitor.cadence else None,
+    }
+
+@app.post("/monitor/profile", status_code=202)
+async def request_monitor_profile(monitor=Depends(running_monitor)):
+    """Sample the event loop's stacks during the next monitoring pass"""
+    monitor.request_profile()
+    return {"requested": True, "directory": settings.profile_dir, "last_profile": monitor.last_profile}
+
+@app.get("/monitor/profile", response_class=PlainTextResponse)
+async def monitor_profile(monitor=Depends(running_monitor)):
+    """Folded stacks of the last profiled pass, ready for flamegraph.pl or speedscope"""
+    if not monitor.last_profile or not monitor.last_profile["path"]:
+        raise HTTPException(status_code=404, detail="No monitoring pass has been profiled yet")
+    with open(monitor.last_profile["path"]) as f:
+        return f.read()
+
+@app.get("/monitor/cadence")
+async def monitor_cadence(
+    location_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    monitor=Depends(running_monitor)
+):
+    """Per-location polling interval, urgency and lag, most frequently polled first"""
+    return monitor.location_cadence(location_id, limit)
+
+@app.get("/cache/stats")
+async def cache_stats(services: Services = Depends(get_services)):
+    """Hit/miss/eviction counters for the weather and forecast cache"""
+    return services.weather_service.cache.stats()
+
+@app.get("/notifications/stats")
+async def notification_stats(services: Services = Depends(get_services)):
+    """Webhook delivery counters and current queue depth"""
+    notifier = services.notifier
+    if notifier is None:
+        raise HTTPException(status_code=503, detail="Webhook notifications are not configured")
+    return {**notifier.stats, "queued": notifier.queue.qsize()}
+
+@app.get("/notifications/dead-letters", response_model=List[DeadLetter])
+async def dead_letters(limit: int = Query(100, ge=1, le=1000)):
+    """Webhook batches that could not be delivered, most recent first, with their alert payloads"""
+    # Read from the database, so this also lists what standalone workers failed to deliver
+    return await DeadLetterRepository().list(limit)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import os
+    import uvicorn
     port = int(os.getenv("PORT", 8080))
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=port, reload=True)
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=port, reload=settings.reload)
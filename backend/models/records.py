@@ -0,0 +1,150 @@
+"""Lightweight records for the monitoring and evaluation path.
+
+The pydantic models in schemas.py validate API input and shape API output.
+Inside the monitor, where a process may hold a million triggers and build
+an alert per firing, these slotted dataclasses stand in for them: no
+per-instance dict, no validation on construction. They carry the same
+attribute names, so code that only reads fields (RiskEngine,
+TriggerStateEngine, TriggerRegistry) accepts either. Convert with
+``from_schema``/``to_schema`` where data crosses the API boundary.
+"""
+import sys
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import List, Optional
+from .schemas import Alert, Location, ParametricTrigger, RiskLevel, TriggerType, WeatherData
+
+@dataclass(slots=True)
+class LocationRecord:
+    """The parts of a Location the monitor needs to place and route it"""
+    id: str
+    latitude: float
+    longitude: float
+    insurer_id: str
+
+    @classmethod
+    def from_schema(cls, location: Location) -> "LocationRecord":
+        return cls(location.id, location.latitude, location.longitude, location.insurer_id)
+
+@dataclass(slots=True)
+class TriggerRecord:
+    id: str
+    location_id: str
+    trigger_type: TriggerType
+    threshold_value: float
+    threshold_operator: str
+    duration_hours: int = 1
+    active: bool = True
+    payout_amount: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, id, location_id, trigger_type, threshold_value, threshold_operator,
+                 duration_hours, active, payout_amount) -> "TriggerRecord":
+        """From a triggers table row; location ids are interned since many triggers share one"""
+        return cls(
+            id, sys.intern(location_id), TriggerType(trigger_type), threshold_value, threshold_operator,
+            duration_hours, active, payout_amount
+        )
+
+    @classmethod
+    def from_schema(cls, trigger: ParametricTrigger) -> "TriggerRecord":
+        return cls(
+            trigger.id, trigger.location_id, trigger.trigger_type, trigger.threshold_value,
+            trigger.threshold_operator, trigger.duration_hours, trigger.active, trigger.payout_amount
+        )
+
+    def to_schema(self) -> ParametricTrigger:
+        return ParametricTrigger.model_construct(**{f: getattr(self, f) for f in TRIGGER_FIELDS})
+
+@dataclass(slots=True)
+class Observation:
+    """Current conditions at a point, as WeatherData"""
+    location_id: str
+    timestamp: datetime
+    temperature: float
+    rainfall: float
+    wind_speed: float
+    humidity: float
+    pressure: float
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Observation":
+        """Inverse of to_json, also reading WeatherData's JSON"""
+        return cls(
+            data["location_id"], datetime.fromisoformat(data["timestamp"]), data["temperature"],
+            data["rainfall"], data["wind_speed"], data["humidity"], data["pressure"]
+        )
+
+    def to_json(self) -> dict:
+        """Same shape as WeatherData.model_dump(mode="json")"""
+        data = {f: getattr(self, f) for f in OBSERVATION_FIELDS}
+        data["timestamp"] = self.timestamp.isoformat()
+        return data
+
+    def to_schema(self) -> WeatherData:
+        return WeatherData.model_construct(**{f: getattr(self, f) for f in OBSERVATION_FIELDS})
+
+@dataclass(slots=True)
+class AlertRecord:
+    id: str
+    location_id: str
+    trigger_id: str
+    risk_level: RiskLevel
+    message: str
+    current_value: float
+    threshold_value: float
+    triggered_at: datetime
+    resolved: bool = False
+    prescriptive_actions: List[str] = field(default_factory=list)  # Often shared; don't mutate in place
+
+    @classmethod
+    def from_schema(cls, alert: Alert) -> "AlertRecord":
+        return cls(**{f: getattr(alert, f) for f in ALERT_FIELDS})
+
+    def to_dict(self) -> dict:
+        return {f: getattr(self, f) for f in ALERT_FIELDS}
+
+    def to_json(self) -> dict:
+        """Same shape as Alert.model_dump(mode="json")"""
+        data = self.to_dict()
+        data["risk_level"] = self.risk_level.value
+        data["triggered_at"] = self.triggered_at.isoformat()
+        data["prescriptive_actions"] = list(self.prescriptive_actions)
+        return data
+
+    def to_schema(self) -> Alert:
+        return Alert.model_construct(**self.to_dict())
+
+@dataclass(slots=True)
+class EarlyWarning:
+    """A trigger the current forecast says will fire within the horizon"""
+    trigger_id: str
+    location_id: str
+    insurer_id: str
+    trigger_type: TriggerType
+    threshold_value: float
+    threshold_operator: str
+    starts_at: datetime  # First forecast slot the trigger would fire in
+    peak_at: datetime
+    peak_value: float
+    severity: float  # Peak value/threshold ratio, as in RiskEngine.threshold_proximity
+    risk_level: RiskLevel
+    probability: float  # Highest chance among the firing slots
+    payout_amount: Optional[float] = None
+
+    def lead_time_hours(self, now: datetime) -> float:
+        return max(0.0, (self.starts_at - now).total_seconds() / 3600)
+
+    def to_json(self, now: datetime) -> dict:
+        data = {f: getattr(self, f) for f in WARNING_FIELDS}
+        data["trigger_type"] = self.trigger_type.value
+        data["risk_level"] = self.risk_level.value
+        data["starts_at"] = self.starts_at.isoformat()
+        data["peak_at"] = self.peak_at.isoformat()
+        data["lead_time_hours"] = round(self.lead_time_hours(now), 2)
+        return data
+
+TRIGGER_FIELDS = tuple(f.name for f in fields(TriggerRecord))
+OBSERVATION_FIELDS = tuple(f.name for f in fields(Observation))
+ALERT_FIELDS = tuple(f.name for f in fields(AlertRecord))
+WARNING_FIELDS = tuple(f.name for f in fields(EarlyWarning))
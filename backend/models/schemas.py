@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -25,6 +25,26 @@ class Location(BaseModel):
     policy_ids: List[str] = []
     created_at: Optional[datetime] = None
 
+class LocationHit(BaseModel):
+    id: str
+    latitude: float
+    longitude: float
+    insurer_id: str
+    distance_km: Optional[float] = None
+
+class LocationSearchResult(BaseModel):
+    """Spatial search matches; count covers all of them, locations at most the limit"""
+    count: int
+    locations: List[LocationHit]
+
+class GeoPolygon(BaseModel):
+    """A GeoJSON Polygon or MultiPolygon geometry, positions as [longitude, latitude]"""
+    type: str = Field(..., pattern="^(Polygon|MultiPolygon)$")
+    coordinates: List[Any]
+
+    def polygons(self) -> List[Any]:
+        return self.coordinates if self.type == "MultiPolygon" else [self.coordinates]
+
 class ParametricTrigger(BaseModel):
     id: Optional[str] = None
     location_id: str
@@ -56,6 +76,15 @@ class Alert(BaseModel):
     resolved: bool = False
     prescriptive_actions: List[str] = []
 
+class DeadLetter(BaseModel):
+    """A webhook batch that could not be delivered"""
+    id: Optional[str] = None
+    url: str
+    alerts: List[Dict] = []
+    error: str
+    attempts: int = 0
+    failed_at: datetime
+
 class ForecastData(BaseModel):
     location_id: str
     forecast_time: datetime
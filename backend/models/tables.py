@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Boolean, DateTime, Float, Index, Integer, JSON, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+class Base(DeclarativeBase):
+    pass
+
+class LocationRow(Base):
+    __tablename__ = "locations"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    latitude: Mapped[float] = mapped_column(Float)
+    longitude: Mapped[float] = mapped_column(Float)
+    name: Mapped[str] = mapped_column(String(255))
+    insurer_id: Mapped[str] = mapped_column(String(64), index=True)
+    policy_ids: Mapped[List[str]] = mapped_column(JSON, default=list)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Bumped on every write so the monitor can sync incrementally
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+class TriggerRow(Base):
+    __tablename__ = "triggers"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    location_id: Mapped[str] = mapped_column(String(36), index=True)
+    trigger_type: Mapped[str] = mapped_column(String(32), index=True)
+    threshold_value: Mapped[float] = mapped_column(Float)
+    threshold_operator: Mapped[str] = mapped_column(String(4))
+    duration_hours: Mapped[int] = mapped_column(Integer, default=1)
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    payout_amount: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+class AlertRow(Base):
+    __tablename__ = "alerts"
+    __table_args__ = (
+        # Keyset pagination runs newest-first on (triggered_at, id) within each filter
+        Index("ix_alerts_feed", "resolved", "triggered_at", "id"),
+        Index("ix_alerts_all_feed", "triggered_at", "id"),
+        Index("ix_alerts_location_feed", "location_id", "triggered_at", "id"),
+        Index("ix_alerts_risk_feed", "risk_level", "resolved", "triggered_at", "id"),
+        Index("ix_alerts_resolved_at", "resolved", "resolved_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    location_id: Mapped[str] = mapped_column(String(36))
+    trigger_id: Mapped[str] = mapped_column(String(36), index=True)
+    risk_level: Mapped[str] = mapped_column(String(16))
+    message: Mapped[str] = mapped_column(String(512))
+    current_value: Mapped[float] = mapped_column(Float)
+    threshold_value: Mapped[float] = mapped_column(Float)
+    triggered_at: Mapped[datetime] = mapped_column(DateTime)
+    resolved: Mapped[bool] = mapped_column(Boolean, default=False)
+    resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    prescriptive_actions: Mapped[List[str]] = mapped_column(JSON, default=list)
+
+class DeadLetterRow(Base):
+    __tablename__ = "webhook_dead_letters"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    url: Mapped[str] = mapped_column(String(2048))
+    alerts: Mapped[List[dict]] = mapped_column(JSON, default=list)
+    error: Mapped[str] = mapped_column(String(512))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    failed_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+class LeaseRow(Base):
+    """Expiring ownership claims used to coordinate monitor workers"""
+    __tablename__ = "leases"
+
+    name: Mapped[str] = mapped_column(String(128), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(128))
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
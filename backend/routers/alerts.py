@@ -1,34 +1,59 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
 from ..models.schemas import Alert, RiskLevel
+from ..services.repository import alert_repository
 
 router = APIRouter()
 
-alerts_db = []
+# Cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-@router.get("/location/{location_id}", response_model=List[Alert])
-async def get_location_alerts(location_id: str, active_only: bool = True):
-    """Get alerts for a specific location"""
-    alerts = [a for a in alerts_db if a.location_id == location_id]
-    if active_only:
-        alerts = [a for a in alerts if not a.resolved]
+async def _page(response: Response, **filters) -> List[Alert]:
+    try:
+        alerts, next_cursor = await alert_repository.page(**filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return alerts
 
+@router.get("/location/{location_id}", response_model=List[Alert])
+async def get_location_alerts(
+    location_id: str,
+    response: Response,
+    active_only: bool = True,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Get alerts for a specific location, newest first"""
+    return await _page(
+        response, location_id=location_id, active_only=active_only,
+        since=since, until=until, cursor=cursor, limit=limit
+    )
+
 @router.get("/", response_model=List[Alert])
-async def list_all_alerts(risk_level: RiskLevel = None, active_only: bool = True):
-    """List all alerts with optional filtering"""
-    alerts = alerts_db
-    if active_only:
-        alerts = [a for a in alerts if not a.resolved]
-    if risk_level:
-        alerts = [a for a in alerts if a.risk_level == risk_level]
-    return alerts
+async def list_all_alerts(
+    response: Response,
+    risk_level: RiskLevel = None,
+    active_only: bool = True,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """List alerts newest first with optional filtering; pass the
+    X-Next-Cursor response header back as ``cursor`` for the next page"""
+    return await _page(
+        response, risk_level=risk_level, active_only=active_only,
+        since=since, until=until, cursor=cursor, limit=limit
+    )
 
 @router.patch("/{alert_id}/resolve")
 async def resolve_alert(alert_id: str):
     """Mark an alert as resolved"""
-    alert = next((a for a in alerts_db if a.id == alert_id), None)
-    if not alert:
+    if not await alert_repository.resolve([alert_id]):
         raise HTTPException(status_code=404, detail="Alert not found")
-    alert.resolved = True
     return {"id": alert_id, "resolved": True}
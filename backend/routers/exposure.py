@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from typing import Optional
+from ..dependencies import Services, get_services
+from ..models.schemas import RiskLevel
+
+router = APIRouter()
+
+@router.get("/")
+async def get_exposure(
+    group_by: Optional[str] = Query(None, description="Comma-separated; all of insurer_id,region,trigger_type by default"),
+    insurer_id: Optional[str] = None,
+    services: Services = Depends(get_services)
+):
+    """Expected and worst-case payouts over the forecast horizon, grouped by
+    any of insurer_id, region and trigger_type"""
+    from ..services.exposure import GROUP_FIELDS
+    engine = services.exposure
+    fields = GROUP_FIELDS if group_by is None else [field for field in group_by.split(",") if field]
+    unknown = set(fields) - set(GROUP_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"group_by must be a subset of {', '.join(GROUP_FIELDS)}")
+    await engine.refresh()
+    return {
+        "horizon_hours": engine.horizon_hours,
+        "as_of": engine.as_of,
+        "groups": engine.totals(fields, insurer_id),
+    }
+
+@router.get("/warnings")
+async def get_early_warnings(
+    insurer_id: Optional[str] = None,
+    location_id: Optional[str] = None,
+    min_risk_level: Optional[RiskLevel] = None,
+    limit: int = Query(100, ge=1),
+    services: Services = Depends(get_services)
+):
+    """Triggers the forecast says will fire within the horizon, soonest and most severe first"""
+    await services.exposure.refresh()
+    now = datetime.utcnow()
+    return [
+        warning.to_json(now)
+        for warning in services.prealerter.ranked(insurer_id, location_id, min_risk_level, limit)
+    ]
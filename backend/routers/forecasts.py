@@ -1,44 +1,39 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List
-from ..services.weather_service import WeatherService
-from ..services.risk_engine import RiskEngine
+from ..dependencies import Services, get_services
+from ..services.spatial import SpatialGrid, cell_center
 from ..models.schemas import ForecastData, WeatherData
-from ..routers.locations import locations_db
-from ..routers.triggers import triggers_db
+from ..services.repository import location_repository, trigger_repository
 
 router = APIRouter()
-weather_service = WeatherService()
-risk_engine = RiskEngine()
+grid = SpatialGrid()
 
 @router.get("/{location_id}", response_model=List[ForecastData])
-async def get_forecast(location_id: str):
+async def get_forecast(location_id: str, services: Services = Depends(get_services)):
     """Get hyperlocal forecast for a location"""
-    if location_id not in locations_db:
+    location = await location_repository.get(location_id)
+    if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
-    location = locations_db[location_id]
-    forecasts = await weather_service.get_forecast(
-        location.latitude,
-        location.longitude,
-        location_id
-    )
+    # Snap to the grid cell so nearby locations share one cached forecast
+    lat, lon = cell_center(grid.cell_of(location.latitude, location.longitude))
+    forecasts = await services.weather_service.get_forecast(lat, lon, location_id)
     
     # Calculate risk scores
-    location_triggers = [t for t in triggers_db.values() if t.location_id == location_id]
-    for forecast in forecasts:
-        forecast.risk_score = risk_engine.calculate_risk_score(forecast, location_triggers)
+    location_triggers = await trigger_repository.list_for_location(location_id)
+    scores = services.risk_engine.score_forecasts(forecasts, location_triggers)
+    for forecast, score in zip(forecasts, scores):
+        forecast.risk_score = float(score)
+        forecast.potential_triggers = services.prealerter.potential_triggers(location_id, forecast.forecast_time)
     
     return forecasts
 
 @router.get("/{location_id}/current", response_model=WeatherData)
-async def get_current_weather(location_id: str):
+async def get_current_weather(location_id: str, services: Services = Depends(get_services)):
     """Get current weather for a location"""
-    if location_id not in locations_db:
+    location = await location_repository.get(location_id)
+    if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
-    location = locations_db[location_id]
-    return await weather_service.get_current_weather(
-        location.latitude,
-        location.longitude,
-        location_id
-    )
+    lat, lon = cell_center(grid.cell_of(location.latitude, location.longitude))
+    return await services.weather_service.get_current_weather(lat, lon, location_id)
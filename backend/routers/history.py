@@ -0,0 +1,69 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timedelta
+from typing import Optional
+from ..dependencies import Services, get_services
+from ..services.repository import location_repository
+from ..services.spatial import SpatialGrid
+
+router = APIRouter()
+grid = SpatialGrid()
+
+async def _history(
+    services: Services,
+    table_name: str,
+    location_id: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    resolution: Optional[int]
+):
+    store = services.history
+    if store is None:
+        raise HTTPException(status_code=503, detail="History is disabled")
+    location = await location_repository.get(location_id)
+    if not location:
+        raise HTTPException(status_code=404, detail="Location not found")
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    cell = grid.cell_of(location.latitude, location.longitude)
+    table = getattr(store, table_name)
+    # Reads memory-mapped segments from disk; keep that off the event loop
+    columns = await asyncio.to_thread(table.query, cell, start, end, resolution)
+    return {
+        "location_id": location_id,
+        "cell": cell,
+        "resolution": resolution,
+        # Column-oriented: one array per field, aligned with "time"
+        **{
+            name: (
+                values.astype("datetime64[s]").astype(str).tolist()
+                if name in ("time", "issued") else values.tolist()
+            )
+            for name, values in columns.items()
+        },
+    }
+
+@router.get("/{location_id}/observations")
+async def observation_history(
+    location_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[int] = Query(None, ge=1, description="Bucket size in seconds"),
+    services: Services = Depends(get_services)
+):
+    """Observed weather for a location's cell over [start, end), the last day by default"""
+    return await _history(services, "observations", location_id, start, end, resolution)
+
+@router.get("/{location_id}/forecasts")
+async def forecast_history(
+    location_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[int] = Query(None, ge=1, description="Bucket size in seconds"),
+    services: Services = Depends(get_services)
+):
+    """Forecasts issued for a location's cell, by forecast time over [start, end)"""
+    return await _history(services, "forecasts", location_id, start, end, resolution)
@@ -1,30 +1,107 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 import uuid
-from ..models.schemas import Location
+from ..dependencies import Services, get_services
+from ..models.records import LocationRecord
+from ..models.schemas import GeoPolygon, Location, LocationSearchResult
+from ..services.repository import location_repository
+from ..services.bulk_import import BulkImportError, detect_format, import_stream, prepare_location
 
 router = APIRouter()
 
-# In-memory storage (replace with database)
-locations_db = {}
-
 @router.post("/", response_model=Location)
-async def create_location(location: Location):
+async def create_location(location: Location, services: Services = Depends(get_services)):
     """Register a new insured location"""
     location.id = str(uuid.uuid4())
-    locations_db[location.id] = location
+    location = await location_repository.add(location)
+    # An index nobody has searched yet loads everything on its first refresh instead
+    index = services.built("location_index")
+    if index:
+        index.add(LocationRecord.from_schema(location))
     return location
 
+@router.post("/bulk")
+async def bulk_import_locations(request: Request, format: str = None, services: Services = Depends(get_services)):
+    """Stream-import locations from an NDJSON or CSV body; returns per-row errors"""
+    if format not in (None, "ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    index = services.built("location_index")
+
+    async def write(locations: List[Location]) -> int:
+        written = await location_repository.bulk_upsert(locations)
+        if index:
+            index.add_many(LocationRecord.from_schema(location) for location in locations)
+        return written
+
+    try:
+        return await import_stream(
+            request.stream(),
+            detect_format(request.headers.get("content-type"), format),
+            Location,
+            write,
+            prepare=prepare_location
+        )
+    except BulkImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/search/bbox", response_model=LocationSearchResult)
+async def search_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    insurer_id: Optional[str] = None,
+    limit: int = Query(1000, ge=0),
+    services: Services = Depends(get_services)
+):
+    """Locations inside a bounding box; min_lon > max_lon crosses the antimeridian"""
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not exceed max_lat")
+    index = services.location_index
+    await index.refresh()
+    count, locations = index.bbox(min_lat, min_lon, max_lat, max_lon, insurer_id, limit)
+    return {"count": count, "locations": locations}
+
+@router.get("/search/radius", response_model=LocationSearchResult)
+async def search_radius(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0),
+    insurer_id: Optional[str] = None,
+    limit: int = Query(1000, ge=0),
+    services: Services = Depends(get_services)
+):
+    """Locations within radius_km of a point, nearest first, with their distance"""
+    index = services.location_index
+    await index.refresh()
+    count, locations = index.radius(lat, lon, radius_km, insurer_id, limit)
+    return {"count": count, "locations": locations}
+
+@router.post("/search/polygon", response_model=LocationSearchResult)
+async def search_polygon(
+    geometry: GeoPolygon,
+    insurer_id: Optional[str] = None,
+    limit: int = Query(1000, ge=0),
+    services: Services = Depends(get_services)
+):
+    """Locations inside a GeoJSON Polygon or MultiPolygon, holes excluded"""
+    index = services.location_index
+    await index.refresh()
+    try:
+        count, locations = index.polygon(geometry.polygons(), insurer_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"count": count, "locations": locations}
+
 @router.get("/{location_id}", response_model=Location)
 async def get_location(location_id: str):
     """Get location details"""
-    if location_id not in locations_db:
+    location = await location_repository.get(location_id)
+    if not location:
         raise HTTPException(status_code=404, detail="Location not found")
-    return locations_db[location_id]
+    return location
 
 @router.get("/", response_model=List[Location])
 async def list_locations(insurer_id: str = None):
     """List all locations, optionally filtered by insurer"""
-    if insurer_id:
-        return [loc for loc in locations_db.values() if loc.insurer_id == insurer_id]
-    return list(locations_db.values())
+    return await location_repository.list(insurer_id)
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+from ..dependencies import Services, get_services
+from ..models.schemas import RiskLevel
+from ..services.broadcaster import Broadcaster
+from ..config import settings
+
+router = APIRouter()
+
+async def event_stream(
+    broadcaster: Broadcaster,
+    insurer_id: Optional[str] = None,
+    location_id: Optional[str] = None,
+    min_risk_level: Optional[RiskLevel] = None,
+    heartbeat: Optional[float] = None
+) -> AsyncIterator[str]:
+    """SSE frames for a new subscription; comment lines keep idle connections open.
+
+    Subscribes on the first frame rather than in the route, so a client that
+    disconnects before the response starts leaves no subscription behind.
+    """
+    heartbeat = heartbeat or settings.stream_heartbeat_seconds
+    subscription = broadcaster.subscribe(
+        insurer_id=insurer_id, location_id=location_id, min_risk_level=min_risk_level
+    )
+    try:
+        yield ": connected\n\n"
+        while True:
+            events = await subscription.next_batch(heartbeat)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(event.encode() for event in events)
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+@router.get("/")
+async def stream_events(
+    insurer_id: Optional[str] = None,
+    location_id: Optional[str] = None,
+    min_risk_level: RiskLevel = None,
+    services: Services = Depends(get_services)
+):
+    """Server-sent events for alert open/resolve and risk changes, filtered
+    per subscriber; replaces polling /api/alerts and /api/forecast"""
+    return StreamingResponse(
+        event_stream(services.broadcaster, insurer_id, location_id, min_risk_level),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def stream_stats(services: Services = Depends(get_services)):
+    """Connected subscribers and events published"""
+    return services.broadcaster.stats()
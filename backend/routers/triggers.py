@@ -1,36 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List
 import uuid
 from ..models.schemas import ParametricTrigger
+from ..services.repository import trigger_repository
+from ..services.bulk_import import BulkImportError, detect_format, import_stream
 
 router = APIRouter()
 
-triggers_db = {}
-
 @router.post("/", response_model=ParametricTrigger)
 async def create_trigger(trigger: ParametricTrigger):
     """Create a new parametric trigger"""
     trigger.id = str(uuid.uuid4())
-    triggers_db[trigger.id] = trigger
-    return trigger
+    return await trigger_repository.add(trigger)
+
+@router.post("/bulk")
+async def bulk_import_triggers(request: Request, format: str = None):
+    """Stream-import triggers from an NDJSON or CSV body; returns per-row errors"""
+    if format not in (None, "ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    try:
+        return await import_stream(
+            request.stream(),
+            detect_format(request.headers.get("content-type"), format),
+            ParametricTrigger,
+            trigger_repository.bulk_upsert
+        )
+    except BulkImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{trigger_id}", response_model=ParametricTrigger)
 async def get_trigger(trigger_id: str):
     """Get trigger details"""
-    if trigger_id not in triggers_db:
+    trigger = await trigger_repository.get(trigger_id)
+    if not trigger:
         raise HTTPException(status_code=404, detail="Trigger not found")
-    return triggers_db[trigger_id]
+    return trigger
 
 @router.get("/location/{location_id}", response_model=List[ParametricTrigger])
 async def list_location_triggers(location_id: str):
     """List all triggers for a location"""
-    return [t for t in triggers_db.values() if t.location_id == location_id]
+    return await trigger_repository.list_for_location(location_id)
 
 @router.patch("/{trigger_id}/toggle")
 async def toggle_trigger(trigger_id: str):
     """Activate or deactivate a trigger"""
-    if trigger_id not in triggers_db:
+    trigger = await trigger_repository.toggle(trigger_id)
+    if not trigger:
         raise HTTPException(status_code=404, detail="Trigger not found")
-    trigger = triggers_db[trigger_id]
-    trigger.active = not trigger.active
     return {"id": trigger_id, "active": trigger.active}
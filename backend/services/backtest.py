@@ -0,0 +1,222 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+import numpy as np
+from .risk_engine import _BATCH_OPERATORS, OBSERVED_FIELDS, OPERATOR_CODES
+from .timeseries import TimeSeriesStore
+from ..models.schemas import TriggerType
+from ..config import settings
+
+# Thresholds x samples evaluated per block, to bound memory on long series
+BLOCK_ELEMENTS = 2_000_000
+
+class Series(NamedTuple):
+    """One location's (or cell's) observations, oldest first"""
+    key: str
+    times: np.ndarray  # int64 epoch seconds
+    values: Dict[str, np.ndarray]  # OBSERVED_FIELDS name -> float64 column
+
+def load_series(path: str, key_column: str = "location_id", time_column: str = "timestamp") -> List[Series]:
+    """Read observations from a CSV or Parquet file, one series per key.
+
+    Needs a timestamp column and any of the observed value columns
+    (rainfall, wind_speed, temperature); without a key column the whole
+    file is one series. Naive timestamps are taken as UTC.
+    """
+    import pandas as pd
+    if path.endswith((".parquet", ".pq")):
+        frame = pd.read_parquet(path)  # Needs pyarrow or fastparquet
+    else:
+        frame = pd.read_csv(path)
+    # Epoch seconds via UTC, whatever the input's offsets
+    frame[time_column] = pd.to_datetime(frame[time_column], utc=True).dt.tz_localize(None)
+    if key_column not in frame:
+        frame[key_column] = os.path.basename(path)
+    fields = [field for field in OBSERVED_FIELDS.values() if field in frame]
+    series = []
+    for key, group in frame.sort_values([key_column, time_column]).groupby(key_column, sort=False):
+        series.append(Series(
+            str(key),
+            group[time_column].to_numpy().astype("datetime64[s]").astype(np.int64),
+            {field: group[field].to_numpy(np.float64) for field in fields}
+        ))
+    return series
+
+def history_series(store: TimeSeriesStore, cells: Iterable[str], start: datetime, end: datetime) -> List[Series]:
+    """Observations kept by the history store for the given grid cells"""
+    series = []
+    for cell in cells:
+        columns = store.observations.query(cell, start, end)
+        if len(columns["time"]):
+            series.append(Series(
+                cell,
+                columns["time"],
+                {field: columns[field].astype(np.float64) for field in OBSERVED_FIELDS.values()}
+            ))
+    return series
+
+def replay(
+    times: np.ndarray,
+    values: np.ndarray,
+    thresholds: np.ndarray,
+    operator: str,
+    duration_hours: float,
+    hysteresis_ratio: float,
+    max_gap_seconds: float
+) -> np.ndarray:
+    """(thresholds x samples) mask of the samples at which an alert opens.
+
+    Vectorized equivalent of feeding every sample through
+    TriggerStateEngine.observe for one trigger per threshold: a run of
+    exceeding samples breaks on a miss or a gap longer than
+    ``max_gap_seconds``, an alert opens once the run has lasted
+    ``duration_hours``, and it stays open until a sample clears the
+    hysteresis band.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)[:, None]
+    values = np.asarray(values, dtype=np.float64)[None, :]
+    samples = values.shape[1]
+    # RiskEngine.evaluate_batch's comparison, broadcast: one operator per sweep
+    exceeded = _BATCH_OPERATORS[OPERATOR_CODES[operator]](values, thresholds)
+
+    # Where each run of exceeding samples started
+    index = np.arange(samples, dtype=np.int32)
+    unbroken = np.concatenate([[False], np.diff(times) <= max_gap_seconds])
+    starts = exceeded.copy()
+    starts[:, 1:] &= ~(exceeded[:, :-1] & unbroken[None, 1:])
+    run_start = np.maximum.accumulate(np.where(starts, index, 0), axis=1)
+    ready = exceeded & (times[None, :] - times[run_start] >= duration_hours * 3600)
+
+    band = hysteresis_ratio * np.abs(thresholds)
+    if operator in ("gt", "gte"):
+        cleared = thresholds - values >= band
+    elif operator in ("lt", "lte"):
+        cleared = values - thresholds >= band
+    else:
+        cleared = np.ones(exceeded.shape, dtype=bool)
+    cleared = cleared & ~exceeded
+
+    # Set/reset latch: open from a ready sample until the next clearing one
+    last_ready = np.maximum.accumulate(np.where(ready, index, -1), axis=1)
+    last_cleared = np.maximum.accumulate(np.where(cleared, index, -1), axis=1)
+    is_open = last_ready > last_cleared
+    opened = is_open.copy()
+    opened[:, 1:] &= ~is_open[:, :-1]
+    return opened
+
+def _annual_events(
+    series: Series,
+    field: str,
+    thresholds: np.ndarray,
+    operator: str,
+    duration_hours: float,
+    hysteresis_ratio: float,
+    max_gap_seconds: Optional[float]
+) -> np.ndarray:
+    """(thresholds x calendar years covered) alert counts for one series"""
+    years = series.times.astype("datetime64[s]").astype("datetime64[Y]").astype(np.int64)
+    year_index = years - years[0]
+    n_years = int(year_index[-1]) + 1 if len(years) else 0
+    counts = np.zeros((len(thresholds), n_years), dtype=np.int32)
+    if not n_years or field not in series.values:
+        return counts
+    if max_gap_seconds is None:
+        # Three sampling intervals, as the live default is three check intervals
+        max_gap_seconds = 3 * float(np.median(np.diff(series.times))) if len(series.times) > 1 else 0.0
+    block = max(1, BLOCK_ELEMENTS // len(series.times))
+    for lo in range(0, len(thresholds), block):
+        opened = replay(
+            series.times, series.values[field], thresholds[lo:lo + block],
+            operator, duration_hours, hysteresis_ratio, max_gap_seconds
+        )
+        rows, samples = np.nonzero(opened)
+        flat = np.bincount(rows * n_years + year_index[samples], minlength=opened.shape[0] * n_years)
+        counts[lo:lo + block] = flat.reshape(opened.shape[0], n_years)
+    return counts
+
+def _annual_events_many(args) -> List[np.ndarray]:
+    chunk, *rest = args
+    return [_annual_events(series, *rest) for series in chunk]
+
+class Backtester:
+    """Replays historical series through the monitor's trigger semantics for
+    many candidate thresholds at once.
+
+    Each series is evaluated for every threshold in one vectorized pass;
+    with ``workers`` > 1 series are spread over processes. The sample gap
+    that breaks a sustained run defaults to three of the series' own
+    sampling intervals rather than the live monitor's.
+    """
+
+    def __init__(
+        self,
+        hysteresis_ratio: Optional[float] = None,
+        max_gap_seconds: Optional[float] = None,
+        workers: Optional[int] = None
+    ):
+        self.hysteresis_ratio = settings.alert_hysteresis_ratio if hysteresis_ratio is None else hysteresis_ratio
+        self.max_gap_seconds = max_gap_seconds
+        self.workers = workers or 1
+
+    def annual_events(
+        self,
+        series: Sequence[Series],
+        trigger_type: TriggerType,
+        thresholds: Sequence[float],
+        operator: str = "gt",
+        duration_hours: float = 1
+    ) -> np.ndarray:
+        """(thresholds x location-years) alert counts across every series"""
+        field = OBSERVED_FIELDS.get(TriggerType(trigger_type))
+        if field is None:
+            raise ValueError(f"{TriggerType(trigger_type).value} triggers can't be replayed from observations")
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        args = (field, thresholds, operator, duration_hours, self.hysteresis_ratio, self.max_gap_seconds)
+        if self.workers > 1 and len(series) > 1:
+            size = -(-len(series) // self.workers)
+            chunks = [list(series[i:i + size]) for i in range(0, len(series), size)]
+            with ProcessPoolExecutor(self.workers) as pool:
+                per_series = [counts for result in pool.map(_annual_events_many, [(c, *args) for c in chunks]) for counts in result]
+        else:
+            per_series = [_annual_events(s, *args) for s in series]
+        if not per_series:
+            return np.zeros((len(thresholds), 0), dtype=np.int32)
+        return np.concatenate(per_series, axis=1)
+
+    def run(
+        self,
+        series: Sequence[Series],
+        trigger_type: TriggerType,
+        thresholds: Sequence[float],
+        operator: str = "gt",
+        duration_hours: float = 1,
+        payout_amount: float = 0.0
+    ) -> List[dict]:
+        """Fire frequency and annual payout distribution per threshold.
+
+        Every alert pays ``payout_amount``; payout statistics are over
+        location-years, i.e. each calendar year each series covers.
+        """
+        counts = self.annual_events(series, trigger_type, thresholds, operator, duration_hours)
+        location_years = counts.shape[1]
+        payouts = counts.astype(np.float64) * payout_amount
+        if location_years:
+            quantiles = np.percentile(payouts, [50, 90, 99], axis=1)
+        else:
+            quantiles = np.zeros((3, len(counts)))
+        events = counts.sum(axis=1)
+        return [
+            {
+                "threshold": float(threshold),
+                "events": int(events[i]),
+                "events_per_year": float(events[i] / location_years) if location_years else 0.0,
+                "years_with_event": float((counts[i] > 0).mean()) if location_years else 0.0,
+                "payout_mean": float(payouts[i].mean()) if location_years else 0.0,
+                "payout_p50": float(quantiles[0][i]),
+                "payout_p90": float(quantiles[1][i]),
+                "payout_p99": float(quantiles[2][i]),
+                "payout_max": float(payouts[i].max()) if location_years else 0.0,
+            }
+            for i, threshold in enumerate(np.asarray(thresholds, dtype=np.float64))
+        ]
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from ..models.records import AlertRecord
+from ..models.schemas import RiskLevel
+from ..config import settings
+
+ALERT_OPENED = "alert_opened"
+ALERT_RESOLVED = "alert_resolved"
+RISK_CHANGED = "risk_changed"
+EARLY_WARNING = "early_warning"
+EARLY_WARNING_CLEARED = "early_warning_cleared"
+OVERFLOW = "overflow"
+
+RISK_ORDER = {level: rank for rank, level in enumerate(RiskLevel)}
+
+def score_risk_level(score: float) -> RiskLevel:
+    """Bucket a 0..1 risk score into a risk level"""
+    if score >= 0.75:
+        return RiskLevel.CRITICAL
+    if score >= 0.5:
+        return RiskLevel.HIGH
+    if score >= 0.25:
+        return RiskLevel.MEDIUM
+    return RiskLevel.LOW
+
+class Event:
+    """One push update. ``key`` identifies what it is about, so a newer
+    event with the same key supersedes an undelivered older one"""
+    __slots__ = ("kind", "key", "data", "insurer_id", "location_id", "risk_level", "_encoded")
+
+    def __init__(self, kind: str, key: str, data: dict, insurer_id: Optional[str], location_id: str, risk_level: RiskLevel):
+        self.kind = kind
+        self.key = key
+        self.data = data
+        self.insurer_id = insurer_id
+        self.location_id = location_id
+        self.risk_level = risk_level
+        self._encoded: Optional[str] = None
+
+    @classmethod
+    def for_alert(cls, alert: AlertRecord, insurer_id: Optional[str]) -> "Event":
+        kind = ALERT_RESOLVED if alert.resolved else ALERT_OPENED
+        return cls(kind, f"alert:{alert.id}", alert.to_json(), insurer_id, alert.location_id, alert.risk_level)
+
+    def encode(self) -> str:
+        """SSE frame, serialised once however many subscribers receive it"""
+        if self._encoded is None:
+            self._encoded = f"event: {self.kind}\ndata: {json.dumps(self.data)}\n\n"
+        return self._encoded
+
+class Subscription:
+    """A subscriber's filters plus its undelivered events, coalesced by key"""
+
+    def __init__(
+        self,
+        insurer_id: Optional[str] = None,
+        location_id: Optional[str] = None,
+        min_risk_level: Optional[RiskLevel] = None,
+        max_pending: Optional[int] = None
+    ):
+        self.insurer_id = insurer_id
+        self.location_id = location_id
+        self.min_rank = RISK_ORDER[min_risk_level] if min_risk_level else 0
+        self.max_pending = max_pending or settings.stream_max_pending_events
+        self.pending: "OrderedDict[str, Event]" = OrderedDict()
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+
+    def matches(self, event: Event) -> bool:
+        return (
+            (self.location_id is None or event.location_id == self.location_id)
+            and (self.insurer_id is None or event.insurer_id == self.insurer_id)
+            and RISK_ORDER[event.risk_level] >= self.min_rank
+        )
+
+    def push(self, event: Event):
+        """Queue an event without blocking; a slow consumer only ever holds
+        the latest event per key, and the oldest keys are dropped past
+        ``max_pending``"""
+        self.pending.pop(event.key, None)
+        self.pending[event.key] = event
+        while len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[Event]:
+        """Everything pending, waiting up to ``timeout`` for something to arrive"""
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._wakeup.clear()
+        events = list(self.pending.values())
+        self.pending.clear()
+        if self.dropped:
+            events.insert(0, Event(OVERFLOW, OVERFLOW, {"dropped": self.dropped}, None, "", RiskLevel.LOW))
+            self.dropped = 0
+        return events
+
+class Broadcaster:
+    """Fans monitor events out to push subscribers.
+
+    Subscribers are indexed by location and insurer so publishing touches
+    only those that can match, and publishing never awaits: each
+    subscriber coalesces into its own pending set and drains it at its own
+    pace.
+    """
+
+    def __init__(self):
+        self._by_location: Dict[str, Set[Subscription]] = {}
+        self._by_insurer: Dict[str, Set[Subscription]] = {}
+        self._unfiltered: Set[Subscription] = set()
+        self.published = 0
+
+    def __len__(self) -> int:
+        return sum(map(len, self._by_location.values())) + sum(map(len, self._by_insurer.values())) + len(self._unfiltered)
+
+    def _bucket(self, subscription: Subscription) -> Set[Subscription]:
+        if subscription.location_id is not None:
+            return self._by_location.setdefault(subscription.location_id, set())
+        if subscription.insurer_id is not None:
+            return self._by_insurer.setdefault(subscription.insurer_id, set())
+        return self._unfiltered
+
+    def subscribe(self, **filters) -> Subscription:
+        subscription = Subscription(**filters)
+        self._bucket(subscription).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        bucket = self._bucket(subscription)
+        bucket.discard(subscription)
+        if not bucket and bucket is not self._unfiltered:
+            index = self._by_location if subscription.location_id is not None else self._by_insurer
+            index.pop(subscription.location_id if subscription.location_id is not None else subscription.insurer_id, None)
+
+    def wants(self, location_id: str, insurer_id: Optional[str]) -> bool:
+        """Whether any subscriber could receive events for this location"""
+        return bool(self._unfiltered or location_id in self._by_location or insurer_id in self._by_insurer)
+
+    def publish(self, event: Event):
+        self.published += 1
+        for bucket in (
+            self._by_location.get(event.location_id, ()),
+            self._by_insurer.get(event.insurer_id, ()),
+            self._unfiltered,
+        ):
+            for subscription in bucket:
+                if subscription.matches(event):
+                    subscription.push(event)
+
+    def stats(self) -> Dict[str, int]:
+        buckets = [*self._by_location.values(), *self._by_insurer.values(), self._unfiltered]
+        return {
+            "subscribers": len(self),
+            "published": self.published,
+            "pending": sum(len(subscription.pending) for bucket in buckets for subscription in bucket),
+        }
@@ -0,0 +1,152 @@
+import csv
+import json
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from ..config import settings
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+class BulkImportError(ValueError):
+    """The upload as a whole can't be read, as opposed to one bad row"""
+
+def detect_format(content_type: Optional[str], requested: Optional[str] = None) -> str:
+    """Pick NDJSON or CSV from an explicit format or the request content type"""
+    if requested:
+        return requested
+    if content_type and "csv" in content_type:
+        return CSV
+    return NDJSON
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: Optional[int] = None) -> AsyncIterator[Optional[bytes]]:
+    """Split a byte stream into lines without holding the whole body.
+
+    A line longer than ``max_line`` bytes is yielded once as None and the
+    rest of it skipped, so no single line is ever held beyond the cap.
+    """
+    max_line = max_line or settings.bulk_import_max_line_bytes
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False  # The end of the overlong line
+                continue
+            yield None if len(line) > max_line else line.rstrip(b"\r")
+        if len(buffer) > max_line:
+            if not skipping:
+                skipping = True
+                yield None
+            buffer = b""
+    if buffer and not skipping:
+        yield buffer.rstrip(b"\r")
+
+async def iter_records(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    max_line: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (row number, record) pairs; records that fail to parse are
+    yielded as exceptions so the caller can report them per row.
+
+    CSV rows are parsed one line at a time, so quoted fields must not
+    contain newlines. Empty CSV cells are dropped so model defaults apply.
+    Raises BulkImportError for a CSV header that can't be read.
+    """
+    max_line = max_line or settings.bulk_import_max_line_bytes
+    header = None
+    row = 0
+    async for raw in iter_lines(chunks, max_line):
+        if raw is not None and not raw.strip():
+            continue
+        if fmt == CSV and header is None:
+            try:
+                if raw is None:
+                    raise ValueError("line too long")
+                header = next(csv.reader([raw.decode("utf-8-sig")]))
+            except ValueError as e:
+                raise BulkImportError(f"unreadable CSV header: {e}")
+            continue
+        row += 1
+        try:
+            if raw is None:
+                raise ValueError(f"line longer than {max_line} bytes")
+            line = raw.decode("utf-8")
+            if fmt == CSV:
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+                yield row, {k: v for k, v in zip(header, values) if v != ""}
+            else:
+                yield row, json.loads(line)
+        except (ValueError, RecursionError) as e:  # Deeply nested JSON overflows the decoder
+            yield row, e
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+async def import_stream(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    model: Type[BaseModel],
+    write: Callable[[List[BaseModel]], Awaitable[int]],
+    prepare: Optional[Callable[[dict], dict]] = None,
+    chunk_size: Optional[int] = None,
+    max_errors: Optional[int] = None
+) -> Dict[str, Any]:
+    """Validate streamed rows in chunks and write each valid chunk in one batch.
+
+    Memory stays bounded by one chunk plus at most ``max_errors`` error
+    entries, however large the upload. Rows without an id get a new one;
+    rows with an id are upserted.
+    """
+    chunk_size = chunk_size or settings.bulk_import_chunk_size
+    max_errors = settings.bulk_import_max_errors if max_errors is None else max_errors
+    result = {"total": 0, "inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    # Keyed by id so a repeated id within one batch upserts once (later row wins)
+    batch: Dict[str, BaseModel] = {}
+
+    def fail(row: int, error: Exception):
+        result["failed"] += 1
+        if len(result["errors"]) < max_errors:
+            result["errors"].append({"row": row, "error": _error_message(error)})
+        else:
+            result["errors_truncated"] = True
+
+    async for row, record in iter_records(chunks, fmt):
+        result["total"] += 1
+        if isinstance(record, Exception):
+            fail(row, record)
+            continue
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("row must be an object")
+            if prepare:
+                record = prepare(record)
+            item = model.model_validate(record)
+        except (ValueError, ValidationError, RecursionError) as e:
+            fail(row, e)
+            continue
+        if not item.id:
+            item.id = str(uuid.uuid4())
+        batch[item.id] = item
+        if len(batch) >= chunk_size:
+            result["inserted"] += await write(list(batch.values()))
+            batch = {}
+
+    if batch:
+        result["inserted"] += await write(list(batch.values()))
+    return result
+
+def prepare_location(record: dict) -> dict:
+    """CSV carries policy_ids as a ';'-separated string"""
+    if isinstance(record.get("policy_ids"), str):
+        record["policy_ids"] = [p for p in record["policy_ids"].split(";") if p]
+    return record
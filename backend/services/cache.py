@@ -0,0 +1,243 @@
+import asyncio
+import dataclasses
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
+from .spatial import fan_out
+from .weather_service import WeatherService
+from ..models.records import Observation
+from ..models.schemas import WeatherData, ForecastData
+from ..config import settings
+
+_MISSING = object()
+
+class _LeaderCancelled(Exception):
+    """Handed to coalesced callers when the fetch they were waiting on was cancelled"""
+
+class LRUCache:
+    """In-process LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or _MISSING"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+class SharedCache:
+    """Cache tier shared between workers; values are serialized strings"""
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+class LocalSharedCache(SharedCache):
+    """In-process stand-in for Redis, used when no Redis is configured"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+
+class RedisSharedCache(SharedCache):
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+def create_shared_cache(backend: Optional[str] = None) -> Optional[SharedCache]:
+    """Build the shared tier named by settings.cache_backend"""
+    backend = backend or settings.cache_backend
+    if backend == "redis":
+        return RedisSharedCache(settings.redis_url)
+    if backend == "local":
+        return LocalSharedCache()
+    return None
+
+class TieredCache:
+    """Local LRU in front of an optional shared tier, with single-flight
+    loading so concurrent misses for one key share a single fetch"""
+
+    def __init__(self, max_entries: Optional[int] = None, shared: Optional[SharedCache] = None):
+        self.local = LRUCache(max_entries or settings.cache_max_entries)
+        self.shared = shared
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self.coalesced = 0
+        self.upstream_fetches = 0
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        encode: Callable[[Any], str],
+        decode: Callable[[str], Any]
+    ) -> Any:
+        while True:
+            value = self.local.get(key)
+            if value is not _MISSING:
+                return value
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                continue  # The caller that was fetching gave up, not this one: fetch again
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, fetch, ttl, encode, decode)
+        except asyncio.CancelledError:
+            # Cancelling the shared future would cancel every follower with it
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved here so lone failures don't warn
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, key, fetch, ttl, encode, decode) -> Any:
+        if self.shared is not None:
+            try:
+                raw = await self.shared.get(key)
+            except Exception:
+                # A shared-tier outage degrades to upstream fetches
+                raw = None
+                self.shared_errors += 1
+            if raw is not None:
+                self.shared_hits += 1
+                value = decode(raw)
+                self.local.set(key, value, ttl)
+                return value
+
+        self.upstream_fetches += 1
+        value = await fetch()
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, encode(value), ttl)
+            except Exception:
+                self.shared_errors += 1
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.local),
+            "hits": self.local.hits,
+            "misses": self.local.misses,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            "coalesced": self.coalesced,
+            "upstream_fetches": self.upstream_fetches,
+        }
+
+    async def aclose(self):
+        if self.shared is not None:
+            await self.shared.aclose()
+
+_forecast_list = TypeAdapter(List[ForecastData])
+
+class CachedWeatherService:
+    """WeatherService front end that serves repeat lookups from TieredCache.
+
+    Keys are the requested coordinates, so callers that snap to grid cells
+    share entries. Results are copied per call because routes mutate them.
+    """
+
+    def __init__(self, weather_service: Optional[WeatherService] = None, cache: Optional[TieredCache] = None):
+        self.weather_service = weather_service or WeatherService()
+        self.cache = cache or TieredCache(shared=create_shared_cache())
+
+    async def get_current_weather(self, lat: float, lon: float, location_id: str) -> WeatherData:
+        return (await self.get_observation(lat, lon, location_id)).to_schema()
+
+    async def get_observation(self, lat: float, lon: float, location_id: str) -> Observation:
+        # Shared-tier entries keep WeatherData's JSON shape
+        weather = await self.cache.get_or_fetch(
+            f"weather:{lat:.6f}:{lon:.6f}",
+            lambda: self.weather_service.get_observation(lat, lon, location_id),
+            settings.weather_cache_ttl_seconds,
+            lambda w: json.dumps(w.to_json()),
+            lambda raw: Observation.from_json(json.loads(raw))
+        )
+        return dataclasses.replace(weather, location_id=location_id)
+
+    async def get_forecast(self, lat: float, lon: float, location_id: str) -> List[ForecastData]:
+        forecasts = await self.cache.get_or_fetch(
+            f"forecast:{lat:.6f}:{lon:.6f}",
+            lambda: self.weather_service.get_forecast(lat, lon, location_id),
+            settings.forecast_update_interval,
+            lambda f: _forecast_list.dump_json(f).decode(),
+            _forecast_list.validate_json
+        )
+        return [fan_out(f, location_id) for f in forecasts]
+
+    async def aclose(self):
+        await self.weather_service.aclose()
+        await self.cache.aclose()
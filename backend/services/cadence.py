@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from ..config import settings
+
+# Longest a calm cell is stretched to before every cell slows down together
+CALM_CEILING_SECONDS = 86400
+
+class CellCadence:
+    """Polling state of one grid cell"""
+    __slots__ = ("interval", "urgency", "due", "polled_at", "polls", "lag")
+
+    def __init__(self, interval: float, due: float):
+        self.interval = interval
+        self.urgency: Optional[float] = None
+        self.due = due
+        self.polled_at: Optional[float] = None
+        self.polls = 0
+        self.lag = 0.0  # How late the last poll started
+
+class CadenceScheduler:
+    """Earliest-deadline-first polling plan for grid cells.
+
+    Each cell polls on its own interval, interpolated geometrically from
+    ``max_interval`` (urgency 0: calm) down to ``min_interval`` (urgency 1:
+    at or past a threshold). Due cells come off a heap keyed on next-due
+    time, most overdue first.
+
+    With a ``budget_per_minute``, intervals are refitted whenever the cell
+    set is re-tracked so the expected poll rate stays within it, stretching
+    calm cells first (up to CALM_CEILING_SECONDS) and only then slowing
+    every cell alike. Polls are also capped at the budget as they are handed
+    out, which absorbs bursts such as the first round after startup.
+    """
+
+    def __init__(
+        self,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        budget_per_minute: Optional[float] = None
+    ):
+        self.min_interval = min_interval or settings.poll_min_interval_seconds
+        self.max_interval = max(max_interval or settings.poll_max_interval_seconds, self.min_interval)
+        self.budget_per_minute = settings.poll_budget_per_minute if budget_per_minute is None else budget_per_minute
+        self.share = 1.0  # Fraction of the budget this process may spend, e.g. 1 / workers
+        self.cells: Dict[str, CellCadence] = {}
+        # (due, seq, cell); entries whose due no longer matches the cell's are stale
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._tokens: Optional[float] = None  # Budget bucket, filled on first use
+        self._refilled = 0.0
+        self.budget_waits = 0  # Times due cells had to wait for the budget
+        self._ceiling = self.max_interval  # Interval at urgency 0, raised to fit the budget
+        self._stretch = 1.0  # Applied to every interval once the ceiling is maxed out
+
+    @property
+    def rate(self) -> float:
+        """Budgeted polls per second, 0 when unlimited"""
+        return self.budget_per_minute * self.share / 60.0
+
+    def interval_for(self, urgency: float) -> float:
+        urgency = min(max(urgency, 0.0), 1.0)
+        return self._stretch * self._ceiling * (self.min_interval / self._ceiling) ** urgency
+
+    def fit_budget(self):
+        """Refit intervals so the cells' expected poll rate fits the budget"""
+        self._ceiling, self._stretch = self.max_interval, 1.0
+        if self.rate <= 0 or not self.cells:
+            return
+        urgency = np.clip(np.fromiter(
+            (state.urgency or 0.0 for state in self.cells.values()), np.float64, len(self.cells)
+        ), 0.0, 1.0)
+
+        def demand(ceiling: float) -> float:
+            return float(np.sum((self.min_interval / ceiling) ** -urgency / ceiling))
+
+        if demand(self.max_interval) <= self.rate:
+            return
+        low, high = self.max_interval, max(self.max_interval, CALM_CEILING_SECONDS)
+        if demand(high) > self.rate:
+            self._ceiling, self._stretch = high, demand(high) / self.rate
+            return
+        for _ in range(30):  # Bisect in log space
+            middle = (low * high) ** 0.5
+            low, high = (middle, high) if demand(middle) > self.rate else (low, middle)
+        self._ceiling = high
+
+    def track(self, cells: Iterable[str], now: Optional[float] = None):
+        """Set the cells to poll: new ones are due straight away, missing ones are dropped"""
+        now = time.monotonic() if now is None else now
+        cells = set(cells)
+        for cell in self.cells.keys() - cells:
+            del self.cells[cell]
+        for cell in cells - self.cells.keys():
+            self.cells[cell] = CellCadence(self.interval_for(0.0), now)
+            self._push(cell, now)
+        self.fit_budget()
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Take the cells due by ``now`` that the budget allows, most overdue first.
+
+        Each is provisionally rescheduled one interval later, so a poll that
+        fails or times out is retried on its old cadence.
+        """
+        now = time.monotonic() if now is None else now
+        allowed = self._available(now)
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if allowed is not None and len(due) >= allowed:
+                self.budget_waits += 1
+                break
+            entry = heapq.heappop(self._heap)
+            if not self._current(entry):
+                continue
+            cell = entry[2]
+            state = self.cells[cell]
+            state.lag = now - state.due
+            state.due = now + state.interval
+            self._push(cell, state.due)
+            due.append(cell)
+        if allowed is not None:
+            self._tokens -= len(due)
+        return due
+
+    def observe(self, cell: str, urgency: float, now: Optional[float] = None):
+        """Record a completed poll and reschedule the cell for its new urgency"""
+        state = self.cells.get(cell)
+        if state is None:
+            return  # Dropped while the poll was in flight
+        now = time.monotonic() if now is None else now
+        state.urgency = urgency
+        state.interval = self.interval_for(urgency)
+        state.polled_at = now
+        state.polls += 1
+        state.due = now + state.interval
+        self._push(cell, state.due)
+
+    def wake_at(self, now: Optional[float] = None) -> Optional[float]:
+        """When the next cell falls due and the budget can pay for it"""
+        while self._heap and not self._current(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        now = time.monotonic() if now is None else now
+        wake = self._heap[0][0]
+        allowed = self._available(now)
+        if allowed is not None and allowed < 1:
+            wake = max(wake, now + (1 - self._tokens) / self.rate)
+        return wake
+
+    def _available(self, now: float) -> Optional[int]:
+        if self.rate <= 0:
+            return None
+        capacity = max(1.0, self.rate * 60.0)
+        if self._tokens is None:
+            self._tokens, self._refilled = capacity, now
+        self._tokens = min(capacity, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        return int(self._tokens)
+
+    def _push(self, cell: str, due: float):
+        heapq.heappush(self._heap, (due, next(self._seq), cell))
+        if len(self._heap) > 4 * len(self.cells) + 64:
+            # Every reschedule leaves a stale entry behind; rebuild before they pile up
+            self._heap = [entry for entry in self._heap if self._current(entry)]
+            heapq.heapify(self._heap)
+
+    def _current(self, entry: Tuple[float, int, str]) -> bool:
+        state = self.cells.get(entry[2])
+        return state is not None and state.due == entry[0]
+
+    def describe(self, cell: str, now: Optional[float] = None) -> Optional[dict]:
+        """Cadence metrics of one cell"""
+        state = self.cells.get(cell)
+        if state is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return {
+            "interval_seconds": round(state.interval, 1),
+            "urgency": state.urgency,
+            "polls": state.polls,
+            "last_polled_seconds_ago": None if state.polled_at is None else round(now - state.polled_at, 1),
+            "next_due_in_seconds": round(state.due - now, 1),
+            "lag_seconds": round(state.lag, 1),
+        }
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        now = time.monotonic() if now is None else now
+        intervals = sorted(state.interval for state in self.cells.values())
+        demand = sum(60.0 / interval for interval in intervals)
+        return {
+            "cells": len(intervals),
+            "min_interval_seconds": round(intervals[0], 1) if intervals else None,
+            "median_interval_seconds": round(intervals[len(intervals) // 2], 1) if intervals else None,
+            "max_interval_seconds": round(intervals[-1], 1) if intervals else None,
+            "demand_per_minute": round(demand, 1),
+            "budget_per_minute": round(self.rate * 60.0, 1) or None,
+            "calm_interval_seconds": round(self.interval_for(0.0), 1),
+            "overdue": sum(1 for state in self.cells.values() if state.due <= now),
+            "max_lag_seconds": round(max((state.lag for state in self.cells.values()), default=0.0), 1),
+            "budget_waits": self.budget_waits,
+        }
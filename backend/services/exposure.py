@@ -0,0 +1,318 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from .cache import CachedWeatherService
+from .repository import LocationRepository, TriggerRepository
+from .risk_engine import OBSERVED_FIELDS, AnyTrigger, RiskEngine, TriggerColumns
+from .scheduler import FetchScheduler
+from .sharding import ShardCoordinator
+from .spatial import SpatialGrid, cell_center
+from .timeseries import TimeSeriesStore
+from ..database import Database
+from ..models.records import LocationRecord, TriggerRecord
+from ..models.schemas import ForecastData, TriggerType
+from ..config import settings
+
+# Forecast field compared against each observed trigger type's threshold
+FORECAST_FIELDS = {
+    TriggerType.RAINFALL: "rainfall_amount",
+    TriggerType.WIND_SPEED: "wind_speed",
+    TriggerType.TEMPERATURE: "temperature"
+}
+# Rows of a cell's forecast matrix: trigger_columns() column order, then rain probability
+_FORECAST_ROWS = tuple(FORECAST_FIELDS[t] for t in OBSERVED_FIELDS) + ("rainfall_probability",)
+_PROBABILITY_ROW = len(OBSERVED_FIELDS)
+_RAINFALL_COLUMN = list(OBSERVED_FIELDS).index(TriggerType.RAINFALL)
+SLOT_HOURS = 3
+
+GROUP_FIELDS = ("insurer_id", "region", "trigger_type")
+# (insurer_id, region, trigger_type)
+GroupKey = Tuple[str, str, str]
+# Runs after each refresh with the ids of the triggers it found changed
+Stage = Callable[["ExposureEngine", Set[str]], None]
+
+class ExposureEngine:
+    """Payout exposure of the trigger portfolio over the forecast horizon.
+
+    For every active trigger with a payout, a forecast slot "hits" when the
+    cell's forecast meets the threshold for ``duration_hours`` of
+    consecutive 3-hour slots. Worst case pays every trigger that hits at
+    least once; expected weights each hit by its chance of happening (the
+    slot's precipitation probability for rainfall, certain otherwise) and
+    pays ``1 - prod(1 - p)``. Trigger types without a forecast field never
+    hit but still count towards the limit.
+
+    Contributions are kept per trigger and summed into per-(insurer,
+    region, trigger type) totals, so a refresh only recomputes triggers
+    whose definition, location or cell forecast changed. ``stages`` see the
+    same changed triggers after every refresh.
+    """
+
+    def __init__(
+        self,
+        weather_service: Optional[CachedWeatherService] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        database: Optional[Database] = None,
+        horizon_hours: Optional[int] = None,
+        region_precision: Optional[int] = None,
+        history: Optional[TimeSeriesStore] = None,
+        stages: Optional[List[Stage]] = None,
+        coordinator: Optional[ShardCoordinator] = None
+    ):
+        self.weather_service = weather_service or CachedWeatherService()
+        self.scheduler = scheduler or FetchScheduler()
+        self.risk_engine = RiskEngine()
+        self.history = history  # Keeps every changed forecast, if set
+        self.stages: List[Stage] = list(stages or [])
+        # With a coordinator, only the shard-0 owner refreshes in the background
+        self.coordinator = coordinator
+        self.grid = SpatialGrid()
+        self.horizon_hours = horizon_hours or settings.exposure_horizon_hours
+        self.horizon_slots = math.ceil(self.horizon_hours / SLOT_HOURS)
+        self.region_precision = region_precision or settings.exposure_region_precision
+        self.location_repository = LocationRepository(database)
+        self.trigger_repository = TriggerRepository(database)
+
+        self.locations: Dict[str, LocationRecord] = {}
+        self.triggers: Dict[str, TriggerRecord] = {}
+        self._cell_of: Dict[str, str] = {}  # location_id -> cell
+        self._location_triggers: Dict[str, Set[str]] = {}
+        self._cell_locations: Dict[str, Set[str]] = {}
+        self._forecasts: Dict[str, np.ndarray] = {}  # cell -> (fields x slots)
+        self._forecast_times: Dict[str, List[datetime]] = {}  # cell -> forecast_time of each slot
+        # trigger_id -> (group, limit, expected, worst_case)
+        self._contributions: Dict[str, Tuple[GroupKey, float, float, float]] = {}
+        # Per group: [triggers, limit, expected, worst_case]
+        self._totals: Dict[GroupKey, np.ndarray] = {}
+        self._dirty: Set[str] = set()
+        self._synced_at: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self.as_of: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    async def refresh(self, force: bool = False):
+        """Pull portfolio changes and forecasts, then recompute what changed.
+
+        Runs at most once per ``exposure_refresh_seconds`` unless forced.
+        """
+        async with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < settings.exposure_refresh_seconds:
+                return
+            await self.sync()
+            await self.fetch_forecasts()
+            dirty, self._dirty = self._dirty, set()
+            self.recompute(dirty)
+            for stage in self.stages:
+                stage(self, dirty)
+            self._refreshed_at = now
+            self.as_of = datetime.utcnow()
+
+    def start(self, interval: Optional[float] = None):
+        """Refresh in the background, so stages run without waiting for a request"""
+        self.task = asyncio.create_task(self._refresh_loop(interval or settings.prealert_interval_seconds))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            if self.coordinator is None or 0 in self.coordinator.owned:
+                try:
+                    await self.refresh(force=True)
+                except Exception as e:
+                    print(f"Exposure refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def sync(self):
+        """Apply locations and triggers written since the last sync"""
+        started = datetime.utcnow()
+        since = self._synced_at - timedelta(seconds=settings.sync_overlap_seconds) if self._synced_at else None
+        for location in await self.location_repository.records_changed_since(since):
+            self.set_location(location)
+        for trigger in await self.trigger_repository.records_changed_since(since):
+            self.set_trigger(trigger)
+        self._synced_at = started
+
+    def set_location(self, location: LocationRecord):
+        cell = self.grid.cell_of(location.latitude, location.longitude)
+        previous = self._cell_of.get(location.id)
+        if previous is not None and previous != cell:
+            self._cell_locations[previous].discard(location.id)
+        self.locations[location.id] = location
+        self._cell_of[location.id] = cell
+        self._cell_locations.setdefault(cell, set()).add(location.id)
+        self._dirty.update(self._location_triggers.get(location.id, ()))
+
+    def set_trigger(self, trigger: TriggerRecord):
+        previous = self.triggers.get(trigger.id)
+        if previous is not None and previous.location_id != trigger.location_id:
+            self._location_triggers[previous.location_id].discard(trigger.id)
+        self.triggers[trigger.id] = trigger
+        self._location_triggers.setdefault(trigger.location_id, set()).add(trigger.id)
+        self._dirty.add(trigger.id)
+
+    async def fetch_forecasts(self):
+        """Fetch (usually from cache) the forecast of every portfolio cell"""
+        cells = [cell for cell, members in self._cell_locations.items() if members]
+
+        def fetch(cell: str):
+            lat, lon = cell_center(cell)
+            return lambda: self.weather_service.get_forecast(lat, lon, cell)
+
+        async def on_result(cell: str, forecasts: List[ForecastData]):
+            if self.update_forecast(cell, forecasts) and self.history:
+                self.history.record_forecasts(cell, forecasts)
+
+        async def on_error(cell: str, error: Exception):
+            print(f"Exposure: forecast for cell {cell} unavailable: {error}")
+
+        await self.scheduler.run_cycle({cell: fetch(cell) for cell in cells}, on_result, on_error)
+        if self.history:
+            await self.history.flush()
+
+    def update_forecast(self, cell: str, forecasts: Sequence[ForecastData]) -> bool:
+        """Store a cell's forecast; marks its triggers dirty only if it changed"""
+        matrix = np.full((len(_FORECAST_ROWS), self.horizon_slots), np.nan)
+        for j, forecast in enumerate(forecasts[:self.horizon_slots]):
+            for i, field in enumerate(_FORECAST_ROWS):
+                matrix[i, j] = getattr(forecast, field)
+        times = [forecast.forecast_time for forecast in forecasts[:self.horizon_slots]]
+        previous = self._forecasts.get(cell)
+        if previous is not None and np.array_equal(previous, matrix, equal_nan=True) and self._forecast_times[cell] == times:
+            return False
+        self._forecasts[cell] = matrix
+        self._forecast_times[cell] = times
+        for location_id in self._cell_locations.get(cell, ()):
+            self._dirty.update(self._location_triggers.get(location_id, ()))
+        return True
+
+    def slot_times(self, location_id: str) -> List[datetime]:
+        """forecast_time of each slot of the location's cell forecast; empty before one is fetched"""
+        return self._forecast_times.get(self._cell_of.get(location_id), [])
+
+    def recompute(self, dirty: Optional[Set[str]] = None) -> int:
+        """Recompute dirty triggers and apply the deltas to the group totals"""
+        if dirty is None:
+            dirty, self._dirty = self._dirty, set()
+        self._retract(dirty)
+        triggers = [
+            t for t in (self.triggers.get(i) for i in dirty)
+            if t is not None and t.active and t.payout_amount and t.location_id in self.locations
+        ]
+        if not triggers:
+            return 0
+
+        limit, expected, worst = self.exposure(triggers)
+        keys = [
+            (
+                self.locations[t.location_id].insurer_id,
+                self._cell_of[t.location_id][:self.region_precision],
+                t.trigger_type.value
+            )
+            for t in triggers
+        ]
+        self._contributions.update(zip(
+            (t.id for t in triggers),
+            zip(keys, limit.tolist(), expected.tolist(), worst.tolist())
+        ))
+
+        # Sum per group in numpy, then touch each group's totals once
+        codes: Dict[GroupKey, int] = {}
+        index = np.fromiter((codes.setdefault(key, len(codes)) for key in keys), np.intp, len(keys))
+        sums = np.stack([
+            np.bincount(index, weights=column, minlength=len(codes))
+            for column in (np.ones(len(keys)), limit, expected, worst)
+        ], axis=1)
+        for key, row in zip(codes, sums):
+            self._totals.setdefault(key, np.zeros(4))
+            self._totals[key] += row
+        return len(triggers)
+
+    def _retract(self, trigger_ids: Iterable[str]):
+        removed: Dict[GroupKey, np.ndarray] = {}
+        for trigger_id in trigger_ids:
+            entry = self._contributions.pop(trigger_id, None)
+            if entry is not None:
+                key, *amounts = entry
+                removed.setdefault(key, np.zeros(4))
+                removed[key] += (1.0, *amounts)
+        for key, row in removed.items():
+            self._totals[key] -= row
+            if self._totals[key][0] <= 0:
+                del self._totals[key]
+
+    def sustained(self, triggers: Sequence[AnyTrigger]) -> Tuple[np.ndarray, TriggerColumns, np.ndarray, np.ndarray]:
+        """Each trigger's cell forecast (n, fields, slots), its columns, the
+        forecast value it compares per slot, and which slots it would fire in"""
+        n, slots = len(triggers), self.horizon_slots
+        missing = np.full((len(_FORECAST_ROWS), slots), np.nan)
+        forecasts = np.stack([
+            self._forecasts.get(self._cell_of[t.location_id], missing) for t in triggers
+        ])  # (n, fields, slots)
+        columns = self.risk_engine.trigger_columns(triggers)
+        windows = np.fromiter(
+            (max(1, math.ceil(t.duration_hours / SLOT_HOURS)) for t in triggers), np.int64, n
+        )
+
+        values = forecasts[np.arange(n), np.maximum(columns.column, 0)]
+        values[columns.column < 0] = np.nan
+        hits = self.risk_engine.evaluate_batch(
+            values,
+            np.broadcast_to(columns.threshold[:, None], values.shape),
+            np.broadcast_to(columns.operator[:, None], values.shape)
+        )
+
+        # A slot counts once the condition has held for the trigger's whole window
+        running = np.concatenate([np.zeros((n, 1), np.int64), np.cumsum(hits, axis=1)], axis=1)
+        start = np.arange(slots)[None, :] + 1 - windows[:, None]
+        held = running[:, 1:] - np.take_along_axis(running, np.maximum(start, 0), axis=1)
+        return forecasts, columns, values, (start >= 0) & (held == windows[:, None])
+
+    def chance(self, forecasts: np.ndarray, columns: TriggerColumns) -> np.ndarray:
+        """Probability of each slot's forecast happening: the precipitation
+        probability for rainfall triggers, certain otherwise"""
+        chance = np.ones(forecasts[:, 0].shape)
+        rainfall = columns.column == _RAINFALL_COLUMN
+        chance[rainfall] = np.nan_to_num(forecasts[rainfall, _PROBABILITY_ROW] / 100.0)
+        return np.clip(chance, 0.0, 1.0)
+
+    def exposure(self, triggers: Sequence[AnyTrigger]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(limit, expected, worst_case) payout per trigger, vectorized"""
+        n = len(triggers)
+        forecasts, columns, _, sustained = self.sustained(triggers)
+        payout = np.fromiter((t.payout_amount for t in triggers), np.float64, n)
+        chance = self.chance(forecasts, columns)
+
+        expected = payout * (1.0 - np.prod(np.where(sustained, 1.0 - chance, 1.0), axis=1))
+        worst = np.where(sustained.any(axis=1), payout, 0.0)
+        return payout, expected, worst
+
+    def totals(self, group_by: Iterable[str] = GROUP_FIELDS, insurer_id: Optional[str] = None) -> List[dict]:
+        """Exposure rolled up to the requested subset of GROUP_FIELDS"""
+        group_by = [field for field in GROUP_FIELDS if field in set(group_by)]
+        rolled: Dict[tuple, np.ndarray] = {}
+        for key, total in self._totals.items():
+            if insurer_id and key[0] != insurer_id:
+                continue
+            named = dict(zip(GROUP_FIELDS, key))
+            rolled_key = tuple(named[field] for field in group_by)
+            rolled.setdefault(rolled_key, np.zeros(4))
+            rolled[rolled_key] += total
+        return [
+            {
+                **dict(zip(group_by, key)),
+                "triggers": int(round(total[0])),
+                "limit": float(total[1]),
+                "expected": float(total[2]),
+                "worst_case": float(total[3]),
+            }
+            for key, total in sorted(rolled.items(), key=lambda item: -item[1][2])
+        ]
@@ -0,0 +1,115 @@
+import time
+from typing import Dict, Optional, Tuple
+from .repository import LeaseRepository
+from ..database import Database
+from ..config import settings
+
+class LeaseStore:
+    """Expiring, exclusive named leases shared by every monitor worker"""
+
+    async def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        """Take or renew a lease; False while another holder has it"""
+        raise NotImplementedError
+
+    async def release(self, name: str, holder: str):
+        raise NotImplementedError
+
+    async def holders(self, prefix: str) -> Dict[str, str]:
+        """Live lease name -> holder for names starting with ``prefix``"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+class LocalLeaseStore(LeaseStore):
+    """In-process stand-in; only coordinates monitors within one process"""
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def _live(self, name: str) -> Optional[str]:
+        entry = self._leases.get(name)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    async def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        current = self._live(name)
+        if current is not None and current != holder:
+            return False
+        self._leases[name] = (holder, time.monotonic() + ttl)
+        return True
+
+    async def release(self, name: str, holder: str):
+        if self._live(name) == holder:
+            del self._leases[name]
+
+    async def holders(self, prefix: str) -> Dict[str, str]:
+        live = {name: self._live(name) for name in self._leases if name.startswith(prefix)}
+        return {name: holder for name, holder in live.items() if holder is not None}
+
+# Set-if-free-or-ours and delete-if-ours must be atomic, hence scripts
+_ACQUIRE = """
+local current = redis.call('GET', KEYS[1])
+if current == false or current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class RedisLeaseStore(LeaseStore):
+    def __init__(self, url: str, namespace: str = "lease:"):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url, decode_responses=True)
+        self.namespace = namespace
+        self._acquire = self.client.register_script(_ACQUIRE)
+        self._release = self.client.register_script(_RELEASE)
+
+    async def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        return bool(await self._acquire(keys=[self.namespace + name], args=[holder, max(1, int(ttl * 1000))]))
+
+    async def release(self, name: str, holder: str):
+        await self._release(keys=[self.namespace + name], args=[holder])
+
+    async def holders(self, prefix: str) -> Dict[str, str]:
+        keys = [key async for key in self.client.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if not keys:
+            return {}
+        values = await self.client.mget(keys)
+        return {
+            key[len(self.namespace):]: holder
+            for key, holder in zip(keys, values)
+            if holder is not None
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class DatabaseLeaseStore(LeaseStore):
+    def __init__(self, database: Optional[Database] = None):
+        self.repository = LeaseRepository(database)
+
+    async def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        return await self.repository.acquire(name, holder, ttl)
+
+    async def release(self, name: str, holder: str):
+        await self.repository.release(name, holder)
+
+    async def holders(self, prefix: str) -> Dict[str, str]:
+        return await self.repository.holders(prefix)
+
+def create_lease_store(backend: Optional[str] = None) -> LeaseStore:
+    """Build the store named by settings.lease_backend"""
+    backend = backend or settings.lease_backend
+    if backend == "redis":
+        return RedisLeaseStore(settings.redis_url)
+    if backend == "database":
+        return DatabaseLeaseStore()
+    return LocalLeaseStore()
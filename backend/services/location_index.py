@@ -0,0 +1,378 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .repository import LocationRepository
+from ..database import Database
+from ..models.records import LocationRecord
+from ..config import settings
+
+EARTH_RADIUS = 6371.009  # km, same as geopy.distance.EARTH_RADIUS without importing geopy
+
+# Deep enough for ~1m leaves; past it a leaf of identical coordinates just grows
+MAX_DEPTH = 24
+
+# A GeoJSON polygon: rings of [longitude, latitude], the first the outer boundary, the rest holes
+Polygon = Sequence[Sequence[Sequence[float]]]
+
+# (slots, latitudes, longitudes, unit vectors) of one leaf
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+def unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere, shape (n, 3); the dot product of two is the cosine of their angle"""
+    lat, lon = np.radians(lats), np.radians(lons)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, on geopy's mean earth radius"""
+    lat1, lat2 = math.radians(lat), np.radians(lats)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(np.radians(lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class _Node:
+    __slots__ = ("min_lat", "min_lon", "max_lat", "max_lon", "depth", "children", "slots", "_columns")
+
+    def __init__(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, depth: int):
+        self.min_lat, self.min_lon, self.max_lat, self.max_lon = min_lat, min_lon, max_lat, max_lon
+        self.depth = depth
+        self.children: Optional[List["_Node"]] = None
+        self.slots: List[int] = []
+        self._columns: Optional[Columns] = None
+
+    def quadrant(self, lat: float, lon: float) -> int:
+        return (lat >= (self.min_lat + self.max_lat) / 2) * 2 + (lon >= (self.min_lon + self.max_lon) / 2)
+
+class LocationIndex:
+    """In-memory point quadtree over location coordinates for bbox, radius and polygon search.
+
+    Leaves hold up to ``leaf_size`` locations and split into quadrants when
+    they overflow, so dense areas get finer leaves instead of longer scans.
+    Each leaf caches its coordinates as contiguous arrays, rebuilt only
+    after it changes. A query walks just the leaves overlapping its
+    bounding box, takes whole leaves that fall entirely inside the shape,
+    and tests the points of the rest in one vectorised pass.
+
+    Writes are incremental: ``add``/``add_many`` insert or move locations
+    as they are written, and ``refresh`` pulls rows other processes wrote.
+    Polygon edges are straight lines in longitude/latitude, as in GeoJSON;
+    split polygons that cross the antimeridian.
+    """
+
+    def __init__(self, database: Optional[Database] = None, leaf_size: Optional[int] = None):
+        self.leaf_size = leaf_size or settings.location_index_leaf_size
+        self.location_repository = LocationRepository(database)
+        self._root = _Node(-90.0, -180.0, 90.0, 180.0, 0)
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._insurer = np.empty(0, dtype=np.int32)
+        self._ids: List[Optional[str]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._insurer_codes: Dict[str, int] = {}
+        self._insurer_names: List[str] = []
+        self._synced_at: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, location_id: str) -> bool:
+        return location_id in self._slot_of
+
+    async def refresh(self, force: bool = False):
+        """Apply locations written since the last sync, at most once per refresh interval"""
+        async with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < settings.location_index_refresh_seconds:
+                return
+            started = datetime.utcnow()
+            since = self._synced_at - timedelta(seconds=settings.sync_overlap_seconds) if self._synced_at else None
+            self.add_many(await self.location_repository.records_changed_since(since))
+            self._synced_at = started
+            self._refreshed_at = now
+
+    def add(self, location: LocationRecord):
+        self.add_many([location])
+
+    def add_many(self, locations: Iterable[LocationRecord]):
+        """Insert locations, or move them if their coordinates or insurer changed"""
+        changed: Dict[str, LocationRecord] = {}  # By id, so a repeated id keeps its last row
+        for location in locations:
+            slot = self._slot_of.get(location.id)
+            if slot is not None and (self._lat[slot], self._lon[slot], self._insurer_names[self._insurer[slot]]) == (
+                location.latitude, location.longitude, location.insurer_id
+            ):
+                continue
+            changed[location.id] = location
+        if not changed:
+            return
+        for location_id in changed:
+            self.remove(location_id)
+        new = list(changed.values())
+        slots = self._allocate(len(new))
+        self._lat[slots] = [location.latitude for location in new]
+        self._lon[slots] = [location.longitude for location in new]
+        self._insurer[slots] = [self._insurer_code(location.insurer_id) for location in new]
+        for slot, location in zip(slots.tolist(), new):
+            self._ids[slot] = location.id
+            self._slot_of[location.id] = slot
+        self._insert(self._root, slots)
+
+    def remove(self, location_id: str) -> bool:
+        slot = self._slot_of.pop(location_id, None)
+        if slot is None:
+            return False
+        node = self._root
+        lat, lon = self._lat[slot], self._lon[slot]
+        while node.children is not None:
+            node = node.children[node.quadrant(lat, lon)]
+        node.slots.remove(slot)
+        node._columns = None
+        self._ids[slot] = None
+        self._free.append(slot)
+        return True
+
+    def _insurer_code(self, insurer_id: str) -> int:
+        code = self._insurer_codes.get(insurer_id)
+        if code is None:
+            code = self._insurer_codes[insurer_id] = len(self._insurer_names)
+            self._insurer_names.append(insurer_id)
+        return code
+
+    def _allocate(self, count: int) -> np.ndarray:
+        """Slots for ``count`` new points, reusing freed ones first"""
+        reused = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        start = len(self._ids)
+        fresh = count - len(reused)
+        if start + fresh > len(self._lat):
+            capacity = max(1024, 2 * len(self._lat), start + fresh)
+            self._lat = np.resize(self._lat, capacity)
+            self._lon = np.resize(self._lon, capacity)
+            self._insurer = np.resize(self._insurer, capacity)
+        self._ids.extend([None] * fresh)
+        return np.array(reused + list(range(start, start + fresh)), dtype=np.int64)
+
+    def _insert(self, node: _Node, slots: np.ndarray):
+        """Push slots down to the leaves covering them, splitting leaves that overflow"""
+        if node.children is None:
+            if len(node.slots) + len(slots) <= self.leaf_size or node.depth >= MAX_DEPTH:
+                node.slots.extend(slots.tolist())
+                node._columns = None
+                return
+            slots = np.concatenate([np.array(node.slots, dtype=np.int64), slots])
+            mid_lat, mid_lon = (node.min_lat + node.max_lat) / 2, (node.min_lon + node.max_lon) / 2
+            depth = node.depth + 1
+            node.children = [
+                _Node(node.min_lat, node.min_lon, mid_lat, mid_lon, depth),
+                _Node(node.min_lat, mid_lon, mid_lat, node.max_lon, depth),
+                _Node(mid_lat, node.min_lon, node.max_lat, mid_lon, depth),
+                _Node(mid_lat, mid_lon, node.max_lat, node.max_lon, depth),
+            ]
+            node.slots, node._columns = [], None
+        quadrants = (
+            (self._lat[slots] >= (node.min_lat + node.max_lat) / 2) * 2
+            + (self._lon[slots] >= (node.min_lon + node.max_lon) / 2)
+        )
+        for quadrant, child in enumerate(node.children):
+            selected = slots[quadrants == quadrant]
+            if len(selected):
+                self._insert(child, selected)
+
+    def _columns(self, leaf: _Node) -> Columns:
+        if leaf._columns is None:
+            slots = np.array(leaf.slots, dtype=np.int64)
+            lats, lons = self._lat[slots], self._lon[slots]
+            leaf._columns = (slots, lats, lons, unit_vectors(lats, lons))
+        return leaf._columns
+
+    def _leaves(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[_Node]:
+        """Non-empty leaves overlapping a bbox (min_lon <= max_lon)"""
+        leaves = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.min_lat > max_lat or node.max_lat < min_lat or node.min_lon > max_lon or node.max_lon < min_lon:
+                continue
+            if node.children is not None:
+                stack.extend(node.children)
+            elif node.slots:
+                leaves.append(node)
+        return leaves
+
+    def _in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Slots inside a bbox (min_lon <= max_lon)"""
+        matched: List[np.ndarray] = []
+        partial: List[Columns] = []
+        for leaf in self._leaves(min_lat, min_lon, max_lat, max_lon):
+            columns = self._columns(leaf)
+            if min_lat <= leaf.min_lat and leaf.max_lat <= max_lat and min_lon <= leaf.min_lon and leaf.max_lon <= max_lon:
+                matched.append(columns[0])
+            else:
+                partial.append(columns)
+        if partial:
+            slots, lat, lon = (np.concatenate([c[i] for c in partial]) for i in range(3))
+            matched.append(slots[(lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)])
+        return np.concatenate(matched) if matched else np.empty(0, dtype=np.int64)
+
+    def _filter_insurer(self, slots: np.ndarray, insurer_id: Optional[str]) -> np.ndarray:
+        if insurer_id is None:
+            return slots
+        code = self._insurer_codes.get(insurer_id)
+        if code is None:
+            return slots[:0]
+        return slots[self._insurer[slots] == code]
+
+    def _rows(self, slots: np.ndarray, distances: Optional[np.ndarray] = None) -> List[dict]:
+        lats, lons, insurers = self._lat[slots].tolist(), self._lon[slots].tolist(), self._insurer[slots].tolist()
+        rows = [
+            {"id": self._ids[slot], "latitude": lat, "longitude": lon, "insurer_id": self._insurer_names[insurer]}
+            for slot, lat, lon, insurer in zip(slots.tolist(), lats, lons, insurers)
+        ]
+        if distances is not None:
+            for row, distance in zip(rows, distances.tolist()):
+                row["distance_km"] = distance
+        return rows
+
+    def bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        insurer_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[int, List[dict]]:
+        """Locations inside a bounding box; min_lon > max_lon wraps across the antimeridian.
+
+        Returns the match count and up to ``limit`` matches.
+        """
+        if min_lon <= max_lon:
+            slots = self._in_bbox(min_lat, min_lon, max_lat, max_lon)
+        else:
+            slots = np.concatenate([
+                self._in_bbox(min_lat, min_lon, max_lat, 180.0),
+                self._in_bbox(min_lat, -180.0, max_lat, max_lon),
+            ])
+        slots = self._filter_insurer(slots, insurer_id)
+        return len(slots), self._rows(slots[:limit])
+
+    def radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        insurer_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[int, List[dict]]:
+        """Locations within ``radius_km`` great-circle distance, nearest first"""
+        angle = radius_km / EARTH_RADIUS
+        dlat = math.degrees(angle)
+        if angle >= math.pi or abs(lat) + dlat >= 90.0:
+            # The cap reaches a pole: every longitude is in range
+            ranges = [(max(-90.0, lat - dlat), -180.0, min(90.0, lat + dlat), 180.0)]
+        else:
+            # Exact longitude half-width of a spherical cap
+            dlon = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+            west, east = (lon - dlon + 540.0) % 360.0 - 180.0, (lon + dlon + 540.0) % 360.0 - 180.0
+            if west <= east:
+                ranges = [(lat - dlat, west, lat + dlat, east)]
+            else:
+                ranges = [(lat - dlat, west, lat + dlat, 180.0), (lat - dlat, -180.0, lat + dlat, east)]
+        leaves = [leaf for bbox in ranges for leaf in self._leaves(*bbox)]
+        if not leaves:
+            return 0, []
+        columns = [self._columns(leaf) for leaf in leaves]
+        slots = np.concatenate([c[0] for c in columns])
+        # Cosine of the angle to the centre: a dot product instead of a haversine per point
+        cosines = np.concatenate([c[3] for c in columns]) @ unit_vectors(np.array([lat]), np.array([lon]))[0]
+        within = cosines >= math.cos(min(angle, math.pi))
+        slots, cosines = slots[within], cosines[within]
+        if insurer_id is not None:
+            mine = self._insurer[slots] == self._insurer_codes.get(insurer_id, -1)
+            slots, cosines = slots[mine], cosines[mine]
+        if limit is not None and limit < len(slots):
+            nearest = np.argpartition(-cosines, limit)[:limit]
+        else:
+            nearest = np.arange(len(slots))
+        nearest = slots[nearest[np.argsort(-cosines[nearest], kind="stable")]]
+        return len(slots), self._rows(nearest, haversine_km(lat, lon, self._lat[nearest], self._lon[nearest]))
+
+    def polygon(
+        self,
+        polygons: Sequence[Polygon],
+        insurer_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[int, List[dict]]:
+        """Locations inside any of the polygons (even-odd rule, so holes are excluded)"""
+        matched = []
+        for rings in polygons:
+            edges = _edges(rings)
+            x0, y0, x1, y1 = edges
+            leaves = self._leaves(min(y0.min(), y1.min()), min(x0.min(), x1.min()), max(y0.max(), y1.max()), max(x0.max(), x1.max()))
+            if not leaves:
+                continue
+            boundary = _crosses_boundary(edges, leaves)
+            centres_inside = _even_odd(
+                edges,
+                np.array([(leaf.min_lon + leaf.max_lon) / 2 for leaf in leaves]),
+                np.array([(leaf.min_lat + leaf.max_lat) / 2 for leaf in leaves])
+            )
+            partial: List[Columns] = []
+            for leaf, crossed, inside in zip(leaves, boundary.tolist(), centres_inside.tolist()):
+                if crossed:
+                    partial.append(self._columns(leaf))
+                elif inside:
+                    # No edge touches the leaf, so all of it is on the same side as its centre
+                    matched.append(self._columns(leaf)[0])
+            if partial:
+                slots, lat, lon = (np.concatenate([c[i] for c in partial]) for i in range(3))
+                matched.append(slots[_even_odd(edges, lon, lat)])
+        if not matched:
+            return 0, []
+        slots = np.concatenate(matched)
+        if len(polygons) > 1:
+            slots = np.unique(slots)  # Parts may share an edge
+        slots = self._filter_insurer(slots, insurer_id)
+        return len(slots), self._rows(slots[:limit])
+
+def _edges(rings: Polygon) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(x0, y0, x1, y1) of every edge of every ring, closing rings that aren't closed"""
+    starts, ends = [], []
+    for ring in rings:
+        ring = np.asarray(ring, dtype=float)
+        if ring.ndim != 2 or ring.shape[0] < 3 or ring.shape[1] < 2:
+            raise ValueError("each polygon ring needs at least three [longitude, latitude] positions")
+        starts.append(ring[:, :2])
+        ends.append(np.roll(ring[:, :2], -1, axis=0))
+    if not starts:
+        raise ValueError("a polygon needs at least one ring")
+    start, end = np.concatenate(starts), np.concatenate(ends)
+    return start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+
+def _even_odd(edges, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """Ray casting of many points against all edges, one vectorised pass per edge"""
+    inside = np.zeros(len(px), dtype=bool)
+    for x0, y0, x1, y1 in zip(*(e.tolist() for e in edges)):
+        if y0 != y1:
+            inside ^= ((y1 > py) != (y0 > py)) & (px < (x0 - x1) * (py - y1) / (y0 - y1) + x1)
+    return inside
+
+def _crosses_boundary(edges, leaves: List[_Node]) -> np.ndarray:
+    """Whether any edge intersects each leaf's rectangle: a separating-axis test over edges x leaves"""
+    x0, y0, x1, y1 = (e[:, None] for e in edges)
+    min_x = np.array([leaf.min_lon for leaf in leaves])
+    max_x = np.array([leaf.max_lon for leaf in leaves])
+    min_y = np.array([leaf.min_lat for leaf in leaves])
+    max_y = np.array([leaf.max_lat for leaf in leaves])
+    overlaps = (
+        (np.minimum(x0, x1) <= max_x) & (np.maximum(x0, x1) >= min_x)
+        & (np.minimum(y0, y1) <= max_y) & (np.maximum(y0, y1) >= min_y)
+    )
+    # Corners on both sides of the edge's line (or on it) mean the segment meets the rectangle
+    dx, dy = x1 - x0, y1 - y0
+    sides = [dx * (cy - y0) - dy * (cx - x0) for cx, cy in ((min_x, min_y), (min_x, max_y), (max_x, min_y), (max_x, max_y))]
+    straddles = (np.minimum.reduce(sides) <= 0) & (np.maximum.reduce(sides) >= 0)
+    return (overlaps & straddles).any(axis=0)
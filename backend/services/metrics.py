@@ -0,0 +1,345 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Hot paths update counters and histograms directly; each update is a dict
+lookup and a few additions. Values that already live on a component
+(queue depths, cache counters, cadence lag) are read by collectors at
+scrape time rather than mirrored on every change.
+"""
+import asyncio
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from a cached lookup up to a cycle that overran its interval
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# (name, type, help, labels, value) reported by a collector at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe how long the with-block took"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+class Metric:
+    """A named family of series, one per combination of label values.
+
+    Unlabelled metrics are updated directly (``counter.inc()``); labelled
+    ones through ``labels(...)``, whose result callers on hot paths can keep.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        key = tuple(map(str, values))
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            series = self._series[key] = self._new_series()
+        return series
+
+    def _new_series(self):
+        return _Value()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, series in list(self._series.items()):
+            lines.extend(self._render_series(key, series))
+        return lines
+
+    def _render_series(self, key, series) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(series.value)}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self._default.value += amount
+
+    def _render_series(self, key, series) -> List[str]:
+        return [f"{self.name}_total{_labels(self.labelnames, key)} {_number(series.value)}"]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._default.value = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_series(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_series(self, key, series) -> List[str]:
+        names = self.labelnames + ("le",)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), series.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}")
+        labels = _labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_number(series.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Collector):
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        # Collected samples are grouped so each family gets one HELP/TYPE header
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in list(self._collectors):
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, labels, value in samples:
+                series = f"{name}_total" if kind == "counter" else name
+                family = families.setdefault(name, (kind, documentation, []))
+                family[2].append(f"{series}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        for name, (kind, documentation, series) in families.items():
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", *series])
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Upstream weather API
+UPSTREAM_FETCH_SECONDS = registry.histogram(
+    "upstream_fetch_seconds", "Upstream weather fetch attempts, by outcome", ("outcome",)
+)
+UPSTREAM_RETRIES = registry.counter("upstream_fetch_retries", "Upstream fetch attempts retried after a failure")
+
+# Monitoring cycles
+CYCLE_SECONDS = registry.histogram("monitor_cycle_seconds", "Wall time of each fetch-and-evaluate pass")
+CYCLE_LAG_SECONDS = registry.histogram("monitor_cycle_lag_seconds", "How late each pass started after it was scheduled")
+CYCLE_CELLS = registry.counter("monitor_cells", "Grid cells handled by monitoring passes, by outcome", ("outcome",))
+EVALUATE_SECONDS = registry.histogram(
+    "monitor_evaluate_seconds", "Trigger evaluation and state updates for one grid cell"
+)
+ALERT_WRITE_SECONDS = registry.histogram("monitor_alert_write_seconds", "Alert inserts and resolutions for one grid cell")
+DISPATCH_SECONDS = registry.histogram(
+    "monitor_dispatch_seconds", "Handing one grid cell's alerts to the stream and webhook queue"
+)
+ALERTS = registry.counter("monitor_alerts", "Alerts opened and resolved", ("event",))
+
+# Alert webhooks
+WEBHOOK_DELIVERY_SECONDS = registry.histogram(
+    "webhook_delivery_seconds", "Webhook POST attempts, by outcome", ("outcome",)
+)
+
+# HTTP API
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "API requests by method, route template and status", ("method", "route", "status")
+)
+
+def component_samples(
+    scheduler=None,
+    cache=None,
+    notifier=None,
+    broadcaster=None,
+    cadence=None,
+    history=None
+) -> Iterable[Sample]:
+    """Gauges and counters read from the components a process runs, where present"""
+    if scheduler is not None:
+        yield ("upstream_fetches_in_flight", "gauge", "Upstream fetches currently running", {}, scheduler.in_flight)
+    if cache is not None:
+        stats = cache.stats()
+        requests = "Weather and forecast cache lookups, by result"
+        for result in ("hits", "misses", "shared_hits", "coalesced"):
+            yield ("weather_cache_requests", "counter", requests, {"result": result}, stats[result])
+        yield ("weather_cache_hit_ratio", "gauge", "Local cache hits over local lookups",
+               {}, stats["hits"] / max(1, stats["hits"] + stats["misses"]))
+        yield ("weather_cache_entries", "gauge", "Entries in the local cache", {}, stats["entries"])
+        yield ("weather_cache_evictions", "counter", "Local cache evictions", {}, stats["evictions"])
+    if notifier is not None:
+        yield ("webhook_queue_depth", "gauge", "Alerts waiting for webhook delivery", {}, notifier.queue.qsize())
+        for name, value in notifier.stats.items():
+            yield ("webhook_alerts", "counter", "Webhook alerts by delivery outcome", {"outcome": name}, value)
+    if broadcaster is not None:
+        stats = broadcaster.stats()
+        yield ("stream_subscribers", "gauge", "Connected push subscribers", {}, stats["subscribers"])
+        yield ("stream_pending_events", "gauge", "Events waiting in subscriber queues", {}, stats["pending"])
+        yield ("stream_events_published", "counter", "Events published to the push stream", {}, stats["published"])
+    if cadence is not None:
+        stats = cadence.stats()
+        yield ("monitor_cells_tracked", "gauge", "Grid cells on the adaptive polling schedule", {}, stats["cells"])
+        yield ("monitor_cells_overdue", "gauge", "Grid cells past their poll time", {}, stats["overdue"])
+        yield ("monitor_poll_max_lag_seconds", "gauge", "Largest lag of a cell's last poll behind its due time",
+               {}, stats["max_lag_seconds"])
+    if history is not None:
+        for table, buffered in history.buffered().items():
+            yield ("history_buffered_rows", "gauge", "Samples buffered before the next segment flush",
+                   {"table": table}, buffered)
+
+def route_template(scope) -> str:
+    """The matched route with its parameters put back, e.g. ``/api/locations/{location_id}``.
+
+    Rebuilt from the request path rather than read from ``scope["route"]``,
+    which in recent FastAPI releases lacks the prefix of an included router.
+    """
+    if "route" not in scope:
+        return "unmatched"
+    # Whole segments only, right to left: an id can also occur inside a literal segment
+    segments = scope["path"].split("/")
+    end = len(segments)
+    for name, value in reversed(list(scope.get("path_params", {}).items())):
+        for i in range(end - 1, -1, -1):
+            if segments[i] == str(value):
+                segments[i], end = f"{{{name}}}", i
+                break
+    return "/".join(segments)
+
+class MetricsMiddleware:
+    """Times every HTTP request by method, route template and status.
+
+    A plain ASGI middleware rather than ``@app.middleware("http")``, which
+    wraps each response in extra tasks and streams. Labelling by route
+    template keeps one series per route however many ids are requested;
+    requests matching no route share ``unmatched``. Routes in ``untimed``,
+    such as long-lived event streams, are left out.
+    """
+
+    def __init__(self, app, untimed: Iterable[str] = ()):
+        self.app = app
+        self.untimed = frozenset(untimed)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope)
+            if route not in self.untimed:
+                HTTP_REQUEST_SECONDS.labels(scope["method"], route, status).observe(time.perf_counter() - started)
+
+async def serve(port: int, host: str = "0.0.0.0") -> asyncio.AbstractServer:
+    """Answer every HTTP request on ``port`` with the registry, for processes that don't run the API"""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            body = registry.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + f"Content-Type: {CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
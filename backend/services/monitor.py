@@ -1,71 +1,470 @@
 import asyncio
-from typing import List, Dict
-from datetime import datetime
+import heapq
+import math
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+import numpy as np
 from .weather_service import WeatherService
-from .risk_engine import RiskEngine
-from ..models.schemas import Location, ParametricTrigger, Alert
+from .risk_engine import RiskEngine, OBSERVED_TRIGGER_TYPES
+from .scheduler import FetchScheduler
+from .cadence import CadenceScheduler
+from .spatial import SpatialGrid, cell_center
+from .trigger_registry import TriggerRegistry
+from .trigger_state import TriggerStateEngine, OPENED, CLOSED
+from .repository import AlertRepository, LocationRepository, TriggerRepository
+from .webhooks import WebhookDispatcher
+from .broadcaster import Broadcaster, Event, RISK_CHANGED, RISK_ORDER, score_risk_level
+from .sharding import ShardCoordinator, shard_of
+from .timeseries import TimeSeriesStore
+from .metrics import ALERTS, ALERT_WRITE_SECONDS, DISPATCH_SECONDS, EVALUATE_SECONDS
+from .profiler import SamplingProfiler
+from ..database import Database
+from ..models.records import AlertRecord, LocationRecord, Observation, TriggerRecord
+from ..config import settings
+
+# Shortest sleep of the adaptive loop, so cells falling due close together share a batch
+POLL_TICK_SECONDS = 1.0
 
 class ParametricMonitor:
-    def __init__(self):
-        self.weather_service = WeatherService()
+    def __init__(
+        self,
+        weather_service: Optional[WeatherService] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        database: Optional[Database] = None,
+        notifier: Optional[WebhookDispatcher] = None,
+        broadcaster: Optional[Broadcaster] = None,
+        coordinator: Optional[ShardCoordinator] = None,
+        cadence: Optional[CadenceScheduler] = None,
+        history: Optional[TimeSeriesStore] = None
+    ):
+        self.weather_service = weather_service or WeatherService()
         self.risk_engine = RiskEngine()
+        self.scheduler = scheduler or FetchScheduler()
+        self.notifier = notifier
+        self.broadcaster = broadcaster
+        # Without a coordinator this monitor evaluates every cell
+        self.coordinator = coordinator
+        # Per-cell polling intervals; without one every cell is polled each check interval
+        self.cadence = cadence or (CadenceScheduler() if settings.adaptive_polling else None)
+        # Where evaluated observations are kept; without one they are discarded
+        self.history = history
+        self.grid = SpatialGrid()
         self.running = False
         self.task = None
         
-        # In-memory storage (replace with database in production)
-        self.locations: Dict[str, Location] = {}
-        self.triggers: Dict[str, ParametricTrigger] = {}
-        self.active_alerts: List[Alert] = []
+        # The database is the source of truth; these are the monitor's indexed mirror of it,
+        # held as slotted records rather than API models
+        self.location_repository = LocationRepository(database)
+        self.trigger_repository = TriggerRepository(database)
+        self.alert_repository = AlertRepository(database)
+        self.locations: Dict[str, LocationRecord] = {}
+        self.triggers = TriggerRegistry()
+        self.trigger_states = TriggerStateEngine()
+        self.open_alerts: Dict[str, AlertRecord] = {}  # trigger_id -> open alert
+        self._risk_scores: Dict[str, float] = {}  # location_id -> last pushed risk score
+        self._synced_at: Optional[datetime] = None
+        self._compacted_at: Optional[float] = None
+        self._maintained_at: Optional[float] = None
+        self._profile_requested = False
+        self.last_profile: Optional[dict] = None
     
     async def start(self):
         """Start monitoring loop"""
         self.running = True
-        self.task = asyncio.create_task(self._monitor_loop())
+        if not self.coordinator:
+            # Sharded monitors restore alerts as they take over shards
+            await self._restore_open_alerts()
+        self.task = asyncio.create_task(self._adaptive_loop() if self.cadence else self._monitor_loop())
     
     async def stop(self):
         """Stop monitoring loop"""
         self.running = False
         if self.task:
             self.task.cancel()
+            # Wait for in-flight fetches to unwind before the HTTP pool closes
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.coordinator:
+            await self.coordinator.leave()
+        if self.history:
+            await self.history.flush(force=True)
     
     async def _monitor_loop(self):
         """Main monitoring loop"""
+        interval = settings.check_interval_seconds
+        scheduled_at = time.monotonic()
         while self.running:
             try:
-                await self._check_all_locations()
-                await asyncio.sleep(300)  # Check every 5 minutes
+                with self._profiled():
+                    await self._check_all_locations(scheduled_at)
+                await self.compact_alerts()
+                await self.maintain_history()
+                
+                scheduled_at += interval
+                now = time.monotonic()
+                if now - scheduled_at >= interval:
+                    # More than a full cycle behind: skip the missed ticks instead of bursting
+                    scheduled_at += (now - scheduled_at) // interval * interval
+                await asyncio.sleep(max(0.0, scheduled_at - now))
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 print(f"Monitor error: {e}")
                 await asyncio.sleep(60)
+                scheduled_at = time.monotonic()
     
-    async def _check_all_locations(self):
-        """Check all registered locations for trigger conditions"""
-        for location in self.locations.values():
+    async def _adaptive_loop(self):
+        """Poll each cell as it falls due, re-planning the cell set every check interval"""
+        interval = settings.check_interval_seconds
+        planned_at = -math.inf
+        cells: Dict[str, List[LocationRecord]] = {}
+        while self.running:
             try:
-                weather = await self.weather_service.get_current_weather(
-                    location.latitude,
-                    location.longitude,
-                    location.id
-                )
+                now = time.monotonic()
+                replan = now - planned_at >= interval
+                # A profile covers the next pass that plans or polls, not an idle tick
+                with self._profiled(replan or (self.cadence.wake_at() or math.inf) <= now):
+                    if replan:
+                        cells = await self._plan_cells()
+                        self.cadence.track(cells, now)
+                        await self.compact_alerts()
+                        await self.maintain_history()
+                        planned_at = now
+                    
+                    due = self.cadence.pop_due()
+                    if due:
+                        await self._poll({cell: cells[cell] for cell in due})
                 
-                # Check all triggers for this location
-                location_triggers = [
-                    t for t in self.triggers.values() 
-                    if t.location_id == location.id and t.active
-                ]
-                
-                for trigger in location_triggers:
-                    if self.risk_engine.evaluate_trigger(weather, trigger):
-                        alert = self.risk_engine.create_alert(weather, trigger)
-                        self.active_alerts.append(alert)
-                        await self._send_alert_notification(alert)
-                        
+                wake = min(self.cadence.wake_at() or math.inf, planned_at + interval)
+                await asyncio.sleep(max(POLL_TICK_SECONDS, wake - time.monotonic()))
+            except asyncio.CancelledError:
+                break
             except Exception as e:
-                print(f"Error checking location {location.id}: {e}")
+                print(f"Monitor error: {e}")
+                await asyncio.sleep(60)
+    
+    async def sync(self):
+        """Pull locations and triggers written since the last sync.
+        
+        A deactivated trigger's open alert is resolved. If that write fails
+        the alert stays open and the next sync reads the same changes again.
+        """
+        started = datetime.utcnow()
+        since = self._synced_at - timedelta(seconds=settings.sync_overlap_seconds) if self._synced_at else None
+        for location in await self.location_repository.records_changed_since(since):
+            self.locations[location.id] = location
+        closed: List[AlertRecord] = []
+        for trigger in await self.trigger_repository.records_changed_since(since):
+            if not trigger.active:
+                self.trigger_states.forget(trigger.id)
+                alert = self.open_alerts.pop(trigger.id, None)
+                if alert:
+                    alert.resolved = True
+                    closed.append(alert)
+            self.triggers.add(trigger)
+        if closed:
+            try:
+                await self.alert_repository.resolve(a.id for a in closed)
+            except Exception:
+                for alert in closed:
+                    alert.resolved = False
+                    self.open_alerts[alert.trigger_id] = alert
+                raise
+            await self._send_alert_notifications(closed)
+            ALERTS.labels("resolved").inc(len(closed))
+        self._synced_at = started
+    
+    async def compact_alerts(self, force: bool = False) -> int:
+        """Delete resolved alerts past retention, at most once per compaction interval"""
+        if not settings.alert_retention_days:
+            return 0
+        if self.coordinator and 0 not in self.coordinator.owned:
+            return 0  # One worker (shard 0's owner) compacts for everyone
+        now = time.monotonic()
+        if not force and self._compacted_at is not None and now - self._compacted_at < settings.alert_compaction_interval_seconds:
+            return 0
+        self._compacted_at = now
+        cutoff = datetime.utcnow() - timedelta(days=settings.alert_retention_days)
+        deleted = await self.alert_repository.compact(cutoff)
+        if deleted:
+            print(f"Compacted {deleted} resolved alerts older than {settings.alert_retention_days} days")
+        return deleted
+    
+    async def maintain_history(self, force: bool = False):
+        """Merge, downsample and expire stored history, at most once per maintenance interval"""
+        if not self.history:
+            return
+        if self.coordinator and 0 not in self.coordinator.owned:
+            return  # The store is shared; shard 0's owner maintains it
+        now = time.monotonic()
+        if not force and self._maintained_at is not None and now - self._maintained_at < settings.timeseries_maintenance_interval_seconds:
+            return
+        self._maintained_at = now
+        stats = await self.history.maintain()
+        for table, counts in stats.items():
+            if any(counts.values()):
+                print(f"History {table}: {counts['merged']} days merged, {counts['downsampled']} downsampled, {counts['expired']} expired")
+    
+    def request_profile(self):
+        """Profile the next monitoring pass and write its stacks under settings.profile_dir"""
+        self._profile_requested = True
+    
+    @contextmanager
+    def _profiled(self, active: bool = True):
+        if not (active and self._profile_requested):
+            yield
+            return
+        self._profile_requested = False
+        profiler = SamplingProfiler()
+        try:
+            with profiler:
+                yield
+        finally:
+            name = f"monitor-{self.coordinator.worker_id}" if self.coordinator else "monitor"
+            try:
+                path = profiler.write(name=name)
+            except OSError as e:
+                print(f"Could not write monitor profile: {e}")
+                path = None
+            self.last_profile = {
+                "path": path,
+                "finished_at": datetime.utcnow().isoformat(),
+                "duration_seconds": round(profiler.duration, 3),
+                "samples": profiler.samples,
+                "stacks": len(profiler.stacks),
+            }
+            print(f"Profiled monitor pass: {profiler.samples} samples over {profiler.duration:.1f}s -> {path}")
+    
+    def _owns_location(self, location_id: str) -> bool:
+        location = self.locations.get(location_id)
+        return location is not None and self.coordinator.owns(self.grid.cell_of(location.latitude, location.longitude))
+    
+    async def _restore_open_alerts(self):
+        """Resume unresolved alerts so a restart doesn't open duplicates"""
+        for alert in await self.alert_repository.list(active_only=True):
+            if self.coordinator and not self._owns_location(alert.location_id):
+                continue
+            self.open_alerts[alert.trigger_id] = AlertRecord.from_schema(alert)
+            self.trigger_states.restore_open(alert.trigger_id)
+    
+    async def _check_all_locations(self, scheduled_at: Optional[float] = None):
+        """Check all registered locations for trigger conditions"""
+        await self._poll(await self._plan_cells(), scheduled_at)
+    
+    async def _plan_cells(self) -> Dict[str, List[LocationRecord]]:
+        """Sync, then group the locations this monitor owns by grid cell"""
+        await self.sync()
+        
+        # Nearby locations share a grid cell and therefore a single fetch
+        cells = self.grid.group(self.locations.values())
+        if self.coordinator:
+            gained, lost = await self.coordinator.heartbeat()
+            if gained or lost:
+                await self._rebalance(cells, lost)
+            cells = {cell: members for cell, members in cells.items() if self.coordinator.owns(cell)}
+            # The upstream quota and the polling budget are for all workers together
+            share = 1 / max(1, len(self.coordinator.members))
+            self.scheduler.rate_limiter.share = share
+            if self.cadence:
+                self.cadence.share = share
+        return cells
+    
+    async def _poll(self, cells: Dict[str, List[LocationRecord]], scheduled_at: Optional[float] = None):
+        """Fetch each cell's weather once and evaluate its locations"""
+        def fetch(cell: str):
+            lat, lon = cell_center(cell)
+            return lambda: self.weather_service.get_observation(lat, lon, cell)
+        
+        async def evaluate_cell(cell: str, weather: Observation):
+            if self.history:
+                self.history.record_observation(cell, weather)
+            urgency = await self._evaluate_cell(cells[cell], weather)
+            if self.cadence and urgency is not None:
+                self.cadence.observe(cell, urgency)
+        
+        async def on_error(cell: str, error: Exception):
+            print(f"Error checking cell {cell} ({len(cells[cell])} locations): {error}")
+        
+        jobs = {cell: fetch(cell) for cell in cells}
+        stats = await self.scheduler.run_cycle(jobs, evaluate_cell, on_error, scheduled_at)
+        if self.history:
+            await self.history.flush()
+        if stats["failed"] or stats["timed_out"]:
+            print(
+                f"Monitor cycle: {stats['completed']}/{stats['jobs']} cells fetched, "
+                f"{stats['failed']} failed, {stats['timed_out']} timed out "
+                f"in {stats['duration_seconds']:.1f}s"
+            )
+    
+    async def _rebalance(self, cells: Dict[str, List[LocationRecord]], lost: set):
+        """Drop state for shards handed off and reload open alerts for the rest"""
+        for cell, locations in cells.items():
+            if shard_of(cell, self.coordinator.shards) not in lost:
+                continue
+            for location in locations:
+                for trigger in self.triggers.for_location(location.id):
+                    self.trigger_states.forget(trigger.id)
+                    self.open_alerts.pop(trigger.id, None)
+        await self._restore_open_alerts()
+        print(
+            f"Monitor {self.coordinator.worker_id} owns {len(self.coordinator.owned)}/"
+            f"{self.coordinator.shards} shards across {len(self.coordinator.members)} workers"
+        )
+    
+    async def _evaluate_cell(self, locations: List[LocationRecord], weather: Observation) -> Optional[float]:
+        """Evaluate every active trigger in a grid cell against its shared weather.
+        
+        Returns the cell's polling urgency, or None if evaluation failed.
+        """
+        try:
+            # Only active triggers that an observation can fire
+            triggers = [
+                trigger
+                for location in locations
+                for trigger in self.triggers.active_for_location(location.id, OBSERVED_TRIGGER_TYPES)
+            ]
+            if self.broadcaster:
+                self._publish_risk(locations, triggers, weather)
+            if not triggers:
+                return 0.0
+            
+            started = time.perf_counter()
+            opened: List[AlertRecord] = []
+            closed: List[AlertRecord] = []
+            fired = self.risk_engine.evaluate_triggers(weather, triggers)
+            for trigger, exceeded in zip(triggers, fired.tolist()):
+                if not exceeded and trigger.id not in self.trigger_states:
+                    continue  # Idle trigger, nothing to update
+                
+                event = self.trigger_states.observe(
+                    trigger,
+                    exceeded,
+                    self.risk_engine.observed_value(weather, trigger.trigger_type),
+                    weather.timestamp
+                )
+                if event == OPENED:
+                    alert = self.risk_engine.create_alert(weather, trigger)
+                    self.open_alerts[trigger.id] = alert
+                    opened.append(alert)
+                elif event == CLOSED:
+                    alert = self.open_alerts.pop(trigger.id, None)
+                    if alert:
+                        alert.resolved = True
+                        closed.append(alert)
+            
+            urgency = self._urgency(locations, triggers, weather)
+            evaluated = time.perf_counter()
+            EVALUATE_SECONDS.observe(evaluated - started)
+            if not (opened or closed):
+                return urgency
+            
+            # Shielded: once the edges are taken, stopping mid-write would lose them
+            await asyncio.shield(self._commit_alerts(opened, closed, evaluated))
+            return urgency
+        
+        except Exception as e:
+            print(f"Error evaluating {len(locations)} locations: {e}")
+            return None
+    
+    async def _commit_alerts(self, opened: List[AlertRecord], closed: List[AlertRecord], evaluated: float):
+        """Store alert edges, one write per cell rather than per alert, then notify.
+        
+        An edge whose write fails is undone, in memory and in the trigger's
+        state, so the cell's next sample raises it again.
+        """
+        try:
+            await self.alert_repository.bulk_add(opened)
+        except Exception:
+            self._revert(opened, closed)
+            raise
+        try:
+            await self.alert_repository.resolve(a.id for a in closed)
+        except Exception:
+            self._revert([], closed)
+            await self._send_alert_notifications(opened)
+            ALERTS.labels("opened").inc(len(opened))
+            raise
+        written = time.perf_counter()
+        ALERT_WRITE_SECONDS.observe(written - evaluated)
+        await self._send_alert_notifications(opened + closed)
+        DISPATCH_SECONDS.observe(time.perf_counter() - written)
+        ALERTS.labels("opened").inc(len(opened))
+        ALERTS.labels("resolved").inc(len(closed))
+    
+    def _revert(self, opened: List[AlertRecord], closed: List[AlertRecord]):
+        for alert in opened:
+            self.open_alerts.pop(alert.trigger_id, None)
+            self.trigger_states.revert(alert.trigger_id, OPENED)
+        for alert in closed:
+            alert.resolved = False
+            self.open_alerts[alert.trigger_id] = alert
+            self.trigger_states.revert(alert.trigger_id, CLOSED)
+    
+    def _urgency(self, locations: List[LocationRecord], triggers: List[TriggerRecord], weather: Observation) -> float:
+        """0 (calm) to 1 (poll as often as allowed): the higher of the cell's
+        risk score and how close its nearest trigger is to firing"""
+        if any(trigger.id in self.trigger_states for trigger in triggers):
+            return 1.0  # A sustained run or open alert needs every sample
+        risk = self.risk_engine.score_current(weather, [loc.id for loc in locations], triggers)
+        proximity = self.risk_engine.threshold_proximity(weather, triggers)
+        calm = settings.poll_calm_ratio
+        nearest = (np.nanmax(proximity, initial=0.0) - calm) / (1.0 - calm)
+        return float(np.clip(max(np.nanmax(risk, initial=0.0), nearest), 0.0, 1.0))
+    
+    def location_cadence(self, location_id: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """Polling cadence of each location's cell, most frequently polled first"""
+        if not self.cadence:
+            return []
+        if location_id:
+            locations = [self.locations[location_id]] if location_id in self.locations else []
+        else:
+            locations = self.locations.values()
+        now = time.monotonic()
+        rows = []
+        for location in locations:
+            cell = self.grid.cell_of(location.latitude, location.longitude)
+            metrics = self.cadence.describe(cell, now)
+            if metrics:
+                rows.append({"location_id": location.id, "cell": cell, **metrics})
+        return heapq.nsmallest(limit, rows, key=lambda row: row["interval_seconds"])
+    
+    def _publish_risk(self, locations: List[LocationRecord], triggers: List[TriggerRecord], weather: Observation):
+        """Push current-conditions risk for watched locations whose score changed"""
+        watched = [loc for loc in locations if self.broadcaster.wants(loc.id, loc.insurer_id)]
+        if not watched:
+            return
+        scores = self.risk_engine.score_current(weather, [loc.id for loc in watched], triggers)
+        for location, score in zip(watched, scores.tolist()):
+            previous = self._risk_scores.get(location.id)
+            if score == previous:
+                continue
+            self._risk_scores[location.id] = score
+            level = score_risk_level(score)
+            # Filter on the higher of the two levels so subscribers also see risk falling
+            filter_level = level if previous is None else max(level, score_risk_level(previous), key=RISK_ORDER.get)
+            self.broadcaster.publish(Event(
+                RISK_CHANGED,
+                f"risk:{location.id}",
+                {
+                    "location_id": location.id,
+                    "risk_score": score,
+                    "risk_level": level.value,
+                    "timestamp": weather.timestamp.isoformat(),
+                },
+                location.insurer_id,
+                location.id,
+                filter_level
+            ))
     
-    async def _send_alert_notification(self, alert: Alert):
-        """Send alert notification (webhook, email, etc.)"""
-        print(f"ALERT: {alert.message} - Risk Level: {alert.risk_level}")
-        # Implement webhook/notification logic here
+    async def _send_alert_notifications(self, alerts: List[AlertRecord]):
+        """Log alerts, push them to stream subscribers and hand them to the webhook dispatcher"""
+        for alert in alerts:
+            status = "RESOLVED" if alert.resolved else "ALERT"
+            print(f"{status}: {alert.message} - Risk Level: {alert.risk_level}")
+            if self.broadcaster:
+                location = self.locations.get(alert.location_id)
+                self.broadcaster.publish(Event.for_alert(alert, location.insurer_id if location else None))
+        if self.notifier and alerts:
+            await self.notifier.submit(alerts)
@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from .broadcaster import Broadcaster, EARLY_WARNING, EARLY_WARNING_CLEARED, RISK_ORDER, Event
+from .exposure import ExposureEngine
+from ..models.records import EarlyWarning
+from ..models.schemas import RiskLevel
+
+def severity_level(severity: float) -> RiskLevel:
+    """Same buckets as an alert's risk level: 1.5x the threshold is critical, 1.2x high"""
+    if severity >= 1.5:
+        return RiskLevel.CRITICAL
+    if severity >= 1.2:
+        return RiskLevel.HIGH
+    return RiskLevel.MEDIUM
+
+class PreAlerter:
+    """Early warnings from the forecast, computed ahead of any request.
+
+    Runs as an ExposureEngine stage: after each refresh it re-scans only
+    the triggers the engine found changed, i.e. those whose definition,
+    location or cell forecast differs from the last run, all in one batch
+    over the horizon's forecast slots. A trigger whose forecast sustains
+    its condition for ``duration_hours`` gets an EarlyWarning, published
+    as ``early_warning`` when it appears or changes and
+    ``early_warning_cleared`` when a newer forecast withdraws it. The
+    firing slots also fill ``ForecastData.potential_triggers``.
+    """
+
+    def __init__(self, broadcaster: Optional[Broadcaster] = None):
+        self.broadcaster = broadcaster
+        self.warnings: Dict[str, EarlyWarning] = {}  # trigger_id -> warning
+        self._firing: Dict[str, Tuple[str, List[datetime]]] = {}  # trigger_id -> (location_id, slot times)
+        self._potential: Dict[str, Dict[datetime, Set[str]]] = {}  # location_id -> slot time -> trigger ids
+
+    def update(self, engine: ExposureEngine, trigger_ids: Iterable[str]) -> int:
+        """Recompute the warnings of the given triggers; returns how many are warned"""
+        trigger_ids = set(trigger_ids)
+        for trigger_id in trigger_ids:
+            self._unmark(trigger_id)
+        triggers = [
+            t for t in (engine.triggers.get(i) for i in trigger_ids)
+            if t is not None and t.active and t.location_id in engine.locations and engine.slot_times(t.location_id)
+        ]
+        warned: Dict[str, EarlyWarning] = {}
+        if triggers:
+            forecasts, columns, values, sustained = engine.sustained(triggers)
+            chance = engine.chance(forecasts, columns)
+            shape = values.shape
+            severity = engine.risk_engine.proximity_batch(
+                values,
+                np.broadcast_to(columns.threshold[:, None], shape),
+                np.broadcast_to(columns.operator[:, None], shape)
+            )
+            severity = np.where(sustained, np.nan_to_num(severity), -np.inf)  # Peaks only among firing slots
+            for i in np.flatnonzero(sustained.any(axis=1)).tolist():
+                trigger = triggers[i]
+                times = engine.slot_times(trigger.location_id)
+                slots = np.flatnonzero(sustained[i]).tolist()
+                peak = int(np.argmax(severity[i]))
+                warned[trigger.id] = EarlyWarning(
+                    trigger_id=trigger.id,
+                    location_id=trigger.location_id,
+                    insurer_id=engine.locations[trigger.location_id].insurer_id,
+                    trigger_type=trigger.trigger_type,
+                    threshold_value=trigger.threshold_value,
+                    threshold_operator=trigger.threshold_operator,
+                    starts_at=times[slots[0]],
+                    peak_at=times[peak],
+                    peak_value=float(values[i, peak]),
+                    severity=float(severity[i, peak]),
+                    risk_level=severity_level(float(severity[i, peak])),
+                    probability=float(chance[i, slots].max()),
+                    payout_amount=trigger.payout_amount
+                )
+                self._mark(trigger.id, trigger.location_id, [times[j] for j in slots])
+
+        now = datetime.utcnow()
+        for trigger_id in trigger_ids:
+            previous, current = self.warnings.pop(trigger_id, None), warned.get(trigger_id)
+            if current is not None:
+                self.warnings[trigger_id] = current
+            if current != previous:
+                self._publish(current or previous, current is None, now)
+        return len(warned)
+
+    def _mark(self, trigger_id: str, location_id: str, times: List[datetime]):
+        self._firing[trigger_id] = (location_id, times)
+        slots = self._potential.setdefault(location_id, {})
+        for time in times:
+            slots.setdefault(time, set()).add(trigger_id)
+
+    def _unmark(self, trigger_id: str):
+        firing = self._firing.pop(trigger_id, None)
+        if firing is None:
+            return
+        location_id, times = firing
+        slots = self._potential[location_id]
+        for time in times:
+            slots[time].discard(trigger_id)
+            if not slots[time]:
+                del slots[time]
+        if not slots:
+            del self._potential[location_id]
+
+    def _publish(self, warning: EarlyWarning, cleared: bool, now: datetime):
+        if not self.broadcaster or not self.broadcaster.wants(warning.location_id, warning.insurer_id):
+            return
+        kind = EARLY_WARNING_CLEARED if cleared else EARLY_WARNING
+        data = {"trigger_id": warning.trigger_id, "location_id": warning.location_id} if cleared else warning.to_json(now)
+        self.broadcaster.publish(Event(
+            kind, f"warning:{warning.trigger_id}", data, warning.insurer_id, warning.location_id, warning.risk_level
+        ))
+
+    def potential_triggers(self, location_id: str, forecast_time: datetime) -> List[str]:
+        """Ids of the location's triggers the forecast has firing in that slot"""
+        return sorted(self._potential.get(location_id, {}).get(forecast_time, ()))
+
+    def ranked(
+        self,
+        insurer_id: Optional[str] = None,
+        location_id: Optional[str] = None,
+        min_risk_level: Optional[RiskLevel] = None,
+        limit: Optional[int] = None
+    ) -> List[EarlyWarning]:
+        """Warnings soonest first, the most severe first among those starting together"""
+        min_rank = RISK_ORDER[min_risk_level] if min_risk_level else 0
+        warnings = [
+            w for w in self.warnings.values()
+            if (insurer_id is None or w.insurer_id == insurer_id)
+            and (location_id is None or w.location_id == location_id)
+            and RISK_ORDER[w.risk_level] >= min_rank
+        ]
+        warnings.sort(key=lambda w: (w.starts_at, -w.severity, w.trigger_id))
+        return warnings[:limit]
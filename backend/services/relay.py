@@ -0,0 +1,162 @@
+import asyncio
+import json
+from typing import AsyncIterator, List, Optional, Set
+from .broadcaster import OVERFLOW, Broadcaster, Event
+from ..models.schemas import RiskLevel
+from ..config import settings
+
+class EventChannel:
+    """Carries push events from monitor workers to every API process"""
+
+    async def publish(self, message: str):
+        raise NotImplementedError
+
+    def listen(self) -> AsyncIterator[str]:
+        """Messages published from now on, until cancelled"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+class LocalEventChannel(EventChannel):
+    """In-process stand-in; only relays between components of one process"""
+
+    def __init__(self):
+        self._listeners: Set[asyncio.Queue] = set()
+
+    async def publish(self, message: str):
+        for queue in self._listeners:
+            queue.put_nowait(message)
+
+    async def listen(self) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._listeners.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._listeners.discard(queue)
+
+class RedisEventChannel(EventChannel):
+    def __init__(self, url: str, channel: str):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url, decode_responses=True)
+        self.channel = channel
+
+    async def publish(self, message: str):
+        await self.client.publish(self.channel, message)
+
+    async def listen(self) -> AsyncIterator[str]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+def create_event_channel(backend: Optional[str] = None) -> Optional[EventChannel]:
+    """Build the channel named by settings.stream_relay"""
+    backend = backend or settings.stream_relay
+    if backend == "redis":
+        return RedisEventChannel(settings.redis_url, settings.stream_relay_channel)
+    if backend == "local":
+        return LocalEventChannel()
+    return None
+
+def encode_events(events: List[Event]) -> str:
+    return json.dumps([
+        [e.kind, e.key, e.data, e.insurer_id, e.location_id, e.risk_level.value] for e in events
+    ])
+
+def decode_events(message: str) -> List[Event]:
+    return [
+        Event(kind, key, data, insurer_id, location_id, RiskLevel(risk_level))
+        for kind, key, data, insurer_id, location_id, risk_level in json.loads(message)
+    ]
+
+class RelayBroadcaster(Broadcaster):
+    """A worker's broadcaster: instead of serving subscribers itself, it
+    forwards everything published to the API processes over a channel.
+
+    Publishing still never awaits. Events wait in one subscription,
+    coalesced by key like any subscriber's, and a background task sends
+    each batch as a single message.
+    """
+
+    def __init__(self, channel: EventChannel):
+        super().__init__()
+        self.channel = channel
+        self.outbox = self.subscribe()
+        self.relayed = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def wants(self, location_id: str, insurer_id: Optional[str]) -> bool:
+        return True  # Subscribers are on the API side, out of sight
+
+    def start(self):
+        self.task = asyncio.create_task(self._relay_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self._send(list(self.outbox.pending.values()))
+        await self.channel.aclose()
+
+    async def _relay_loop(self):
+        while True:
+            events = await self.outbox.next_batch()
+            await self._send([e for e in events if e.kind != OVERFLOW])
+
+    async def _send(self, events: List[Event]):
+        if not events:
+            return
+        try:
+            await self.channel.publish(encode_events(events))
+            self.relayed += len(events)
+        except Exception as e:
+            # Push is best effort; alerts themselves are in the database
+            print(f"Relaying {len(events)} stream events failed: {e}")
+
+class EventRelay:
+    """The API side: republishes events relayed by workers to local subscribers"""
+
+    def __init__(self, channel: EventChannel, broadcaster: Broadcaster, retry_seconds: float = 1.0):
+        self.channel = channel
+        self.broadcaster = broadcaster
+        self.retry_seconds = retry_seconds
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.channel.aclose()
+
+    async def _listen_loop(self):
+        while True:
+            try:
+                async for message in self.channel.listen():
+                    for event in decode_events(message):
+                        self.broadcaster.publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Stream relay connection lost: {e}")
+            await asyncio.sleep(self.retry_seconds)
@@ -0,0 +1,315 @@
+import base64
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, or_, select, tuple_, update
+from ..database import Database, database
+from ..models.records import AlertRecord, LocationRecord, TriggerRecord
+from ..models.schemas import Alert, DeadLetter, Location, ParametricTrigger, RiskLevel
+from ..models.tables import AlertRow, DeadLetterRow, LeaseRow, LocationRow, TriggerRow
+
+# Rows sent per executemany batch inside one transaction
+BULK_CHUNK_SIZE = 500
+
+# Resolved alerts deleted per transaction during compaction
+COMPACT_BATCH_SIZE = 5000
+
+def _chunks(rows: Sequence[dict], size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def encode_cursor(alert: Alert) -> str:
+    """Opaque keyset cursor pointing just past ``alert``"""
+    key = f"{alert.triggered_at.isoformat()}|{alert.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        triggered_at, alert_id = key.split("|", 1)
+        return datetime.fromisoformat(triggered_at), alert_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+class Repository:
+    """Shared plumbing for the table repositories"""
+    row_type = None
+    schema = None
+    # Columns read, and the factory applied to them, for records_changed_since
+    record_columns = ()
+    record = None
+
+    def __init__(self, db: Optional[Database] = None):
+        self.database = db or database
+
+    def _insert(self):
+        if self.database.dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(self.row_type)
+
+    async def _upsert(self, rows: List[dict]) -> int:
+        """Insert rows, overwriting any existing row with the same id"""
+        if not rows:
+            return 0
+        columns = [c for c in rows[0] if c != "id"]
+        stmt = self._insert()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={c: stmt.excluded[c] for c in columns}
+        )
+        async with self.database.session() as session:
+            for chunk in _chunks(rows):
+                await session.execute(stmt, chunk)
+            await session.commit()
+        return len(rows)
+
+    async def _insert_many(self, rows: List[dict]) -> int:
+        """Plain batched insert for append-only tables"""
+        if not rows:
+            return 0
+        async with self.database.session() as session:
+            for chunk in _chunks(rows):
+                await session.execute(self._insert(), chunk)
+            await session.commit()
+        return len(rows)
+
+    async def _all(self, stmt) -> list:
+        async with self.database.session() as session:
+            rows = (await session.scalars(stmt)).all()
+        return [self.schema.model_validate(row, from_attributes=True) for row in rows]
+
+    async def get(self, item_id: str):
+        async with self.database.session() as session:
+            row = await session.get(self.row_type, item_id)
+        return self.schema.model_validate(row, from_attributes=True) if row else None
+
+    async def changed_since(self, since: Optional[datetime]) -> list:
+        """Rows written at or after ``since`` (all rows when None)"""
+        stmt = select(self.row_type)
+        if since is not None:
+            stmt = stmt.where(self.row_type.updated_at >= since)
+        return await self._all(stmt)
+
+    async def records_changed_since(self, since: Optional[datetime]) -> list:
+        """changed_since as lightweight records, skipping ORM objects and validation"""
+        stmt = select(*(getattr(self.row_type, column) for column in self.record_columns))
+        if since is not None:
+            stmt = stmt.where(self.row_type.updated_at >= since)
+        async with self.database.session() as session:
+            rows = (await session.execute(stmt)).all()
+        return [self.record(*row) for row in rows]
+
+class LocationRepository(Repository):
+    row_type = LocationRow
+    schema = Location
+    record_columns = ("id", "latitude", "longitude", "insurer_id")
+    record = LocationRecord
+
+    async def add(self, location: Location) -> Location:
+        await self.bulk_upsert([location])
+        return location
+
+    async def bulk_upsert(self, locations: Iterable[Location]) -> int:
+        now = datetime.utcnow()
+        return await self._upsert([{**loc.model_dump(), "updated_at": now} for loc in locations])
+
+    async def list(self, insurer_id: Optional[str] = None) -> List[Location]:
+        stmt = select(LocationRow)
+        if insurer_id:
+            stmt = stmt.where(LocationRow.insurer_id == insurer_id)
+        return await self._all(stmt)
+
+class TriggerRepository(Repository):
+    row_type = TriggerRow
+    schema = ParametricTrigger
+    record_columns = (
+        "id", "location_id", "trigger_type", "threshold_value", "threshold_operator",
+        "duration_hours", "active", "payout_amount"
+    )
+    record = TriggerRecord.from_row
+
+    async def add(self, trigger: ParametricTrigger) -> ParametricTrigger:
+        await self.bulk_upsert([trigger])
+        return trigger
+
+    async def bulk_upsert(self, triggers: Iterable[ParametricTrigger]) -> int:
+        now = datetime.utcnow()
+        return await self._upsert([
+            {**t.model_dump(), "trigger_type": t.trigger_type.value, "updated_at": now}
+            for t in triggers
+        ])
+
+    async def list_for_location(self, location_id: str) -> List[ParametricTrigger]:
+        return await self._all(select(TriggerRow).where(TriggerRow.location_id == location_id))
+
+    async def toggle(self, trigger_id: str) -> Optional[ParametricTrigger]:
+        """Flip a trigger's active flag; None if it doesn't exist"""
+        async with self.database.session() as session:
+            result = await session.execute(
+                update(TriggerRow)
+                .where(TriggerRow.id == trigger_id)
+                .values(active=~TriggerRow.active, updated_at=datetime.utcnow())
+            )
+            await session.commit()
+        if result.rowcount == 0:
+            return None
+        return await self.get(trigger_id)
+
+class AlertRepository(Repository):
+    row_type = AlertRow
+    schema = Alert
+
+    async def add(self, alert: AlertRecord) -> AlertRecord:
+        await self.bulk_add([alert])
+        return alert
+
+    async def bulk_add(self, alerts: Iterable[AlertRecord]) -> int:
+        return await self._insert_many([{**a.to_dict(), "risk_level": a.risk_level.value} for a in alerts])
+
+    def _filtered(
+        self,
+        location_id: Optional[str],
+        risk_level: Optional[RiskLevel],
+        active_only: bool,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ):
+        stmt = select(AlertRow)
+        if location_id:
+            stmt = stmt.where(AlertRow.location_id == location_id)
+        if risk_level:
+            stmt = stmt.where(AlertRow.risk_level == risk_level.value)
+        if active_only:
+            stmt = stmt.where(AlertRow.resolved.is_(False))
+        if since is not None:
+            stmt = stmt.where(AlertRow.triggered_at >= since)
+        if until is not None:
+            stmt = stmt.where(AlertRow.triggered_at < until)
+        return stmt
+
+    async def list(
+        self,
+        location_id: Optional[str] = None,
+        risk_level: Optional[RiskLevel] = None,
+        active_only: bool = True
+    ) -> List[Alert]:
+        """Every matching alert, oldest first; prefer page() for API reads"""
+        stmt = self._filtered(location_id, risk_level, active_only)
+        return await self._all(stmt.order_by(AlertRow.triggered_at, AlertRow.id))
+
+    async def page(
+        self,
+        location_id: Optional[str] = None,
+        risk_level: Optional[RiskLevel] = None,
+        active_only: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Alert], Optional[str]]:
+        """One page of alerts, newest first, and the cursor for the next page.
+
+        Pages are keyed on (triggered_at, id) rather than an offset, so a
+        page costs the same however deep it is and alerts inserted while
+        paging don't shift later pages. The cursor is None on the last page.
+        """
+        stmt = self._filtered(location_id, risk_level, active_only, since, until)
+        if cursor:
+            stmt = stmt.where(tuple_(AlertRow.triggered_at, AlertRow.id) < decode_cursor(cursor))
+        stmt = stmt.order_by(AlertRow.triggered_at.desc(), AlertRow.id.desc()).limit(limit + 1)
+        alerts = await self._all(stmt)
+        if len(alerts) > limit:
+            return alerts[:limit], encode_cursor(alerts[limit - 1])
+        return alerts, None
+
+    async def resolve(self, alert_ids: Iterable[str]) -> int:
+        """Mark alerts resolved; returns how many exist"""
+        alert_ids = list(alert_ids)
+        if not alert_ids:
+            return 0
+        async with self.database.session() as session:
+            result = await session.execute(
+                update(AlertRow)
+                .where(AlertRow.id.in_(alert_ids))
+                .values(resolved=True, resolved_at=func.coalesce(AlertRow.resolved_at, datetime.utcnow()))
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def compact(self, resolved_before: datetime) -> int:
+        """Delete alerts resolved before ``resolved_before``; returns how many.
+
+        Deletes in batches so the table isn't locked for one long transaction.
+        """
+        deleted = 0
+        while True:
+            batch = (
+                select(AlertRow.id)
+                .where(AlertRow.resolved.is_(True), AlertRow.resolved_at < resolved_before)
+                .limit(COMPACT_BATCH_SIZE)
+            )
+            async with self.database.session() as session:
+                result = await session.execute(delete(AlertRow).where(AlertRow.id.in_(batch)))
+                await session.commit()
+            deleted += result.rowcount
+            if result.rowcount < COMPACT_BATCH_SIZE:
+                return deleted
+
+class DeadLetterRepository(Repository):
+    row_type = DeadLetterRow
+    schema = DeadLetter
+
+    async def bulk_add(self, letters: Iterable[DeadLetter]) -> int:
+        rows = []
+        for letter in letters:
+            letter.id = letter.id or str(uuid.uuid4())
+            rows.append(letter.model_dump())
+        return await self._insert_many(rows)
+
+    async def list(self, limit: int = 100) -> List[DeadLetter]:
+        """Most recent failures first"""
+        return await self._all(select(DeadLetterRow).order_by(DeadLetterRow.failed_at.desc()).limit(limit))
+
+class LeaseRepository(Repository):
+    """Expiring named leases; the database acts as the coordination service"""
+    row_type = LeaseRow
+
+    async def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        """Take or renew a lease; False while someone else holds it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+        async with self.database.session() as session:
+            result = await session.execute(
+                update(LeaseRow)
+                .where(LeaseRow.name == name, or_(LeaseRow.holder == holder, LeaseRow.expires_at <= now))
+                .values(holder=holder, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                result = await session.execute(
+                    self._insert()
+                    .values(name=name, holder=holder, expires_at=expires_at)
+                    .on_conflict_do_nothing(index_elements=["name"])
+                )
+            await session.commit()
+        return result.rowcount == 1
+
+    async def release(self, name: str, holder: str):
+        async with self.database.session() as session:
+            await session.execute(delete(LeaseRow).where(LeaseRow.name == name, LeaseRow.holder == holder))
+            await session.commit()
+
+    async def holders(self, prefix: str) -> Dict[str, str]:
+        """Unexpired lease name -> holder for names starting with ``prefix``"""
+        stmt = select(LeaseRow.name, LeaseRow.holder).where(
+            LeaseRow.name.startswith(prefix), LeaseRow.expires_at > datetime.utcnow()
+        )
+        async with self.database.session() as session:
+            return dict((await session.execute(stmt)).all())
+
+location_repository = LocationRepository()
+trigger_repository = TriggerRepository()
+alert_repository = AlertRepository()
+dead_letter_repository = DeadLetterRepository()
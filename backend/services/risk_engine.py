@@ -1,10 +1,45 @@
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional, Sequence, Union
+from ..models.records import AlertRecord, Observation, TriggerRecord
 from ..models.schemas import (
     WeatherData, ForecastData, ParametricTrigger, 
-    Alert, RiskLevel, TriggerType
+    RiskLevel, TriggerType
 )
 from datetime import datetime
+import operator
 import uuid
+import numpy as np
+
+# Observation field checked by each trigger type; other types never fire from an observation
+OBSERVED_FIELDS = {
+    TriggerType.RAINFALL: "rainfall",
+    TriggerType.WIND_SPEED: "wind_speed",
+    TriggerType.TEMPERATURE: "temperature"
+}
+OBSERVED_TRIGGER_TYPES = tuple(OBSERVED_FIELDS)
+
+OPERATORS = {
+    "gt": operator.gt,
+    "lt": operator.lt,
+    "gte": operator.ge,
+    "lte": operator.le,
+    "eq": operator.eq
+}
+
+# Columnar encoding used by the batch API
+OPERATOR_CODES = {name: code for code, name in enumerate(OPERATORS)}
+_BATCH_OPERATORS = (np.greater, np.less, np.greater_equal, np.less_equal, np.equal)
+_COLUMN_OF = {trigger_type: i for i, trigger_type in enumerate(OBSERVED_FIELDS)}
+_observation_row = operator.attrgetter(*OBSERVED_FIELDS.values())
+
+# The API models or their lightweight records; only fields are read
+AnyWeather = Union[WeatherData, Observation]
+AnyTrigger = Union[ParametricTrigger, TriggerRecord]
+
+class TriggerColumns(NamedTuple):
+    """Struct-of-arrays view of a list of triggers"""
+    column: np.ndarray     # Index into an observation row, -1 if unobserved
+    threshold: np.ndarray
+    operator: np.ndarray   # OPERATOR_CODES value, -1 if unknown
 
 class RiskEngine:
     def __init__(self):
@@ -35,32 +70,109 @@ class RiskEngine:
     
     def evaluate_trigger(
         self, 
-        weather: WeatherData, 
-        trigger: ParametricTrigger
+        weather: AnyWeather, 
+        trigger: AnyTrigger
     ) -> bool:
         """Check if weather data triggers a parametric condition"""
-        value_map = {
-            TriggerType.RAINFALL: weather.rainfall,
-            TriggerType.WIND_SPEED: weather.wind_speed,
-            TriggerType.TEMPERATURE: weather.temperature
-        }
-        
-        current_value = value_map.get(trigger.trigger_type)
+        current_value = self.observed_value(weather, trigger.trigger_type)
         if current_value is None:
             return False
         
-        operators = {
-            "gt": lambda x, y: x > y,
-            "lt": lambda x, y: x < y,
-            "gte": lambda x, y: x >= y,
-            "lte": lambda x, y: x <= y,
-            "eq": lambda x, y: x == y
-        }
-        
-        op = operators.get(trigger.threshold_operator)
+        op = OPERATORS.get(trigger.threshold_operator)
         return op(current_value, trigger.threshold_value) if op else False
     
-    def calculate_risk_score(self, forecast: ForecastData, triggers: List[ParametricTrigger]) -> float:
+    def observed_value(self, weather: AnyWeather, trigger_type: TriggerType) -> Optional[float]:
+        """Observation value a trigger type is checked against, if any"""
+        field = OBSERVED_FIELDS.get(trigger_type)
+        return getattr(weather, field) if field else None
+    
+    def trigger_columns(self, triggers: Sequence[AnyTrigger]) -> TriggerColumns:
+        """Encode triggers as columns for evaluate_batch"""
+        return TriggerColumns(
+            column=np.fromiter((_COLUMN_OF.get(t.trigger_type, -1) for t in triggers), np.int8, len(triggers)),
+            threshold=np.fromiter((t.threshold_value for t in triggers), np.float64, len(triggers)),
+            operator=np.fromiter((OPERATOR_CODES.get(t.threshold_operator, -1) for t in triggers), np.int8, len(triggers))
+        )
+    
+    def observation_matrix(self, observations: Sequence[AnyWeather]) -> np.ndarray:
+        """(n, 3) array of each observation's OBSERVED_FIELDS values"""
+        matrix = np.empty((len(observations), len(OBSERVED_FIELDS)), dtype=np.float64)
+        for i, weather in enumerate(observations):
+            matrix[i] = _observation_row(weather)
+        return matrix
+    
+    def evaluate_batch(
+        self,
+        values: np.ndarray,
+        thresholds: np.ndarray,
+        operators: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized evaluate_trigger over aligned value/threshold/operator columns.
+        
+        Returns a boolean fire mask. NaN values (unobserved trigger types)
+        and unknown operator codes never fire, as in the scalar path.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        operators = np.asarray(operators)
+        fired = np.zeros(values.shape, dtype=bool)
+        for code, compare in enumerate(_BATCH_OPERATORS):
+            mask = operators == code
+            if mask.any():
+                fired[mask] = compare(values[mask], thresholds[mask])
+        return fired
+    
+    def evaluate_portfolio(
+        self,
+        observations: np.ndarray,
+        observation_index: np.ndarray,
+        triggers: TriggerColumns
+    ) -> np.ndarray:
+        """Fire mask for triggers whose observation is row observation_index[i]
+        of an observation_matrix"""
+        values = observations[observation_index, np.maximum(triggers.column, 0)]
+        values[triggers.column < 0] = np.nan
+        return self.evaluate_batch(values, triggers.threshold, triggers.operator)
+    
+    def evaluate_triggers(self, weather: AnyWeather, triggers: Sequence[AnyTrigger]) -> np.ndarray:
+        """Fire mask for many triggers against one observation"""
+        columns = self.trigger_columns(triggers)
+        return self.evaluate_portfolio(
+            self.observation_matrix([weather]),
+            np.zeros(len(triggers), dtype=np.intp),
+            columns
+        )
+    
+    def threshold_proximity(self, weather: AnyWeather, triggers: Sequence[AnyTrigger]) -> np.ndarray:
+        """How close one observation is to each trigger's threshold.
+        
+        The value/threshold ratio for "gt"/"gte" triggers and its inverse for
+        "lt"/"lte", so 1.0 sits on the threshold and anything above it is
+        past. Where a ratio means nothing (non-positive thresholds or values,
+        "eq") it is 1.0 if the trigger fires and 0.0 otherwise. Unobserved
+        trigger types are NaN.
+        """
+        columns = self.trigger_columns(triggers)
+        values = self.observation_matrix([weather])[0][np.maximum(columns.column, 0)]
+        values[columns.column < 0] = np.nan
+        return self.proximity_batch(values, columns.threshold, columns.operator)
+    
+    def proximity_batch(self, values: np.ndarray, thresholds: np.ndarray, operators: np.ndarray) -> np.ndarray:
+        """threshold_proximity over aligned value/threshold/operator arrays of any shape"""
+        values = np.asarray(values, dtype=np.float64)
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        fired = self.evaluate_batch(values, thresholds, operators).astype(np.float64)
+        
+        upper = np.isin(operators, (OPERATOR_CODES["gt"], OPERATOR_CODES["gte"]))
+        lower = np.isin(operators, (OPERATOR_CODES["lt"], OPERATOR_CODES["lte"]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(upper, values / thresholds, thresholds / values)
+        meaningful = (upper | lower) & (thresholds > 0) & (values >= 0)
+        proximity = np.where(meaningful, ratio, fired)
+        proximity[np.isnan(values)] = np.nan
+        return proximity
+    
+    def calculate_risk_score(self, forecast: ForecastData, triggers: List[AnyTrigger]) -> float:
         """Calculate risk score based on forecast and active triggers"""
         risk_score = 0.0
         
@@ -88,22 +200,98 @@ class RiskEngine:
         
         return min(risk_score, 1.0)
     
+    def forecast_matrix(self, forecasts_by_location: Sequence[Sequence[ForecastData]]):
+        """(locations x slots) rainfall and wind arrays, NaN-padded to the longest horizon"""
+        slots = max((len(f) for f in forecasts_by_location), default=0)
+        rainfall = np.full((len(forecasts_by_location), slots), np.nan)
+        wind = np.full((len(forecasts_by_location), slots), np.nan)
+        for i, forecasts in enumerate(forecasts_by_location):
+            for j, forecast in enumerate(forecasts):
+                rainfall[i, j] = forecast.rainfall_amount
+                wind[i, j] = forecast.wind_speed
+        return rainfall, wind
+    
+    def score_batch(
+        self,
+        rainfall: np.ndarray,
+        wind: np.ndarray,
+        triggers: TriggerColumns,
+        trigger_location: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized calculate_risk_score over a (locations x slots) block.
+        
+        ``trigger_location[i]`` is the row of ``triggers`` entry i. Scores
+        match the scalar path bit for bit, including the 1.0 cap. Padded
+        (NaN) slots score NaN. A zero threshold, which makes the scalar path
+        raise ZeroDivisionError, counts as near-threshold for any positive
+        forecast value.
+        """
+        rainfall = np.asarray(rainfall, dtype=np.float64)
+        wind = np.asarray(wind, dtype=np.float64)
+        
+        # Base risk from weather conditions
+        risk = np.where(rainfall > 50, 0.4, np.where(rainfall > 25, 0.2, 0.0))
+        risk += np.where(wind > 20, 0.3, np.where(wind > 15, 0.15, 0.0))
+        
+        # Number of rainfall/wind triggers each slot is within 70% of
+        near = np.zeros(risk.shape, dtype=np.int64)
+        trigger_location = np.asarray(trigger_location)
+        for column, values in ((_COLUMN_OF[TriggerType.RAINFALL], rainfall), (_COLUMN_OF[TriggerType.WIND_SPEED], wind)):
+            selected = triggers.column == column
+            if not selected.any():
+                continue
+            rows = trigger_location[selected]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                proximity = values[rows] / triggers.threshold[selected][:, None]
+            np.add.at(near, rows, proximity > 0.7)
+        
+        # Add 0.3 once per trigger, in sequence, so rounding matches the scalar loop
+        for k in range(1, int(near.max(initial=0)) + 1):
+            risk = np.where(near >= k, risk + 0.3, risk)
+        
+        risk = np.minimum(risk, 1.0)
+        risk[np.isnan(rainfall) & np.isnan(wind)] = np.nan
+        return risk
+    
+    def score_forecasts(self, forecasts: Sequence[ForecastData], triggers: Sequence[AnyTrigger]) -> np.ndarray:
+        """Risk score for each slot of one location's forecast"""
+        rainfall, wind = self.forecast_matrix([forecasts])
+        return self.score_batch(
+            rainfall,
+            wind,
+            self.trigger_columns(triggers),
+            np.zeros(len(triggers), dtype=np.intp)
+        )[0]
+    
+    def score_current(
+        self,
+        weather: AnyWeather,
+        location_ids: Sequence[str],
+        triggers: Sequence[AnyTrigger]
+    ) -> np.ndarray:
+        """Risk score of one shared observation for each location, given its triggers"""
+        row_of = {location_id: i for i, location_id in enumerate(location_ids)}
+        triggers = [t for t in triggers if t.location_id in row_of]
+        shape = (len(location_ids), 1)
+        return self.score_batch(
+            np.full(shape, weather.rainfall),
+            np.full(shape, weather.wind_speed),
+            self.trigger_columns(triggers),
+            np.array([row_of[t.location_id] for t in triggers], dtype=np.intp)
+        )[:, 0]
+    
     def create_alert(
         self, 
-        weather: WeatherData, 
-        trigger: ParametricTrigger
-    ) -> Alert:
+        weather: AnyWeather, 
+        trigger: AnyTrigger
+    ) -> AlertRecord:
         """Generate alert when trigger is activated"""
-        value_map = {
-            TriggerType.RAINFALL: weather.rainfall,
-            TriggerType.WIND_SPEED: weather.wind_speed,
-            TriggerType.TEMPERATURE: weather.temperature
-        }
-        
-        current_value = value_map.get(trigger.trigger_type, 0.0)
+        current_value = self.observed_value(weather, trigger.trigger_type)
+        if current_value is None:
+            current_value = 0.0
         risk_level = self._determine_risk_level(current_value, trigger.threshold_value)
         
-        return Alert(
+        return AlertRecord(
             id=str(uuid.uuid4()),
             location_id=trigger.location_id,
             trigger_id=trigger.id,
@@ -0,0 +1,170 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple
+import httpx
+from .metrics import CYCLE_CELLS, CYCLE_LAG_SECONDS, CYCLE_SECONDS, UPSTREAM_FETCH_SECONDS, UPSTREAM_RETRIES
+from ..config import settings
+
+Job = Callable[[], Awaitable[Any]]
+ResultCallback = Callable[[str, Any], Awaitable[None]]
+ErrorCallback = Callable[[str, Exception], Awaitable[None]]
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by every fetch in a cycle"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.share = 1.0  # Fraction of the rate this process may spend, e.g. 1 / workers
+        self.capacity = capacity if capacity else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        if self.rate <= 0:
+            return  # Rate limiting disabled
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                rate = self.rate * self.share
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / rate)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Transport failures, throttling and upstream 5xx are worth retrying"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class FetchScheduler:
+    """Runs upstream fetches with bounded concurrency, rate limiting,
+    retries and a per-cycle deadline"""
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        cycle_deadline: Optional[float] = None,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
+        self.max_in_flight = max_in_flight or settings.max_concurrent_fetches
+        # Pass the process's bucket so every scheduler in it spends one upstream quota
+        self.rate_limiter = rate_limiter or TokenBucket(
+            settings.upstream_rate_limit_per_second if rate_limit is None else rate_limit,
+            burst or settings.upstream_rate_burst
+        )
+        self.max_retries = settings.fetch_max_retries if max_retries is None else max_retries
+        self.backoff_base = settings.fetch_backoff_base_seconds if backoff_base is None else backoff_base
+        self.backoff_max = settings.fetch_backoff_max_seconds if backoff_max is None else backoff_max
+        self.cycle_deadline = cycle_deadline or settings.cycle_deadline_seconds or settings.check_interval_seconds
+
+        self.in_flight = 0
+        self.last_cycle: Dict[str, float] = {}
+        self.cycles = 0
+
+    async def run_cycle(
+        self,
+        jobs: Dict[str, Job],
+        on_result: ResultCallback,
+        on_error: Optional[ErrorCallback] = None,
+        scheduled_at: Optional[float] = None
+    ) -> Dict[str, float]:
+        """Run one cycle of keyed fetch jobs and return its metrics.
+
+        ``on_result`` is awaited as soon as each job completes so evaluation
+        overlaps with the fetches still in flight. Jobs still pending when
+        the deadline passes are cancelled and counted as timed out; the
+        deadline never interrupts an ``on_result`` already under way, which
+        may be writing alerts, and the cycle waits for those to finish.
+        """
+        started = time.monotonic()
+        scheduled_at = started if scheduled_at is None else scheduled_at
+        deadline = scheduled_at + self.cycle_deadline
+        stats = {"completed": 0, "failed": 0, "retries": 0}
+        queue: Iterator[Tuple[str, Job]] = iter(list(jobs.items()))
+        evaluations: Set[asyncio.Future] = set()
+
+        async def worker():
+            for key, job in queue:
+                self.in_flight += 1
+                try:
+                    result = await self._fetch_with_retry(job, stats)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    stats["failed"] += 1
+                    if on_error:
+                        await on_error(key, e)
+                    continue
+                finally:
+                    self.in_flight -= 1
+                stats["completed"] += 1
+                evaluation = asyncio.ensure_future(on_result(key, result))
+                evaluations.add(evaluation)
+                evaluation.add_done_callback(evaluations.discard)
+                await asyncio.shield(evaluation)
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.max_in_flight, len(jobs)))
+        ]
+        if workers:
+            _, pending = await asyncio.wait(workers, timeout=max(0.0, deadline - time.monotonic()))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await asyncio.gather(*evaluations, return_exceptions=True)
+
+        finished = time.monotonic()
+        self.cycles += 1
+        self.last_cycle = {
+            "jobs": len(jobs),
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "timed_out": len(jobs) - stats["completed"] - stats["failed"],
+            "retries": stats["retries"],
+            "duration_seconds": finished - started,
+            "lag_seconds": max(0.0, started - scheduled_at),
+        }
+        CYCLE_SECONDS.observe(self.last_cycle["duration_seconds"])
+        CYCLE_LAG_SECONDS.observe(self.last_cycle["lag_seconds"])
+        for outcome in ("completed", "failed", "timed_out"):
+            CYCLE_CELLS.labels(outcome).inc(self.last_cycle[outcome])
+        return self.last_cycle
+
+    async def _fetch_with_retry(self, job: Job, stats: Dict[str, float]) -> Any:
+        """Run a job, retrying retryable failures with full-jitter backoff"""
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            # Timed after the rate limiter so the histogram shows upstream latency, not our own throttling
+            started = time.perf_counter()
+            try:
+                result = await job()
+            except Exception as e:
+                UPSTREAM_FETCH_SECONDS.labels("error").observe(time.perf_counter() - started)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                attempt += 1
+                stats["retries"] += 1
+                UPSTREAM_RETRIES.inc()
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+                continue
+            UPSTREAM_FETCH_SECONDS.labels("ok").observe(time.perf_counter() - started)
+            return result
@@ -0,0 +1,96 @@
+import bisect
+import hashlib
+import os
+import socket
+import uuid
+from typing import Iterable, List, Optional, Set, Tuple
+from .leases import LeaseStore, create_lease_store
+from ..config import settings
+
+MEMBER_PREFIX = "monitor:member:"
+SHARD_PREFIX = "monitor:shard:"
+
+def stable_hash(key: str) -> int:
+    """Process-independent 64-bit hash (the builtin hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+def shard_of(cell: str, shards: int) -> int:
+    return stable_hash(cell) % shards
+
+class HashRing:
+    """Consistent-hash ring: adding or removing a member only moves the keys
+    that member gains or loses"""
+
+    def __init__(self, members: Iterable[str] = (), replicas: int = 64):
+        self._points: List[Tuple[int, str]] = sorted(
+            (stable_hash(f"{member}#{i}"), member)
+            for member in set(members)
+            for i in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, stable_hash(key)) % len(self._points)
+        return self._points[index][1]
+
+class ShardCoordinator:
+    """Splits monitoring between workers without double-evaluating any cell.
+
+    Cells hash into a fixed number of shards, and a consistent-hash ring
+    over the live workers says which worker should own each shard. A
+    worker only evaluates a shard while it holds that shard's lease, so
+    during a rebalance a shard moves only after its previous owner has
+    released it (at its next heartbeat) or died and let the lease expire.
+    Workers announce themselves with a membership lease on the same TTL.
+    """
+
+    def __init__(
+        self,
+        store: Optional[LeaseStore] = None,
+        worker_id: Optional[str] = None,
+        shards: Optional[int] = None,
+        lease_ttl: Optional[float] = None
+    ):
+        self.store = store or create_lease_store()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.shards = shards or settings.monitor_shards
+        self.lease_ttl = lease_ttl or settings.lease_ttl_seconds or 3 * settings.check_interval_seconds
+        self.owned: Set[int] = set()
+        self.members: List[str] = []
+
+    def owns(self, cell: str) -> bool:
+        return shard_of(cell, self.shards) in self.owned
+
+    async def heartbeat(self) -> Tuple[Set[int], Set[int]]:
+        """Renew membership, claim the shards the ring assigns here and
+        release the others; returns the (gained, lost) shards"""
+        await self.store.acquire(MEMBER_PREFIX + self.worker_id, self.worker_id, self.lease_ttl)
+        live = await self.store.holders(MEMBER_PREFIX)
+        members = sorted(set(live.values()) | {self.worker_id})
+        ring = HashRing(members)
+
+        owned = set()
+        for shard in range(self.shards):
+            name = f"{SHARD_PREFIX}{shard}"
+            if ring.owner(str(shard)) == self.worker_id:
+                # Fails while the previous owner still holds it; retried next heartbeat
+                if await self.store.acquire(name, self.worker_id, self.lease_ttl):
+                    owned.add(shard)
+            elif shard in self.owned:
+                await self.store.release(name, self.worker_id)
+
+        gained, lost = owned - self.owned, self.owned - owned
+        self.owned, self.members = owned, members
+        return gained, lost
+
+    async def leave(self):
+        """Hand every shard back immediately, e.g. on shutdown"""
+        for shard in self.owned:
+            await self.store.release(f"{SHARD_PREFIX}{shard}", self.worker_id)
+        await self.store.release(MEMBER_PREFIX + self.worker_id, self.worker_id)
+        self.owned = set()
+
+    def stats(self) -> dict:
+        return {"worker_id": self.worker_id, "members": self.members, "shards": self.shards, "owned": len(self.owned)}
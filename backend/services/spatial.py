@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, List, Optional, Tuple, TypeVar
+from pydantic import BaseModel
+from ..models.schemas import Location
+from ..config import settings
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    """Encode a coordinate as a geohash of the given length"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+def geohash_bounds(cell: str) -> Tuple[float, float, float, float]:
+    """Return (min_lat, min_lon, max_lat, max_lon) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+def cell_center(cell: str) -> Tuple[float, float]:
+    """Centre (lat, lon) of a geohash cell"""
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+class SpatialGrid:
+    """Snaps locations to geohash cells so one upstream fetch serves every
+    location in the same cell.
+
+    Precision 6 cells are roughly 1.2 x 0.6 km, precision 7 roughly
+    150 x 150 m; precision 12 effectively disables sharing.
+    """
+
+    def __init__(self, precision: Optional[int] = None):
+        precision = precision or settings.spatial_cell_precision
+        self.precision = min(max(precision, 1), 12)
+
+    def cell_of(self, lat: float, lon: float) -> str:
+        return geohash_encode(lat, lon, self.precision)
+
+    def group(self, locations: Iterable[Location]) -> Dict[str, List[Location]]:
+        """Bucket locations by grid cell"""
+        cells: Dict[str, List[Location]] = {}
+        for location in locations:
+            cells.setdefault(self.cell_of(location.latitude, location.longitude), []).append(location)
+        return cells
+
+def fan_out(data: ModelT, location_id: str) -> ModelT:
+    """Copy cell-level weather/forecast data onto a single location"""
+    return data.model_copy(update={"location_id": location_id})
@@ -0,0 +1,399 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from .sharding import stable_hash
+from ..models.schemas import ForecastData, WeatherData
+from ..config import settings
+
+DAY_SECONDS = 86400
+# A day's raw segments are merged once there are this many
+MERGE_FANIN = 16
+# A maintenance lock older than this was left by a crashed process
+STALE_LOCK_SECONDS = 600
+# Downsampled segments also store how many samples each row stands for, so
+# rows merged into them later don't outweigh the buckets' earlier samples
+COUNT = "count"
+
+class Column(NamedTuple):
+    name: str
+    dtype: str
+    aggregate: str  # "mean", "min", "max" or "last" when downsampling
+
+# Every table is keyed by (series, time): a 64-bit hash of the series key
+# and epoch seconds; values are float32 unless they need more
+KEY_COLUMNS = (("series", "u8"), ("time", "i8"))
+OBSERVATION_COLUMNS = (
+    Column("temperature", "f4", "mean"),
+    Column("rainfall", "f4", "max"),
+    Column("wind_speed", "f4", "max"),
+    Column("humidity", "f4", "mean"),
+    Column("pressure", "f4", "mean"),
+)
+# Forecasts are keyed by the time forecast; downsampling keeps the latest issue
+FORECAST_COLUMNS = (
+    Column("issued", "i8", "last"),
+    Column("temperature", "f4", "last"),
+    Column("rainfall_probability", "f4", "last"),
+    Column("rainfall_amount", "f4", "last"),
+    Column("wind_speed", "f4", "last"),
+)
+
+def to_epoch(moment: datetime) -> int:
+    """Epoch seconds; naive datetimes are taken as UTC like the rest of the app"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+def series_id(key: str) -> int:
+    return stable_hash(key)
+
+class SeriesTable:
+    """Append-only columnar time series, partitioned by UTC day.
+
+    Appends are buffered in memory and flushed as immutable segments: one
+    directory per segment holding one ``.npy`` file per column, sorted by
+    (series, time) so range queries binary-search memory-mapped columns.
+    A day's segments are merged as they accumulate, downsampled to coarser
+    buckets after a while and deleted past retention. Maintenance writes
+    the replacement segment before deleting what it replaces (recorded in
+    its ``meta.json``), so concurrent readers never see rows twice, and a
+    reader that finds a listed segment already gone re-lists the day.
+    """
+
+    def __init__(self, path: str, columns: Sequence[Column]):
+        self.path = path
+        self.columns = tuple(columns)
+        self.dtypes = dict(KEY_COLUMNS, **{c.name: c.dtype for c in self.columns})
+        self._buffer: List[tuple] = []
+        self.appended = 0
+
+    def append(self, key: str, moment: datetime, values: Sequence[float]):
+        """Buffer one sample; values follow the table's columns"""
+        self._buffer.append((series_id(key), to_epoch(moment), *values))
+        self.appended += 1
+
+    def __len__(self) -> int:
+        """Rows still buffered"""
+        return len(self._buffer)
+
+    def take(self) -> List[tuple]:
+        """Hand over the buffered rows, e.g. to write them from another thread"""
+        rows, self._buffer = self._buffer, []
+        return rows
+
+    def flush(self, rows: Optional[List[tuple]] = None) -> int:
+        """Write rows (by default the buffered ones) out as one segment per day"""
+        rows = self.take() if rows is None else rows
+        if not rows:
+            return 0
+        table = self._arrays(rows)
+        days = table["time"] // DAY_SECONDS
+        written = set()
+        try:
+            for day in np.unique(days).tolist():
+                selected = days == day
+                self._write_segment(day, {name: column[selected] for name, column in table.items()})
+                written.add(day)
+        except Exception:
+            # Back into the buffer for the next flush, minus the days already on disk
+            self._buffer.extend(row for row in rows if row[1] // DAY_SECONDS not in written)
+            raise
+        return len(rows)
+
+    def query(self, key: str, start: datetime, end: datetime, resolution: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Columns of one series over [start, end), oldest first, including
+        rows not flushed yet; optionally aggregated into ``resolution``-second buckets"""
+        series, first, last = np.uint64(series_id(key)), to_epoch(start), to_epoch(end)
+        parts = []
+        for day in range(first // DAY_SECONDS, (last - 1) // DAY_SECONDS + 1):
+            day_parts = self._read_day(day, series, first, last)
+            while day_parts is None:
+                # Merged away since it was listed; the replacement is listed now
+                day_parts = self._read_day(day, series, first, last)
+            parts.extend(day_parts)
+        rows = list(self._buffer)  # Queries run in a thread while the event loop appends
+        if rows:
+            buffered = self._arrays(rows)
+            selected = (buffered["series"] == series) & (buffered["time"] >= first) & (buffered["time"] < last)
+            parts.append({name: column[selected] for name, column in buffered.items()})
+
+        table = {
+            name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype)
+            for name, dtype in self.dtypes.items()
+        }
+        order = np.argsort(table["time"], kind="stable")
+        table = {name: column[order] for name, column in table.items()}
+        if resolution:
+            table = self._aggregate(table, resolution)
+        del table["series"]
+        return table
+
+    def _read_day(self, day: int, series: np.uint64, first: int, last: int) -> Optional[List[Dict[str, np.ndarray]]]:
+        """One series' rows in [first, last) from a day's segments, or None if one vanished mid-read"""
+        parts = []
+        for segment in self._live_segments(day):
+            columns = self._open_segment(segment)
+            if columns is None:
+                return None
+            lo = np.searchsorted(columns["series"], series, "left")
+            hi = np.searchsorted(columns["series"], series, "right")
+            times = columns["time"][lo:hi]
+            t_lo, t_hi = lo + np.searchsorted(times, first), lo + np.searchsorted(times, last)
+            if t_hi > t_lo:
+                parts.append({name: np.asarray(column[t_lo:t_hi]) for name, column in columns.items()})
+        return parts
+
+    def maintain(
+        self,
+        now: datetime,
+        downsample_after_days: int,
+        resolution: int,
+        retention_days: int
+    ) -> Dict[str, int]:
+        """Merge, downsample and expire day partitions"""
+        today = to_epoch(now) // DAY_SECONDS
+        stats = {"merged": 0, "downsampled": 0, "expired": 0}
+        for day in self._days():
+            if retention_days and day < today - retention_days:
+                shutil.rmtree(self._day_path(day), ignore_errors=True)
+                stats["expired"] += 1
+                continue
+            downsample = downsample_after_days and day < today - downsample_after_days
+            segments = self._live_segments(day)
+            raw = [s for s in segments if not self._meta(s).get("resolution")]
+            # Merge closed days down to one segment; today only once segments pile up
+            if downsample and raw:
+                stats["downsampled"] += self._rewrite(day, resolution)
+            elif (day < today and len(segments) > 1) or len(segments) >= MERGE_FANIN:
+                stats["merged"] += self._rewrite(day, None)
+        return stats
+
+    def bytes_on_disk(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.path):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+    def _rewrite(self, day: int, resolution: Optional[int]) -> int:
+        """Replace a day's segments with one merged (and optionally downsampled) segment"""
+        with self._maintenance_lock(day) as locked:
+            if not locked:
+                return 0  # Another process is on it
+            segments = self._live_segments(day)
+            if not segments:
+                return 0
+            parts = [self._open_segment(s) for s in segments]
+            table = {name: np.concatenate([np.asarray(p[name]) for p in parts]) for name in self.dtypes}
+            counts = [self._counts(s) for s in segments]
+            if resolution or any(c is not None for c in counts):
+                table[COUNT] = np.concatenate([
+                    np.ones(len(p["time"]), np.uint32) if c is None else c for c, p in zip(counts, parts)
+                ])
+            order = np.lexsort((table["time"], table["series"]))
+            table = {name: column[order] for name, column in table.items()}
+            if resolution:
+                table = self._aggregate(table, resolution)
+            replaced = [os.path.basename(s) for s in segments]
+            self._write_segment(day, table, {"replaces": replaced, "resolution": resolution})
+            for segment in segments:
+                shutil.rmtree(segment, ignore_errors=True)
+            return 1
+
+    def _aggregate(self, table: Dict[str, np.ndarray], resolution: int) -> Dict[str, np.ndarray]:
+        """One row per (series, bucket) of a table sorted by series then time.
+
+        With a ``count`` column, means are weighted by it and it is summed.
+        """
+        if not len(table["time"]):
+            return table
+        bucket = table["time"] // resolution * resolution
+        boundary = np.flatnonzero((np.diff(table["series"]) != 0) | (np.diff(bucket) != 0)) + 1
+        starts = np.concatenate([[0], boundary])
+        ends = np.concatenate([boundary, [len(bucket)]])
+        weights = table.get(COUNT)
+        counts = ends - starts if weights is None else np.add.reduceat(weights.astype(np.int64), starts)
+        result = {"series": table["series"][starts], "time": bucket[starts]}
+        if weights is not None:
+            result[COUNT] = counts.astype(np.uint32)
+        for column in self.columns:
+            values = table[column.name]
+            if column.aggregate == "mean":
+                values = values.astype(np.float64) if weights is None else values * weights.astype(np.float64)
+                aggregated = np.add.reduceat(values, starts) / counts
+            elif column.aggregate == "max":
+                aggregated = np.maximum.reduceat(values, starts)
+            elif column.aggregate == "min":
+                aggregated = np.minimum.reduceat(values, starts)
+            else:
+                aggregated = values[ends - 1]
+            result[column.name] = aggregated.astype(column.dtype)
+        return result
+
+    def _arrays(self, rows: List[tuple]) -> Dict[str, np.ndarray]:
+        """Buffered rows as columns, sorted by (series, time)"""
+        names = list(self.dtypes)
+        columns = list(zip(*rows))
+        table = {name: np.array(columns[i], dtype=self.dtypes[name]) for i, name in enumerate(names)}
+        order = np.lexsort((table["time"], table["series"]))
+        return {name: column[order] for name, column in table.items()}
+
+    def _write_segment(self, day: int, table: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        day_path = self._day_path(day)
+        os.makedirs(day_path, exist_ok=True)
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        staging = os.path.join(day_path, f".{name}")
+        os.makedirs(staging)
+        for column, values in table.items():
+            dtype = self.dtypes.get(column, values.dtype)
+            np.save(os.path.join(staging, f"{column}.npy"), np.ascontiguousarray(values, dtype=dtype))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({"rows": int(len(table["time"])), **(meta or {})}, f)
+        os.rename(staging, os.path.join(day_path, name))  # Readers only list complete segments
+
+    def _live_segments(self, day: int) -> List[str]:
+        """Segments of a day, minus any a newer segment has already replaced"""
+        day_path = self._day_path(day)
+        try:
+            names = sorted(n for n in os.listdir(day_path) if not n.startswith("."))
+        except FileNotFoundError:
+            return []
+        replaced = set()
+        for name in names:
+            replaced.update(self._meta(os.path.join(day_path, name)).get("replaces", ()))
+        return [os.path.join(day_path, n) for n in names if n not in replaced]
+
+    def _open_segment(self, segment: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            return {
+                name: np.load(os.path.join(segment, f"{name}.npy"), mmap_mode="r")
+                for name in self.dtypes
+            }
+        except FileNotFoundError:
+            return None
+
+    def _counts(self, segment: str) -> Optional[np.ndarray]:
+        """Samples behind each row of a downsampled segment; None for raw segments"""
+        try:
+            return np.load(os.path.join(segment, f"{COUNT}.npy"))
+        except FileNotFoundError:
+            return None
+
+    def _meta(self, segment: str) -> dict:
+        try:
+            with open(os.path.join(segment, "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _days(self) -> List[int]:
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        epoch = datetime(1970, 1, 1)
+        return sorted((datetime.strptime(n, "%Y-%m-%d") - epoch).days for n in names if not n.startswith("."))
+
+    def _day_path(self, day: int) -> str:
+        return os.path.join(self.path, (datetime(1970, 1, 1) + timedelta(days=day)).strftime("%Y-%m-%d"))
+
+    def _maintenance_lock(self, day: int):
+        return _DirectoryLock(os.path.join(self._day_path(day), ".maintenance.lock"))
+
+class _DirectoryLock:
+    """Cross-process try-lock: mkdir is atomic; a lock left by a crash goes stale"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.locked = False
+
+    def __enter__(self) -> bool:
+        try:
+            os.mkdir(self.path)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(self.path) < STALE_LOCK_SECONDS:
+                    return False
+            except FileNotFoundError:
+                pass
+            shutil.rmtree(self.path, ignore_errors=True)
+            try:
+                os.mkdir(self.path)
+            except FileExistsError:
+                return False
+        self.locked = True
+        return True
+
+    def __exit__(self, *exc):
+        if self.locked:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+class TimeSeriesStore:
+    """Observation and forecast history per grid cell.
+
+    Observations are written as the monitor evaluates them and forecasts
+    as the exposure engine refreshes them; both are keyed by the grid cell
+    they were fetched for, which every location in the cell shares.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.timeseries_path
+        self.observations = SeriesTable(os.path.join(self.path, "observations"), OBSERVATION_COLUMNS)
+        self.forecasts = SeriesTable(os.path.join(self.path, "forecasts"), FORECAST_COLUMNS)
+        self._flushed_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def record_observation(self, cell: str, weather: WeatherData):
+        self.observations.append(cell, weather.timestamp, (
+            weather.temperature, weather.rainfall, weather.wind_speed, weather.humidity, weather.pressure
+        ))
+
+    def record_forecasts(self, cell: str, forecasts: Sequence[ForecastData], issued: Optional[datetime] = None):
+        issued = to_epoch(issued or datetime.utcnow())
+        for forecast in forecasts:
+            self.forecasts.append(cell, forecast.forecast_time, (
+                issued, forecast.temperature, forecast.rainfall_probability,
+                forecast.rainfall_amount, forecast.wind_speed
+            ))
+
+    async def flush(self, force: bool = False) -> int:
+        """Write buffered rows once the flush interval or size is reached"""
+        buffered = len(self.observations) + len(self.forecasts)
+        due = time.monotonic() - self._flushed_at >= settings.timeseries_flush_seconds
+        if not buffered or not (force or due or buffered >= settings.timeseries_flush_rows):
+            return 0
+        async with self._lock:
+            self._flushed_at = time.monotonic()
+            # Take the rows here, then do the blocking file IO off the event loop
+            return sum(await asyncio.gather(*(
+                asyncio.to_thread(table.flush, table.take()) for table in (self.observations, self.forecasts)
+            )))
+
+    async def maintain(self, now: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+        now = now or datetime.utcnow()
+        args = (
+            now,
+            settings.timeseries_downsample_after_days,
+            settings.timeseries_downsample_seconds,
+            settings.timeseries_retention_days
+        )
+        async with self._lock:
+            return {
+                "observations": await asyncio.to_thread(self.observations.maintain, *args),
+                "forecasts": await asyncio.to_thread(self.forecasts.maintain, *args),
+            }
+
+    def buffered(self) -> Dict[str, int]:
+        """Rows waiting for the next flush; unlike stats() it never touches the disk"""
+        return {"observations": len(self.observations), "forecasts": len(self.forecasts)}
+
+    def stats(self) -> dict:
+        return {
+            table_name: {"appended": table.appended, "buffered": len(table), "bytes_on_disk": table.bytes_on_disk()}
+            for table_name, table in (("observations", self.observations), ("forecasts", self.forecasts))
+        }
@@ -0,0 +1,96 @@
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+from .risk_engine import AnyTrigger
+from ..models.schemas import TriggerType
+
+class TriggerRegistry(Mapping):
+    """Triggers keyed by id, with location and trigger-type indexes.
+
+    Reads work like a dict. Writes must go through add/remove/set_active
+    so the indexes stay in step; don't flip ``trigger.active`` directly.
+    """
+
+    def __init__(self, triggers: Iterable[AnyTrigger] = ()):
+        self._triggers: Dict[str, AnyTrigger] = {}
+        self._by_location: Dict[str, Dict[str, AnyTrigger]] = {}
+        self._by_type: Dict[TriggerType, Dict[str, AnyTrigger]] = {}
+        # location_id -> trigger_type -> active triggers
+        self._active: Dict[str, Dict[TriggerType, Dict[str, AnyTrigger]]] = {}
+        for trigger in triggers:
+            self.add(trigger)
+
+    def __getitem__(self, trigger_id: str) -> AnyTrigger:
+        return self._triggers[trigger_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._triggers)
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def add(self, trigger: AnyTrigger):
+        """Insert or replace a trigger"""
+        if trigger.id in self._triggers:
+            self.remove(trigger.id)
+        self._triggers[trigger.id] = trigger
+        self._by_location.setdefault(trigger.location_id, {})[trigger.id] = trigger
+        self._by_type.setdefault(trigger.trigger_type, {})[trigger.id] = trigger
+        if trigger.active:
+            self._index_active(trigger)
+
+    def remove(self, trigger_id: str) -> AnyTrigger:
+        trigger = self._triggers.pop(trigger_id)
+        self._discard(self._by_location, trigger.location_id, trigger_id)
+        self._discard(self._by_type, trigger.trigger_type, trigger_id)
+        self._unindex_active(trigger)
+        return trigger
+
+    def set_active(self, trigger_id: str, active: bool) -> AnyTrigger:
+        trigger = self._triggers[trigger_id]
+        if trigger.active != active:
+            trigger.active = active
+            if active:
+                self._index_active(trigger)
+            else:
+                self._unindex_active(trigger)
+        return trigger
+
+    def for_location(self, location_id: str) -> List[AnyTrigger]:
+        """All triggers for a location, active or not"""
+        return list(self._by_location.get(location_id, {}).values())
+
+    def of_type(self, trigger_type: TriggerType) -> List[AnyTrigger]:
+        return list(self._by_type.get(trigger_type, {}).values())
+
+    def active_for_location(
+        self,
+        location_id: str,
+        trigger_types: Optional[Iterable[TriggerType]] = None
+    ) -> List[AnyTrigger]:
+        """Active triggers for a location, optionally limited to some types"""
+        by_type = self._active.get(location_id)
+        if not by_type:
+            return []
+        if trigger_types is None:
+            return [t for triggers in by_type.values() for t in triggers.values()]
+        return [t for tt in trigger_types for t in by_type.get(tt, {}).values()]
+
+    def _index_active(self, trigger: AnyTrigger):
+        by_type = self._active.setdefault(trigger.location_id, {})
+        by_type.setdefault(trigger.trigger_type, {})[trigger.id] = trigger
+
+    def _unindex_active(self, trigger: AnyTrigger):
+        by_type = self._active.get(trigger.location_id)
+        if by_type is None:
+            return
+        self._discard(by_type, trigger.trigger_type, trigger.id)
+        if not by_type:
+            del self._active[trigger.location_id]
+
+    @staticmethod
+    def _discard(index: dict, key, trigger_id: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(trigger_id, None)
+            if not bucket:
+                del index[key]
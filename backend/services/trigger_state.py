@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from .risk_engine import AnyTrigger
+from ..config import settings
+
+OPENED = "opened"
+CLOSED = "closed"
+
+class TriggerState:
+    """Per-trigger streaming state; a fixed handful of fields regardless of
+    how many samples have been seen"""
+    __slots__ = ("exceeding_since", "last_seen", "open")
+
+    def __init__(self):
+        self.exceeding_since: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.open = False
+
+class TriggerStateEngine:
+    """Turns a stream of per-sample trigger evaluations into alert edges.
+
+    An alert opens once a trigger's condition has held continuously for
+    ``duration_hours`` and stays open, without re-firing, until a sample
+    clears the threshold by the hysteresis band. A gap in samples longer
+    than ``max_gap_seconds`` breaks a sustained run. Idle triggers hold no
+    state at all.
+    """
+
+    def __init__(self, hysteresis_ratio: Optional[float] = None, max_gap_seconds: Optional[float] = None):
+        self.hysteresis_ratio = settings.alert_hysteresis_ratio if hysteresis_ratio is None else hysteresis_ratio
+        self.max_gap = timedelta(
+            seconds=max_gap_seconds or settings.trigger_max_gap_seconds or 3 * settings.check_interval_seconds
+        )
+        self._states: Dict[str, TriggerState] = {}
+
+    def __contains__(self, trigger_id: str) -> bool:
+        return trigger_id in self._states
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def is_open(self, trigger_id: str) -> bool:
+        state = self._states.get(trigger_id)
+        return state is not None and state.open
+
+    def restore_open(self, trigger_id: str):
+        """Mark a trigger as having an open alert, e.g. after a restart"""
+        state = self._states.setdefault(trigger_id, TriggerState())
+        state.open = True
+
+    def revert(self, trigger_id: str, event: str):
+        """Undo an edge whose alert could not be stored, so the next sample raises it again"""
+        if event == OPENED:
+            state = self._states.get(trigger_id)
+            if state is not None:
+                state.open = False
+        elif event == CLOSED:
+            self.restore_open(trigger_id)
+
+    def forget(self, trigger_id: str):
+        """Drop state for a removed or deactivated trigger"""
+        self._states.pop(trigger_id, None)
+
+    def observe(
+        self,
+        trigger: AnyTrigger,
+        exceeded: bool,
+        value: Optional[float],
+        timestamp: datetime
+    ) -> Optional[str]:
+        """Feed one evaluated sample; returns OPENED, CLOSED or None"""
+        state = self._states.get(trigger.id)
+        if state is None:
+            if not exceeded:
+                return None
+            state = self._states[trigger.id] = TriggerState()
+
+        if state.last_seen is not None and timestamp - state.last_seen > self.max_gap:
+            state.exceeding_since = None
+        state.last_seen = timestamp
+
+        event = None
+        if exceeded:
+            if state.exceeding_since is None:
+                state.exceeding_since = timestamp
+            if not state.open and timestamp - state.exceeding_since >= timedelta(hours=trigger.duration_hours):
+                state.open = True
+                event = OPENED
+        else:
+            state.exceeding_since = None
+            if state.open and self._cleared(trigger, value):
+                state.open = False
+                event = CLOSED
+
+        if not state.open and state.exceeding_since is None:
+            del self._states[trigger.id]
+        return event
+
+    def _cleared(self, trigger: AnyTrigger, value: Optional[float]) -> bool:
+        """Whether a non-exceeding value is far enough from the threshold to close"""
+        if value is None:
+            return False
+        band = self.hysteresis_ratio * abs(trigger.threshold_value)
+        if trigger.threshold_operator in ("gt", "gte"):
+            return trigger.threshold_value - value >= band
+        if trigger.threshold_operator in ("lt", "lte"):
+            return value - trigger.threshold_value >= band
+        return True
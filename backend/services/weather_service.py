@@ -1,63 +1,102 @@
 import httpx
-from typing import Dict, List
+import importlib.util
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from ..models.records import Observation
 from ..models.schemas import WeatherData, ForecastData
 from ..config import settings
 
+def create_http_client() -> httpx.AsyncClient:
+    """Build the shared keep-alive client used for all upstream calls"""
+    # HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
+    http2 = settings.http2_enabled and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds
+        ),
+        timeout=httpx.Timeout(
+            settings.http_timeout_seconds,
+            connect=settings.http_connect_timeout_seconds
+        )
+    )
+
 class WeatherService:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_key = settings.weather_api_key
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.base_url = settings.weather_api_base_url
+        self._client = client
+        self._owns_client = client is None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client, opened on first use and reused until aclose()"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client()
+            self._owns_client = True
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled client if this service created it"""
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
     
     async def get_current_weather(self, lat: float, lon: float, location_id: str) -> WeatherData:
         """Fetch current weather data for a location"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/weather",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "appid": self.api_key,
-                    "units": "metric"
-                }
-            )
-            data = response.json()
-            
-            return WeatherData(
-                location_id=location_id,
-                timestamp=datetime.utcnow(),
-                temperature=data["main"]["temp"],
-                rainfall=data.get("rain", {}).get("1h", 0.0),
-                wind_speed=data["wind"]["speed"],
-                humidity=data["main"]["humidity"],
-                pressure=data["main"]["pressure"]
-            )
+        return (await self.get_observation(lat, lon, location_id)).to_schema()
+    
+    async def get_observation(self, lat: float, lon: float, location_id: str) -> Observation:
+        """get_current_weather as a lightweight record, for the monitor"""
+        response = await self.client.get(
+            f"{self.base_url}/weather",
+            params={
+                "lat": lat,
+                "lon": lon,
+                "appid": self.api_key,
+                "units": "metric"
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        return Observation(
+            location_id=location_id,
+            timestamp=datetime.utcnow(),
+            temperature=float(data["main"]["temp"]),
+            rainfall=float(data.get("rain", {}).get("1h", 0.0)),
+            wind_speed=float(data["wind"]["speed"]),
+            humidity=float(data["main"]["humidity"]),
+            pressure=float(data["main"]["pressure"])
+        )
     
     async def get_forecast(self, lat: float, lon: float, location_id: str) -> List[ForecastData]:
         """Fetch 5-day forecast with 3-hour intervals"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/forecast",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "appid": self.api_key,
-                    "units": "metric"
-                }
-            )
-            data = response.json()
-            
-            forecasts = []
-            for item in data["list"][:16]:  # Next 48 hours
-                forecasts.append(ForecastData(
-                    location_id=location_id,
-                    forecast_time=datetime.fromtimestamp(item["dt"]),
-                    temperature=item["main"]["temp"],
-                    rainfall_probability=item.get("pop", 0.0) * 100,
-                    rainfall_amount=item.get("rain", {}).get("3h", 0.0),
-                    wind_speed=item["wind"]["speed"],
-                    risk_score=0.0,  # Calculated by risk engine
-                    potential_triggers=[]
-                ))
-            
-            return forecasts
+        response = await self.client.get(
+            f"{self.base_url}/forecast",
+            params={
+                "lat": lat,
+                "lon": lon,
+                "appid": self.api_key,
+                "units": "metric"
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        forecasts = []
+        for item in data["list"][:16]:  # Next 48 hours
+            forecasts.append(ForecastData(
+                location_id=location_id,
+                forecast_time=datetime.fromtimestamp(item["dt"]),
+                temperature=item["main"]["temp"],
+                rainfall_probability=item.get("pop", 0.0) * 100,
+                rainfall_amount=item.get("rain", {}).get("3h", 0.0),
+                wind_speed=item["wind"]["speed"],
+                risk_score=0.0,  # Calculated by risk engine
+                potential_triggers=[]
+            ))
+        
+        return forecasts
@@ -0,0 +1,202 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import httpx
+from .metrics import WEBHOOK_DELIVERY_SECONDS
+from .repository import DeadLetterRepository
+from .scheduler import is_retryable
+from .weather_service import create_http_client
+from ..models.records import AlertRecord
+from ..models.schemas import DeadLetter
+from ..config import settings
+
+BLOCK = "block"
+SHED = "shed"
+
+# (destination url, alert payload)
+Item = Tuple[str, dict]
+
+class WebhookDispatcher:
+    """Delivers alert notifications to webhooks off the monitoring path.
+
+    Alerts go onto a bounded queue drained by a fixed pool of workers. Each
+    worker gathers up to ``batch_size`` alerts (waiting at most
+    ``batch_wait`` for stragglers) and POSTs them as one request per
+    destination, retrying throttling and server errors with full-jitter
+    backoff. Batches that still fail land in the dead-letter table. When the
+    queue is full, ``submit`` either waits for room ("block") or dead-letters
+    the overflow straight away ("shed").
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        dead_letters: Optional[DeadLetterRepository] = None,
+        queue_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        batch_wait: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        overflow: Optional[str] = None
+    ):
+        self.url = url or settings.alert_webhook_url
+        self._client = client
+        self._owns_client = client is None
+        self.dead_letters = dead_letters or DeadLetterRepository()
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size or settings.webhook_queue_size)
+        self.worker_count = workers or settings.webhook_workers
+        self.batch_size = batch_size or settings.webhook_batch_size
+        self.batch_wait = settings.webhook_batch_wait_seconds if batch_wait is None else batch_wait
+        self.max_retries = settings.webhook_max_retries if max_retries is None else max_retries
+        self.backoff_base = settings.webhook_backoff_base_seconds if backoff_base is None else backoff_base
+        self.backoff_max = settings.webhook_backoff_max_seconds if backoff_max is None else backoff_max
+        self.overflow = overflow or settings.webhook_overflow
+        self.workers: List[asyncio.Task] = []
+        self.stats = {"submitted": 0, "delivered": 0, "batches": 0, "retries": 0, "dead_lettered": 0, "shed": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client()
+            self._owns_client = True
+        return self._client
+
+    def start(self):
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self, timeout: float = 10.0):
+        """Drain the queue for up to ``timeout`` seconds, then dead-letter the rest"""
+        if self.workers:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            for task in self.workers:
+                task.cancel()
+            await asyncio.gather(*self.workers, return_exceptions=True)
+            self.workers = []
+        leftover = []
+        while not self.queue.empty():
+            leftover.append(self.queue.get_nowait())
+            self.queue.task_done()
+        await self._dead_letter(leftover, "dispatcher stopped before delivery", 0)
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+
+    async def submit(self, alerts: Iterable[AlertRecord], url: Optional[str] = None) -> int:
+        """Queue alerts for delivery; returns how many were accepted"""
+        url = url or self.url
+        if not url:
+            return 0
+        alerts = list(alerts)
+        accepted = 0
+        shed: List[Item] = []
+        for i, alert in enumerate(alerts):
+            item = (url, alert.to_json())
+            self.stats["submitted"] += 1
+            if self.overflow == SHED:
+                try:
+                    self.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    shed.append(item)
+                    continue
+            else:
+                # Backpressure: the caller slows to the receivers' pace
+                try:
+                    await self.queue.put(item)
+                except asyncio.CancelledError:
+                    # e.g. the cycle deadline; what wasn't queued yet must not vanish
+                    await self._dead_letter([(url, a.to_json()) for a in alerts[i:]], "submit cancelled before queueing", 0)
+                    raise
+            accepted += 1
+        if shed:
+            self.stats["shed"] += len(shed)
+            await self._dead_letter(shed, "queue full", 0)
+        return accepted
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            done: Set[str] = set()
+            try:
+                by_url: Dict[str, List[dict]] = {}
+                for url, payload in batch:
+                    by_url.setdefault(url, []).append(payload)
+                for url, payloads in by_url.items():
+                    await self._deliver(url, payloads)
+                    done.add(url)
+            except asyncio.CancelledError:
+                # Destinations already delivered (or dead-lettered) would get duplicates on replay
+                await self._dead_letter([item for item in batch if item[0] not in done], "dispatcher stopped mid-delivery", 0)
+                raise
+            except Exception as e:
+                print(f"Webhook worker error: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _next_batch(self) -> List[Item]:
+        """Block for one item, then take whatever else arrives within batch_wait"""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _deliver(self, url: str, payloads: List[dict]):
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(url, json={"alerts": payloads})
+                response.raise_for_status()
+                WEBHOOK_DELIVERY_SECONDS.labels("ok").observe(time.perf_counter() - started)
+                self.stats["batches"] += 1
+                self.stats["delivered"] += len(payloads)
+                return
+            except Exception as e:
+                WEBHOOK_DELIVERY_SECONDS.labels("error").observe(time.perf_counter() - started)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    await self._dead_letter([(url, p) for p in payloads], str(e) or type(e).__name__, attempt + 1)
+                    return
+                attempt += 1
+                self.stats["retries"] += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+
+    async def _dead_letter(self, items: List[Item], error: str, attempts: int):
+        if not items:
+            return
+        by_url: Dict[str, List[dict]] = {}
+        for url, payload in items:
+            by_url.setdefault(url, []).append(payload)
+        now = datetime.utcnow()
+        letters = [
+            DeadLetter(url=url, alerts=payloads, error=error[:512], attempts=attempts, failed_at=now)
+            for url, payloads in by_url.items()
+        ]
+        try:
+            await self.dead_letters.bulk_add(letters)
+        except Exception as e:
+            print(f"Dropped {len(items)} undeliverable alerts ({error}); dead-letter write failed: {e}")
+            return
+        self.stats["dead_lettered"] += len(items)
+        print(f"Dead-lettered {len(items)} alerts: {error}")
@@ -0,0 +1,101 @@
+"""Standalone monitoring worker.
+
+Run one or more alongside the API (with MONITOR_ENABLED=false there):
+
+    LEASE_BACKEND=redis python -m backend.worker
+
+Workers share locations between them by consistent hash over grid cells
+and coordinate through leases in Redis or the database. Set METRICS_PORT
+to serve Prometheus metrics, and send SIGUSR1 to write a profile of the
+next monitoring pass under PROFILE_DIR. With STREAM_RELAY=redis, alert
+and risk events reach the API's /api/stream subscribers over Redis. With
+PREALERT_ENABLED, whichever worker owns shard 0 also refreshes exposure and
+relays the early warnings the same way.
+"""
+import asyncio
+import signal
+from .database import database
+from .services.cache import CachedWeatherService
+from .services import metrics
+from .services.monitor import ParametricMonitor
+from .services.scheduler import FetchScheduler
+from .services.relay import RelayBroadcaster, create_event_channel
+from .services.sharding import ShardCoordinator
+from .services.timeseries import TimeSeriesStore
+from .services.webhooks import WebhookDispatcher
+from .config import settings
+
+async def run():
+    await database.create_tables()
+    weather_service = CachedWeatherService()
+    notifier = WebhookDispatcher() if settings.alert_webhook_url else None
+    coordinator = ShardCoordinator()
+    channel = create_event_channel()
+    broadcaster = RelayBroadcaster(channel) if channel else None
+    monitor = ParametricMonitor(
+        weather_service=weather_service,
+        notifier=notifier,
+        broadcaster=broadcaster,
+        coordinator=coordinator,
+        history=TimeSeriesStore() if settings.timeseries_enabled else None
+    )
+    exposure = None
+    if settings.prealert_enabled:
+        from .services.exposure import ExposureEngine
+        from .services.prealert import PreAlerter
+        # Fetches spend the same divided quota as the monitor's
+        exposure = ExposureEngine(
+            weather_service=weather_service,
+            scheduler=FetchScheduler(rate_limiter=monitor.scheduler.rate_limiter),
+            history=monitor.history,
+            stages=[PreAlerter(broadcaster=broadcaster).update],
+            coordinator=coordinator
+        )
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    loop.add_signal_handler(signal.SIGUSR1, monitor.request_profile)
+
+    def collect_metrics():
+        return metrics.component_samples(
+            scheduler=monitor.scheduler,
+            cache=weather_service.cache,
+            notifier=notifier,
+            broadcaster=broadcaster,
+            cadence=monitor.cadence,
+            history=monitor.history
+        )
+
+    metrics.registry.add_collector(collect_metrics)
+    server = await metrics.serve(settings.metrics_port) if settings.metrics_port else None
+
+    if notifier:
+        notifier.start()
+    if broadcaster:
+        broadcaster.start()
+    await monitor.start()
+    if exposure:
+        exposure.start()
+    print(f"Monitor worker {coordinator.worker_id} started ({settings.lease_backend} leases)")
+    await stopping.wait()
+
+    # Release shards first so the remaining workers pick them up straight away
+    if exposure:
+        await exposure.stop()
+    await monitor.stop()
+    if server:
+        server.close()
+        await server.wait_closed()
+    if notifier:
+        await notifier.stop()
+    if broadcaster:
+        await broadcaster.stop()
+    await coordinator.store.aclose()
+    await weather_service.aclose()
+    await database.dispose()
+    print(f"Monitor worker {coordinator.worker_id} stopped")
+
+if __name__ == "__main__":
+    asyncio.run(run())
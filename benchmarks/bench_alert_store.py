@@ -0,0 +1,107 @@
+"""Alert feed latency over a large SQLite alert table: keyset vs offset pages.
+
+    python -m benchmarks.bench_alert_store --alerts 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, text
+from backend.database import Database
+from backend.models.schemas import RiskLevel
+from backend.models.tables import AlertRow
+from backend.services.repository import AlertRepository
+
+LEVELS = [level.value for level in RiskLevel]
+
+async def seed(database: Database, count: int, locations: int, batch: int = 20000):
+    """Insert synthetic alerts straight into the table; ~90% already resolved"""
+    start = datetime(2024, 1, 1)
+    async with database.session() as session:
+        for offset in range(0, count, batch):
+            rows = []
+            for i in range(offset, min(offset + batch, count)):
+                resolved = i % 10 != 0
+                triggered_at = start + timedelta(seconds=i * 3)
+                rows.append({
+                    "id": f"alert-{i:08d}", "location_id": f"loc-{i % locations}", "trigger_id": f"trg-{i % locations}",
+                    "risk_level": LEVELS[i % len(LEVELS)], "message": "Rainfall exceeded threshold",
+                    "current_value": 60.0, "threshold_value": 50.0, "triggered_at": triggered_at,
+                    "resolved": resolved, "resolved_at": triggered_at + timedelta(hours=1) if resolved else None,
+                    "prescriptive_actions": [],
+                })
+            await session.execute(insert(AlertRow), rows)
+        await session.commit()
+
+async def timed(label: str, coro_factory, repeat: int = 20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = await coro_factory()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:44s} {elapsed * 1000:8.2f} ms")
+    return result
+
+async def offset_page(database: Database, offset: int, limit: int):
+    """The pre-cursor approach: ORDER BY ... OFFSET n scans and discards n rows"""
+    stmt = (
+        select(AlertRow)
+        .where(AlertRow.resolved.is_(False))
+        .order_by(AlertRow.triggered_at.desc(), AlertRow.id.desc())
+        .offset(offset).limit(limit)
+    )
+    async with database.session() as session:
+        return (await session.scalars(stmt)).all()
+
+async def run(count: int, locations: int, limit: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        await database.create_tables()
+        alerts = AlertRepository(database)
+
+        start = time.perf_counter()
+        await seed(database, count, locations)
+        print(f"seeded {count} alerts in {time.perf_counter() - start:.1f}s")
+
+        # Walk halfway through the active alerts once to get a deep cursor
+        depth = max(1, count // 10 // limit // 2)
+        cursor = None
+        for _ in range(depth):
+            _, cursor = await alerts.page(cursor=cursor, limit=limit)
+
+        await timed("active feed, first page", lambda: alerts.page(limit=limit))
+        await timed(f"active feed, page {depth + 1} via cursor", lambda: alerts.page(cursor=cursor, limit=limit))
+        await timed(f"active feed, page {depth + 1} via OFFSET", lambda: offset_page(database, depth * limit, limit), repeat=5)
+        await timed("one location, all alerts", lambda: alerts.page(location_id="loc-7", active_only=False, limit=limit))
+        await timed("risk level, active", lambda: alerts.page(risk_level=RiskLevel.CRITICAL, limit=limit))
+        since = datetime(2024, 1, 1) + timedelta(seconds=count * 3 // 2)
+        await timed("time window, all alerts", lambda: alerts.page(
+            active_only=False, since=since, until=since + timedelta(hours=6), limit=limit
+        ))
+        ids = iter(f"alert-{i:08d}" for i in range(0, count, 10))
+        await timed("resolve one alert", lambda: alerts.resolve([next(ids)]), repeat=100)
+
+        async with database.session() as session:
+            plan = (await session.execute(text(
+                "EXPLAIN QUERY PLAN SELECT * FROM alerts WHERE resolved = 0 "
+                "AND (triggered_at, id) < ('2024-02-01', 'x') ORDER BY triggered_at DESC, id DESC LIMIT 100"
+            ))).all()
+        print("active feed plan:", "; ".join(row[-1] for row in plan))
+
+        cutoff = datetime(2024, 1, 1) + timedelta(seconds=count * 3 // 2)
+        start = time.perf_counter()
+        deleted = await alerts.compact(cutoff)
+        print(f"compacted {deleted} resolved alerts in {time.perf_counter() - start:.1f}s")
+        await database.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--locations", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.alerts, args.locations, args.limit))
+
+if __name__ == "__main__":
+    main()
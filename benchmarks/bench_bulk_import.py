@@ -0,0 +1,68 @@
+"""Rows per second for streamed NDJSON/CSV location imports into SQLite.
+
+    python -m benchmarks.bench_bulk_import --rows 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+from backend.database import Database
+from backend.models.schemas import Location
+from backend.services.bulk_import import CSV, NDJSON, import_stream, prepare_location
+from backend.services.repository import LocationRepository
+
+async def generate(rows: int, fmt: str, chunk_bytes: int = 65536):
+    """Yield the upload body in chunks without materialising it"""
+    buffer = "id,name,latitude,longitude,insurer_id,policy_ids\n" if fmt == CSV else ""
+    for i in range(rows):
+        lat, lon = -35 + (i % 7000) * 0.01, -17 + (i // 7000) * 0.01
+        if fmt == CSV:
+            buffer += f"loc-{i},Site {i},{lat:.4f},{lon:.4f},INS-{i % 50},POL-{i}\n"
+        else:
+            buffer += json.dumps({
+                "id": f"loc-{i}", "name": f"Site {i}", "latitude": lat, "longitude": lon,
+                "insurer_id": f"INS-{i % 50}", "policy_ids": [f"POL-{i}"]
+            }) + "\n"
+        if len(buffer) >= chunk_bytes:
+            yield buffer.encode()
+            buffer = ""
+    if buffer:
+        yield buffer.encode()
+
+async def run(rows: int, fmt: str, write: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        await database.create_tables()
+        repository = LocationRepository(database)
+
+        async def discard(batch):
+            return len(batch)
+
+        start = time.perf_counter()
+        result = await import_stream(
+            generate(rows, fmt), fmt, Location,
+            repository.bulk_upsert if write else discard,
+            prepare=prepare_location
+        )
+        elapsed = time.perf_counter() - start
+        await database.dispose()
+    assert result["inserted"] == rows, result
+    return rows / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    for fmt in (NDJSON, CSV):
+        parse_only = asyncio.run(run(args.rows, fmt, write=False))
+        end_to_end = asyncio.run(run(args.rows, fmt, write=True))
+        print(f"{fmt:6s} parse+validate: {parse_only:9.0f} rows/s   with SQLite upsert: {end_to_end:9.0f} rows/s")
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS {peak_mb:.0f} MB for {args.rows} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Requests per second with a client per request vs. the pooled WeatherService client.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_http_client --requests 2000 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from backend.config import settings
+from backend.services.weather_service import WeatherService
+from tests.stub_server import StubWeatherServer
+
+async def per_request_client(base_url: str, n: int, concurrency: int) -> float:
+    """Previous behaviour: a fresh AsyncClient (and connection) for every call"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{base_url}/weather", params={"lat": 6.5, "lon": 3.4})
+                response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return n / (time.perf_counter() - start)
+
+async def pooled_client(n: int, concurrency: int) -> float:
+    service = WeatherService()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await service.get_current_weather(6.5, 3.4, f"loc-{i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    rate = n / (time.perf_counter() - start)
+    await service.aclose()
+    return rate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    with StubWeatherServer() as server:
+        settings.weather_api_base_url = server.base_url
+        before = asyncio.run(per_request_client(server.base_url, args.requests, args.concurrency))
+        after = asyncio.run(pooled_client(args.requests, args.concurrency))
+
+    print(f"client per request: {before:8.0f} req/s")
+    print(f"pooled client:      {after:8.0f} req/s  ({after / before:.1f}x)")
+
+if __name__ == "__main__":
+    main()
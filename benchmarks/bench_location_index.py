@@ -0,0 +1,79 @@
+"""Spatial location search: full scan of all locations vs. LocationIndex.
+
+    python -m benchmarks.bench_location_index --locations 1000000 --leaf-size 256
+"""
+import argparse
+import math
+import statistics
+import time
+import numpy as np
+from backend.models.records import LocationRecord
+from backend.services.location_index import LocationIndex
+
+def build_locations(n: int):
+    """60% around 20 cities, the rest spread over a West-Africa-sized region"""
+    rng = np.random.default_rng(0)
+    cities = rng.uniform([4, -5], [14, 12], size=(20, 2))
+    clustered = int(n * 0.6)
+    points = np.vstack([
+        cities[rng.integers(0, len(cities), clustered)] + rng.normal(0, 0.15, (clustered, 2)),
+        rng.uniform([4, -5], [14, 12], size=(n - clustered, 2)),
+    ])
+    records = [LocationRecord(f"loc-{i}", lat, lon, f"INS-{i % 50}") for i, (lat, lon) in enumerate(points.tolist())]
+    return records, cities
+
+def median_ms(query, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count, _ = query()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3, count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=1000000)
+    parser.add_argument("--leaf-size", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=100, help="rows materialised per query")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--inserts", type=int, default=10000)
+    args = parser.parse_args()
+
+    records, cities = build_locations(args.locations)
+    lat, lon = cities[0]
+
+    start = time.perf_counter()
+    scanned = [r for r in records if lat - 0.1 <= r.latitude <= lat + 0.1 and lon - 0.1 <= r.longitude <= lon + 0.1]
+    scan = time.perf_counter() - start
+
+    index = LocationIndex(leaf_size=args.leaf_size)
+    start = time.perf_counter()
+    index.add_many(records)
+    build = time.perf_counter() - start
+
+    ring = [[lon + 0.45 * math.cos(a), lat + 0.3 * math.sin(a)] for a in np.linspace(0, 2 * math.pi, 24, endpoint=False)]
+    queries = {
+        "bbox 0.2deg, city": lambda: index.bbox(lat - 0.1, lon - 0.1, lat + 0.1, lon + 0.1, limit=args.limit),
+        "bbox 1deg, rural": lambda: index.bbox(12, -3, 13, -2, limit=args.limit),
+        "radius 5km, city": lambda: index.radius(lat, lon, 5, limit=args.limit),
+        "radius 25km, city": lambda: index.radius(lat, lon, 25, limit=args.limit),
+        "radius 25km, rural": lambda: index.radius(12.5, -3, 25, limit=args.limit),
+        "radius 25km, insurer": lambda: index.radius(lat, lon, 25, insurer_id="INS-3", limit=args.limit),
+        "polygon 24 vertices": lambda: index.polygon([[ring]], limit=args.limit),
+    }
+
+    print(f"{args.locations} locations, leaf size {args.leaf_size}, limit {args.limit}")
+    print(f"full scan (bbox 0.2deg): {scan * 1e3:10.1f} ms  ({len(scanned)} matches)")
+    print(f"index build:             {build:10.2f} s")
+    for name, query in queries.items():
+        ms, count = median_ms(query, args.repeat)
+        print(f"{name:<24} {ms:10.3f} ms  ({count} matches)")
+
+    rng = np.random.default_rng(1)
+    start = time.perf_counter()
+    for i, (new_lat, new_lon) in enumerate(rng.uniform([4, -5], [14, 12], size=(args.inserts, 2)).tolist()):
+        index.add(LocationRecord(f"new-{i}", new_lat, new_lon, "INS-1"))
+    print(f"single inserts:          {args.inserts / (time.perf_counter() - start):10,.0f} /s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Hot-path records vs pydantic models: memory per trigger, sync load, evaluation and alert throughput.
+
+    python -m benchmarks.bench_records --triggers 1000000 --locations 100000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from backend.database import Database
+from backend.models.records import AlertRecord, Observation, TriggerRecord
+from backend.models.schemas import Alert, ParametricTrigger, TriggerType, WeatherData
+from backend.services.repository import TriggerRepository
+from backend.services.risk_engine import RiskEngine
+from backend.services.trigger_registry import TriggerRegistry
+
+TYPES = (TriggerType.RAINFALL, TriggerType.WIND_SPEED, TriggerType.TEMPERATURE)
+
+def trigger_fields(n: int, locations: int):
+    location_ids = [str(uuid.uuid4()) for _ in range(locations)]
+    for i in range(n):
+        yield dict(
+            id=str(uuid.uuid4()), location_id=location_ids[i % locations], trigger_type=TYPES[i % 3],
+            threshold_value=20.0 + i % 40, threshold_operator="gt", duration_hours=1, payout_amount=1000.0
+        )
+
+def measure(label: str, build):
+    """Memory held by, and time taken to build, a TriggerRegistry"""
+    gc.collect()
+    tracemalloc.start()
+    began = time.perf_counter()
+    registry = build()
+    elapsed = time.perf_counter() - began
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:34s} {size / len(registry):7.0f} bytes/trigger  {len(registry) / elapsed:10,.0f} triggers/s")
+    return registry
+
+async def sync_load(rows, count: int):
+    """changed_since (ORM rows -> pydantic) vs records_changed_since (columns -> records)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        await database.create_tables()
+        repository = TriggerRepository(database)
+        await repository.bulk_upsert(ParametricTrigger(**fields) for fields in rows[:count])
+        for label, load in (("changed_since (models)", repository.changed_since),
+                            ("records_changed_since (records)", repository.records_changed_since)):
+            began = time.perf_counter()
+            loaded = await load(None)
+            elapsed = time.perf_counter() - began
+            print(f"  {label:34s} {len(loaded) / elapsed:10,.0f} triggers/s")
+        await database.dispose()
+
+def evaluate(engine: RiskEngine, weather, triggers, rounds: int) -> float:
+    began = time.perf_counter()
+    for _ in range(rounds):
+        engine.evaluate_triggers(weather, triggers)
+    return rounds * len(triggers) / (time.perf_counter() - began)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--triggers", type=int, default=200_000)
+    parser.add_argument("--locations", type=int, default=20_000)
+    parser.add_argument("--sync-triggers", type=int, default=50_000, help="Rows loaded from SQLite")
+    parser.add_argument("--alerts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = list(trigger_fields(args.triggers, args.locations))
+    print(f"{args.triggers:,} triggers over {args.locations:,} locations")
+    print("registry memory and build rate:")
+    models = measure("ParametricTrigger", lambda: TriggerRegistry(ParametricTrigger(**r) for r in rows))
+    records = measure("TriggerRecord", lambda: TriggerRegistry(TriggerRecord(**r) for r in rows))
+
+    print(f"sync load of {min(args.sync_triggers, len(rows)):,} triggers from SQLite:")
+    asyncio.run(sync_load(rows, args.sync_triggers))
+
+    engine = RiskEngine()
+    now = datetime.utcnow()
+    fields = dict(
+        location_id="cell", timestamp=now, temperature=25.0, rainfall=40.0, wind_speed=5.0, humidity=70.0, pressure=1013.0
+    )
+    weather, observation = WeatherData(**fields), Observation(**fields)
+    # A cell's worth of triggers at a time, as the monitor evaluates them
+    batch = max(1, args.triggers // args.locations) * 50
+    model_batch = [models[r["id"]] for r in rows[:batch]]
+    record_batch = [records[r["id"]] for r in rows[:batch]]
+    rounds = max(1, 200_000 // batch)
+    print(f"evaluate_triggers, {batch} triggers per cell:")
+    print(f"  {'models':34s} {evaluate(engine, weather, model_batch, rounds):10,.0f} triggers/s")
+    print(f"  {'records':34s} {evaluate(engine, observation, record_batch, rounds):10,.0f} triggers/s")
+
+    print(f"building {args.alerts:,} alerts and their webhook payloads:")
+    alert = engine.create_alert(observation, record_batch[0]).to_dict()
+    for label, build, payload in (
+        ("Alert (pydantic)", Alert, lambda a: a.model_dump(mode="json")),
+        ("AlertRecord", AlertRecord, AlertRecord.to_json),
+    ):
+        began = time.perf_counter()
+        for _ in range(args.alerts):
+            payload(build(**alert))
+        print(f"  {label:34s} {args.alerts / (time.perf_counter() - began):10,.0f} alerts/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""RiskEngine throughput: scalar vs. vectorized trigger evaluation and risk scoring.
+
+    python -m benchmarks.bench_risk_engine --evaluations 1000000 --locations 10000
+"""
+import argparse
+import time
+import numpy as np
+from datetime import datetime
+from backend.models.schemas import ForecastData, ParametricTrigger, TriggerType, WeatherData
+from backend.services.risk_engine import OPERATOR_CODES, RiskEngine
+
+def bench_evaluation(engine: RiskEngine, n: int, scalar_sample: int):
+    rng = np.random.default_rng(0)
+
+    # Columnar inputs for the batch path
+    observations = rng.uniform(0, 100, size=(n // 10 + 1, 3))
+    index = rng.integers(0, len(observations), size=n)
+    column = rng.integers(-1, 3, size=n).astype(np.int8)
+    thresholds = rng.uniform(0, 100, size=n)
+    operators = rng.integers(0, len(OPERATOR_CODES), size=n).astype(np.int8)
+    values = observations[index, np.maximum(column, 0)]
+    values[column < 0] = np.nan
+
+    start = time.perf_counter()
+    fired = engine.evaluate_batch(values, thresholds, operators)
+    batch = time.perf_counter() - start
+
+    # Scalar path on a sample of equivalent pydantic objects
+    sample = min(scalar_sample, n)
+    types = list(TriggerType)
+    names = list(OPERATOR_CODES)
+    weather = [
+        WeatherData(
+            location_id="loc", timestamp=datetime.utcnow(), rainfall=row[0], wind_speed=row[1],
+            temperature=row[2], humidity=70.0, pressure=1013.0
+        )
+        for row in observations
+    ]
+    pairs = [
+        (
+            weather[index[i]],
+            ParametricTrigger(
+                id=str(i), location_id="loc",
+                trigger_type=types[3] if column[i] < 0 else types[column[i]],
+                threshold_value=thresholds[i], threshold_operator=names[operators[i]]
+            )
+        )
+        for i in range(sample)
+    ]
+    start = time.perf_counter()
+    scalar_fired = [engine.evaluate_trigger(w, t) for w, t in pairs]
+    scalar = (time.perf_counter() - start) * n / sample
+
+    assert scalar_fired == fired[:sample].tolist()
+    print(f"{n} trigger evaluations ({fired.sum()} fired)")
+    print(f"scalar evaluate_trigger: {scalar:8.3f}s (extrapolated from {sample})")
+    print(f"evaluate_batch:          {batch:8.3f}s  ({scalar / batch:.0f}x)")
+
+def bench_scoring(engine: RiskEngine, n_locations: int, triggers_per_location: int, scalar_sample: int):
+    rng = np.random.default_rng(1)
+    slots = 16
+    rainfall = rng.uniform(0, 80, size=(n_locations, slots))
+    wind = rng.uniform(0, 30, size=(n_locations, slots))
+    n_triggers = n_locations * triggers_per_location
+    trigger_location = np.repeat(np.arange(n_locations), triggers_per_location)
+    types = [TriggerType.RAINFALL, TriggerType.WIND_SPEED]
+    triggers = [
+        ParametricTrigger(
+            id=str(i), location_id=str(trigger_location[i]), trigger_type=types[i % 2],
+            threshold_value=float(rng.uniform(10, 60)), threshold_operator="gt"
+        )
+        for i in range(n_triggers)
+    ]
+    columns = engine.trigger_columns(triggers)
+
+    start = time.perf_counter()
+    engine.score_batch(rainfall, wind, columns, trigger_location)
+    batch = time.perf_counter() - start
+
+    sample = min(scalar_sample, n_locations)
+    forecasts = [
+        [
+            ForecastData(
+                location_id=str(i), forecast_time=datetime.utcnow(), temperature=20.0,
+                rainfall_probability=50.0, rainfall_amount=rainfall[i, j], wind_speed=wind[i, j],
+                risk_score=0.0
+            )
+            for j in range(slots)
+        ]
+        for i in range(sample)
+    ]
+    start = time.perf_counter()
+    for i in range(sample):
+        location_triggers = triggers[i * triggers_per_location:(i + 1) * triggers_per_location]
+        for forecast in forecasts[i]:
+            engine.calculate_risk_score(forecast, location_triggers)
+    scalar = (time.perf_counter() - start) * n_locations / sample
+
+    print(f"risk scores for {n_locations} locations x {slots} slots, {n_triggers} triggers")
+    print(f"scalar calculate_risk_score: {scalar:8.3f}s (extrapolated from {sample})")
+    print(f"score_batch:                 {batch:8.3f}s  ({scalar / batch:.0f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--evaluations", type=int, default=1000000)
+    parser.add_argument("--locations", type=int, default=10000)
+    parser.add_argument("--triggers-per-location", type=int, default=4)
+    parser.add_argument("--scalar-sample", type=int, default=100000)
+    args = parser.parse_args()
+
+    engine = RiskEngine()
+    bench_evaluation(engine, args.evaluations, args.scalar_sample)
+    bench_scoring(engine, args.locations, args.triggers_per_location, args.scalar_sample // 100)
+
+if __name__ == "__main__":
+    main()
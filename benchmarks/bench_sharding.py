@@ -0,0 +1,111 @@
+"""Monitor cycle time with 1..N sharded worker processes against a stub upstream.
+
+Workers coordinate through database leases in a shared SQLite file, as
+separate nodes would; each has its own fetch concurrency budget and the
+stub adds fixed latency per upstream request.
+
+    python -m benchmarks.bench_sharding --locations 400 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from backend.config import settings
+from backend.database import Database
+from backend.models.records import LocationRecord, TriggerRecord
+from backend.models.schemas import TriggerType
+from backend.services.leases import DatabaseLeaseStore
+from backend.services.monitor import ParametricMonitor
+from backend.services.scheduler import FetchScheduler
+from backend.services.sharding import ShardCoordinator
+from tests.stub_server import StubWeatherServer
+
+def make_monitor(database, coordinator, locations: int, in_flight: int) -> ParametricMonitor:
+    monitor = ParametricMonitor(
+        scheduler=FetchScheduler(max_in_flight=in_flight, rate_limit=0), database=database, coordinator=coordinator
+    )
+    for i in range(locations):
+        # ~1.1km apart, so every location is its own cell
+        monitor.locations[f"loc-{i}"] = LocationRecord(
+            id=f"loc-{i}", latitude=-30 + (i // 100) * 0.01, longitude=10 + (i % 100) * 0.01,
+            insurer_id="INS-1"
+        )
+        monitor.triggers.add(TriggerRecord(
+            id=f"t-{i}", location_id=f"loc-{i}", trigger_type=TriggerType.RAINFALL,
+            threshold_value=25.0, threshold_operator="gt"
+        ))
+    return monitor
+
+async def work(worker: int, base_url: str, path: str, locations: int, in_flight: int, barrier):
+    settings.weather_api_base_url = base_url
+    database = Database(f"sqlite:///{path}")
+    monitor = make_monitor(
+        database, ShardCoordinator(DatabaseLeaseStore(database), f"w{worker}", lease_ttl=600), locations, in_flight
+    )
+    evaluated = []
+    original = monitor._evaluate_cell
+
+    async def counting(cell_locations, weather):
+        evaluated.extend(loc.id for loc in cell_locations)
+        await original(cell_locations, weather)
+
+    monitor._evaluate_cell = counting
+    try:
+        # Join, see every member and release, then claim what was released
+        for _ in range(3):
+            await monitor.coordinator.heartbeat()
+            barrier.wait()
+        start = time.perf_counter()
+        await monitor._check_all_locations()
+        elapsed = time.perf_counter() - start
+    finally:
+        await monitor.weather_service.aclose()
+        await database.dispose()
+    return elapsed, evaluated, len(monitor.coordinator.owned)
+
+def worker_main(worker, base_url, path, locations, in_flight, barrier, results):
+    results.put(asyncio.run(work(worker, base_url, path, locations, in_flight, barrier)))
+
+def run(workers: int, base_url: str, path: str, locations: int, in_flight: int):
+    asyncio.run(Database(f"sqlite:///{path}").create_tables())
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(workers), context.Queue()
+    processes = [
+        context.Process(target=worker_main, args=(i, base_url, path, locations, in_flight, barrier, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    evaluated = Counter(loc for _, ids, _ in outcomes for loc in ids)
+    elapsed = max(seconds for seconds, _, _ in outcomes)  # Slowest shard sets the cycle time
+    duplicates = sum(1 for count in evaluated.values() if count > 1)
+    return elapsed, len(evaluated), duplicates, sorted((owned for _, _, owned in outcomes), reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--in-flight", type=int, default=4, help="Concurrent fetches per worker")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub upstream latency in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, StubWeatherServer(delay=args.latency) as stub:
+        baseline = None
+        for workers in args.workers:
+            path = os.path.join(tmp, f"bench-{workers}.db")
+            elapsed, evaluated, duplicates, shards = run(workers, stub.base_url, path, args.locations, args.in_flight)
+            baseline = baseline or elapsed * args.workers[0]
+            print(
+                f"{workers:2d} workers: cycle {elapsed:6.2f}s  speedup x{baseline / elapsed:5.2f}  "
+                f"evaluated {evaluated}/{args.locations}  duplicates {duplicates}  shards per worker {shards}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Cold start of the API and the monitor worker: import time, time to ready and peak RSS.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --only api-lean --importtime 15
+
+Every run is a fresh interpreter against an empty SQLite database. "ready"
+includes the app's lifespan startup, i.e. everything before uvicorn would
+accept the first request. Heavy modules the process ended up importing are
+listed, since a change that drags one back into startup shows up there first.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("fastapi", "uvicorn", "sqlalchemy", "numpy", "pandas", "geopy", "redis", "h2")
+
+# (module to import, run the FastAPI lifespan, extra environment)
+TARGETS = {
+    "python": (None, False, {}),
+    "api-import": ("backend.main", False, {}),
+    "api-lean": ("backend.main", True, {"MONITOR_ENABLED": "false", "PREALERT_ENABLED": "false"}),
+    "api": ("backend.main", True, {}),
+    "worker-import": ("backend.worker", False, {}),
+}
+
+CHILD = """
+import asyncio, importlib, json, resource, sys, time
+module, lifespan, heavy = sys.argv[1], sys.argv[2] == "1", sys.argv[3].split(",")
+start = time.perf_counter()
+app = importlib.import_module(module).app if module and lifespan else module and importlib.import_module(module)
+imported = time.perf_counter() - start
+ready = imported
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter() - start
+
+if lifespan:
+    ready = asyncio.run(startup())
+print(json.dumps({
+    "import_s": imported,
+    "ready_s": ready,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "heavy": [name for name in heavy if name in sys.modules],
+}))
+"""
+
+def run_once(name: str, directory: str, importtime: bool = False) -> dict:
+    module, lifespan, extra = TARGETS[name]
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{directory}/{name}.db",
+        "TIMESERIES_PATH": os.path.join(directory, "timeseries"),
+        "PYTHONDONTWRITEBYTECODE": "",
+        **extra,
+    }
+    command = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    result = subprocess.run(
+        command + ["-c", CHILD, module or "", "1" if lifespan else "0", ",".join(HEAVY_MODULES)],
+        env=env, capture_output=True, text=True, check=True
+    )
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["importtime"] = result.stderr
+    return sample
+
+def slowest_imports(importtime: str, count: int):
+    """Top-level packages by self time from -X importtime output"""
+    totals = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(own)
+    return sorted(totals.items(), key=lambda item: -item[1])[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", default=",".join(TARGETS), help=f"comma-separated subset of {', '.join(TARGETS)}")
+    parser.add_argument("--importtime", type=int, default=0, help="also list the N slowest packages to import")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'target':<14} {'import ms':>10} {'ready ms':>10} {'rss MB':>8} {'modules':>8}  heavy modules loaded")
+        for name in args.only.split(","):
+            samples = [run_once(name, directory) for _ in range(args.runs)]
+            print(
+                f"{name:<14} {statistics.median(s['import_s'] for s in samples) * 1e3:10.0f}"
+                f" {statistics.median(s['ready_s'] for s in samples) * 1e3:10.0f}"
+                f" {statistics.median(s['rss_mb'] for s in samples):8.1f}"
+                f" {samples[0]['modules']:8d}  {', '.join(samples[0]['heavy']) or '-'}"
+            )
+            if args.importtime and TARGETS[name][0]:
+                for package, micros in slowest_imports(run_once(name, directory, importtime=True)["importtime"], args.importtime):
+                    print(f"    {package:<24} {micros / 1e3:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Observation history: append rate, bytes per sample and range-query latency.
+
+    python -m benchmarks.bench_timeseries --cells 1000 --days 7 --interval 300
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from backend.config import settings
+from backend.models.schemas import WeatherData
+from backend.services.timeseries import TimeSeriesStore
+
+START = datetime(2024, 1, 1)
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+def time_queries(store: TimeSeriesStore, cells, days: int, span: timedelta, resolution=None, n: int = 200):
+    rng = random.Random(1)
+    latencies, rows = [], 0
+    for _ in range(n):
+        start = START + timedelta(seconds=rng.uniform(0, days * 86400 - span.total_seconds()))
+        began = time.perf_counter()
+        result = store.observations.query(rng.choice(cells), start, start + span, resolution)
+        latencies.append(time.perf_counter() - began)
+        rows += len(result["time"])
+    p50, p99 = percentiles(latencies)
+    label = f"{span.days or span.seconds // 3600}{'d' if span.days else 'h'} range" + (f" @{resolution}s" if resolution else "")
+    print(f"  {label:18s} p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  {rows / n:8.0f} rows/query")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between samples per cell")
+    args = parser.parse_args()
+
+    cells = [f"cell-{i}" for i in range(args.cells)]
+    steps = args.days * 86400 // args.interval
+    weather = WeatherData(
+        location_id="", timestamp=START, temperature=25.0, rainfall=3.0, wind_speed=5.0, humidity=70.0, pressure=1013.0
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TimeSeriesStore(tmp)
+        began = time.perf_counter()
+        flush_every = max(1, 3600 // args.interval)  # An hour per segment
+        for step in range(steps):
+            moment = START + timedelta(seconds=step * args.interval)
+            for cell in cells:
+                store.observations.append(cell, moment, (
+                    weather.temperature, weather.rainfall + step % 7, weather.wind_speed, weather.humidity, weather.pressure
+                ))
+            if step % flush_every == flush_every - 1:
+                store.observations.flush()
+        store.observations.flush()
+        elapsed = time.perf_counter() - began
+        samples = steps * args.cells
+        print(f"appended {samples:,} samples in {elapsed:.1f}s ({samples / elapsed:,.0f}/s, flushes included)")
+
+        raw_bytes = store.observations.bytes_on_disk()
+        print(f"unmerged segments: {raw_bytes / samples:5.1f} bytes/sample")
+        time_queries(store, cells, args.days, timedelta(days=1), n=50)
+
+        began = time.perf_counter()
+        asyncio.run(store.maintain(now=START + timedelta(days=args.days + 1)))
+        print(f"merged {args.days} days in {time.perf_counter() - began:.1f}s: "
+              f"{store.observations.bytes_on_disk() / samples:5.1f} bytes/sample")
+        time_queries(store, cells, args.days, timedelta(hours=1))
+        time_queries(store, cells, args.days, timedelta(days=1))
+        time_queries(store, cells, args.days - 1, timedelta(days=args.days - 1), n=50)
+        time_queries(store, cells, args.days - 1, timedelta(days=args.days - 1), resolution=3600, n=50)
+
+        settings.timeseries_downsample_after_days = 1
+        asyncio.run(store.maintain(now=START + timedelta(days=args.days + 2)))
+        print(f"downsampled to hourly: {store.observations.bytes_on_disk() / samples:5.2f} bytes/raw sample")
+
+if __name__ == "__main__":
+    main()
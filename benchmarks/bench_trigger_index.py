@@ -0,0 +1,58 @@
+"""Per-location trigger lookup: full scan of all triggers vs. TriggerRegistry.
+
+    python -m benchmarks.bench_trigger_index --triggers 100000 --locations 20000
+"""
+import argparse
+import random
+import time
+from backend.models.schemas import ParametricTrigger, TriggerType
+from backend.services.risk_engine import OBSERVED_TRIGGER_TYPES
+from backend.services.trigger_registry import TriggerRegistry
+
+def build_triggers(n_triggers: int, n_locations: int):
+    rng = random.Random(0)
+    types = list(TriggerType)
+    return [
+        ParametricTrigger(
+            id=f"t-{i}",
+            location_id=f"loc-{rng.randrange(n_locations)}",
+            trigger_type=rng.choice(types),
+            threshold_value=rng.uniform(1, 100),
+            threshold_operator="gt",
+            active=rng.random() > 0.1
+        )
+        for i in range(n_triggers)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--triggers", type=int, default=100000)
+    parser.add_argument("--locations", type=int, default=20000)
+    parser.add_argument("--scan-sample", type=int, default=200, help="locations timed for the full scan")
+    args = parser.parse_args()
+
+    triggers = build_triggers(args.triggers, args.locations)
+    by_id = {t.id: t for t in triggers}
+    location_ids = [f"loc-{i}" for i in range(args.locations)]
+
+    start = time.perf_counter()
+    for location_id in location_ids[:args.scan_sample]:
+        [t for t in by_id.values() if t.location_id == location_id and t.active]
+    scan = (time.perf_counter() - start) / args.scan_sample
+
+    start = time.perf_counter()
+    registry = TriggerRegistry(triggers)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for location_id in location_ids:
+        registry.active_for_location(location_id, OBSERVED_TRIGGER_TYPES)
+    indexed = (time.perf_counter() - start) / len(location_ids)
+
+    print(f"{args.triggers} triggers over {args.locations} locations")
+    print(f"full scan:   {scan * 1e6:10.1f} us/location  (cycle ~{scan * args.locations:.1f}s)")
+    print(f"registry:    {indexed * 1e6:10.1f} us/location  (cycle ~{indexed * args.locations:.3f}s)")
+    print(f"index build: {build:.2f}s  speedup {scan / indexed:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare two benchmark suite results and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+
+Exits with status 1 when any metric got worse by more than the threshold
+(a fraction of the baseline), so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+def change(baseline: dict, candidate: dict) -> float:
+    """Relative change, positive when the candidate is better"""
+    old, new = baseline["value"], candidate["value"]
+    if old == 0:
+        return 0.0 if new == 0 else (1.0 if (new > 0) == (baseline["better"] == "higher") else -1.0)
+    delta = (new - old) / abs(old)
+    return delta if baseline["better"] == "higher" else -delta
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Tolerated relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"{baseline['meta']['commit']} -> {candidate['meta']['commit']}")
+
+    regressions = 0
+    for name in sorted(set(baseline["metrics"]) | set(candidate["metrics"])):
+        old, new = baseline["metrics"].get(name), candidate["metrics"].get(name)
+        if old is None or new is None:
+            print(f"  {name:44s} {'only in ' + ('candidate' if old is None else 'baseline'):>40s}")
+            continue
+        delta = change(old, new)
+        flag = ""
+        if delta < -args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif delta > args.threshold:
+            flag = "  improved"
+        print(f"  {name:44s} {old['value']:14,.3f} -> {new['value']:14,.3f} {old['unit']:13s} {delta:+7.1%}{flag}")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Benchmark suite: RiskEngine micro-benchmarks, monitor cycles and API load, written as JSON.
+
+    python -m benchmarks.suite                                  # everything, to benchmarks/results/<commit>.json
+    python -m benchmarks.suite --only engine,monitor --sizes 1000,10000 --output before.json
+    python -m benchmarks.compare before.json benchmarks/results/<commit>.json
+
+Every metric is recorded with its unit and whether higher or lower is
+better, so benchmarks.compare can flag regressions between two runs.
+Monitor cycles and API load run against tests.stub_server's local
+OpenWeatherMap stand-in; the API is started with uvicorn in a subprocess
+over a scratch SQLite database.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+import numpy as np
+from backend.config import settings
+from backend.database import Database
+from backend.models.records import AlertRecord, Observation, TriggerRecord
+from backend.models.schemas import ForecastData, Location, ParametricTrigger, RiskLevel, TriggerType
+from backend.services.monitor import ParametricMonitor
+from backend.services.repository import AlertRepository, LocationRepository, TriggerRepository
+from backend.services.risk_engine import OPERATOR_CODES, RiskEngine
+from backend.services.scheduler import FetchScheduler
+from tests.stub_server import StubWeatherServer
+
+GROUPS = ("engine", "monitor", "api")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+class Results:
+    """Named metrics plus enough context to tell two runs apart"""
+
+    def __init__(self):
+        self.metrics: Dict[str, dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "higher"):
+        self.metrics[name] = {"value": value, "unit": unit, "better": better}
+        print(f"  {name:44s} {value:14,.3f} {unit}")
+
+    def dump(self, path: str, args: argparse.Namespace):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"meta": run_metadata(args), "metrics": self.metrics}, f, indent=2, sort_keys=True)
+        print(f"Wrote {len(self.metrics)} metrics to {path}")
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_metadata(args: argparse.Namespace) -> dict:
+    return {
+        "commit": git_commit(),
+        "finished_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "arguments": vars(args),
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+def best_rate(work: Callable[[], None], items: int, repeat: int) -> float:
+    """Items per second of the fastest of ``repeat`` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        work()
+        best = min(best, time.perf_counter() - began)
+    return items / best
+
+@contextlib.contextmanager
+def overridden(**values):
+    """Temporarily change settings"""
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+def bench_engine(results: Results, repeat: int):
+    engine = RiskEngine()
+    rng = np.random.default_rng(0)
+
+    n = 1_000_000
+    values = rng.uniform(0, 100, n)
+    thresholds = rng.uniform(0, 100, n)
+    operators = rng.integers(0, len(OPERATOR_CODES), n).astype(np.int8)
+    results.add("engine.evaluate_batch", best_rate(
+        lambda: engine.evaluate_batch(values, thresholds, operators), n, repeat
+    ), "evaluations/s")
+
+    # One cell's worth of triggers against its shared observation, as the monitor evaluates them
+    types = (TriggerType.RAINFALL, TriggerType.WIND_SPEED, TriggerType.TEMPERATURE)
+    triggers = [
+        TriggerRecord(str(i), f"loc-{i % 50}", types[i % 3], float(rng.uniform(0, 60)), "gt")
+        for i in range(200)
+    ]
+    weather = Observation("cell", datetime.utcnow(), 25.0, 30.0, 12.0, 70.0, 1013.0)
+    rounds = 500
+    results.add("engine.evaluate_triggers", best_rate(
+        lambda: [engine.evaluate_triggers(weather, triggers) for _ in range(rounds)], rounds * len(triggers), repeat
+    ), "triggers/s")
+    results.add("engine.evaluate_trigger_scalar", best_rate(
+        lambda: [engine.evaluate_trigger(weather, t) for t in triggers * 50], 50 * len(triggers), repeat
+    ), "triggers/s")
+    location_ids = [f"loc-{i}" for i in range(50)]
+    results.add("engine.score_current", best_rate(
+        lambda: [engine.score_current(weather, location_ids, triggers) for _ in range(rounds)], rounds, repeat
+    ), "cells/s")
+    results.add("engine.threshold_proximity", best_rate(
+        lambda: [engine.threshold_proximity(weather, triggers) for _ in range(rounds)], rounds, repeat
+    ), "cells/s")
+
+    locations, slots = 10_000, 16
+    rainfall = rng.uniform(0, 80, (locations, slots))
+    wind = rng.uniform(0, 30, (locations, slots))
+    trigger_location = np.repeat(np.arange(locations), 4)
+    columns = engine.trigger_columns([
+        TriggerRecord(str(i), "", types[i % 2], float(rng.uniform(10, 60)), "gt") for i in range(len(trigger_location))
+    ])
+    results.add("engine.score_batch", best_rate(
+        lambda: engine.score_batch(rainfall, wind, columns, trigger_location), locations, repeat
+    ), "locations/s")
+
+    forecasts = [
+        ForecastData(
+            location_id="loc", forecast_time=datetime.utcnow(), temperature=20.0, rainfall_probability=50.0,
+            rainfall_amount=float(rainfall[0, j]), wind_speed=float(wind[0, j]), risk_score=0.0
+        )
+        for j in range(slots)
+    ]
+    results.add("engine.score_forecasts", best_rate(
+        lambda: [engine.score_forecasts(forecasts, triggers[:4]) for _ in range(rounds)], rounds, repeat
+    ), "locations/s")
+
+    alerts = 20_000
+    results.add("engine.create_alert", best_rate(
+        lambda: [engine.create_alert(weather, triggers[1]) for _ in range(alerts)], alerts, repeat
+    ), "alerts/s")
+
+async def seed_portfolio(database: Database, locations: int, firing_share: float = 0.1):
+    """``locations`` ~1.1km apart (one grid cell each), one rainfall trigger apiece.
+
+    The stub reports 40mm of rain, so the ``firing_share`` with a 25mm
+    threshold fire and the rest (100mm) don't.
+    """
+    await database.create_tables()
+    rng = random.Random(locations)
+    await LocationRepository(database).bulk_upsert(
+        Location(
+            id=f"loc-{i}", latitude=-30 + (i // 300) * 0.01, longitude=10 + (i % 300) * 0.01,
+            name=f"loc-{i}", insurer_id=f"INS-{i % 10}"
+        )
+        for i in range(locations)
+    )
+    await TriggerRepository(database).bulk_upsert(
+        ParametricTrigger(
+            id=f"t-{i}", location_id=f"loc-{i}", trigger_type=TriggerType.RAINFALL,
+            threshold_value=25.0 if rng.random() < firing_share else 100.0, threshold_operator="gt",
+            duration_hours=0, payout_amount=1000.0
+        )
+        for i in range(locations)
+    )
+
+async def monitor_cycles(path: str, locations: int) -> dict:
+    database = Database(f"sqlite:///{path}")
+    await seed_portfolio(database, locations)
+    monitor = ParametricMonitor(scheduler=FetchScheduler(rate_limit=0), database=database)
+    timings = []
+    try:
+        # The second cycle syncs nothing new and opens no alerts: the steady state
+        for _ in range(2):
+            began = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # One line per alert otherwise
+                await monitor._check_all_locations()
+            timings.append(time.perf_counter() - began)
+    finally:
+        await monitor.weather_service.aclose()
+        await database.dispose()
+    return {"cold": timings[0], "warm": timings[1], "cycle": monitor.scheduler.last_cycle}
+
+def bench_monitor(results: Results, sizes: List[int]):
+    with StubWeatherServer(weather={"temp": 25.0, "rain": 40.0, "wind": 5.0}) as stub, \
+            overridden(weather_api_base_url=stub.base_url, cycle_deadline_seconds=3600, timeseries_enabled=False):
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                requests = stub.requests
+                stats = asyncio.run(monitor_cycles(os.path.join(tmp, "bench.db"), size))
+            prefix = f"monitor.{size // 1000}k" if size >= 1000 else f"monitor.{size}"
+            results.add(f"{prefix}.cold_cycle_seconds", stats["cold"], "s", "lower")
+            results.add(f"{prefix}.warm_cycle_seconds", stats["warm"], "s", "lower")
+            results.add(f"{prefix}.warm_locations_per_second", size / stats["warm"], "locations/s")
+            results.add(f"{prefix}.upstream_requests_per_cycle", (stub.requests - requests) / 2, "requests", "lower")
+            results.add(f"{prefix}.failed_cells", stats["cycle"]["failed"] + stats["cycle"]["timed_out"], "cells", "lower")
+            results.add(f"{prefix}.peak_rss_mb", peak_rss_mb(), "MB", "lower")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def seed_api(database: Database, locations: int, alerts: int):
+    await seed_portfolio(database, locations)
+    now = datetime.utcnow()
+    levels = list(RiskLevel)
+    await AlertRepository(database).bulk_add(
+        AlertRecord(
+            str(uuid.uuid4()), f"loc-{i % locations}", f"t-{i % locations}", levels[i % len(levels)],
+            "rainfall threshold exceeded", 40.0, 25.0, now - timedelta(minutes=i)
+        )
+        for i in range(alerts)
+    )
+    await database.dispose()
+
+async def load(base_url: str, paths: List[str], duration: float, concurrency: int) -> dict:
+    """Closed-loop load: ``concurrency`` clients requesting random paths back to back"""
+    import httpx
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(session: httpx.AsyncClient, rng: random.Random):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            try:
+                response = await session.get(rng.choice(paths))
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - began)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as session:
+        began = time.perf_counter()
+        await asyncio.gather(*(client(session, random.Random(i)) for i in range(concurrency)))
+        elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+def wait_until_up(base_url: str, server: subprocess.Popen, timeout: float = 30):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API server exited with {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API server did not come up")
+
+def bench_api(results: Results, locations: int, alerts: int, duration: float, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp, StubWeatherServer() as stub:
+        url = f"sqlite:///{os.path.join(tmp, 'api.db')}"
+        asyncio.run(seed_api(Database(url), locations, alerts))
+        port = free_port()
+        env = {
+            **os.environ,
+            "DATABASE_URL": url,
+            "WEATHER_API_BASE_URL": stub.base_url,
+            "MONITOR_ENABLED": "false",
+            "CACHE_BACKEND": "local",
+            "TIMESERIES_ENABLED": "false",
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+            env=env
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_up(base_url, server)
+            ids = [f"loc-{i}" for i in range(locations)]
+            scenarios = {
+                "forecast": [f"/api/forecast/{i}" for i in ids],
+                "forecast_current": [f"/api/forecast/{i}/current" for i in ids],
+                "alerts_page": ["/api/alerts/?limit=100", "/api/alerts/?risk_level=high&limit=100"],
+                "alerts_location": [f"/api/alerts/location/{i}" for i in ids],
+                "locations_get": [f"/api/locations/{i}" for i in ids],
+                "locations_list": ["/api/locations/?insurer_id=INS-1"],
+            }
+            for name, paths in scenarios.items():
+                asyncio.run(load(base_url, paths, min(1.0, duration / 5), concurrency))  # Warm caches and connections
+                stats = asyncio.run(load(base_url, paths, duration, concurrency))
+                results.add(f"api.{name}.requests_per_second", stats["requests_per_second"], "requests/s")
+                results.add(f"api.{name}.p50_ms", stats["p50_ms"], "ms", "lower")
+                results.add(f"api.{name}.p99_ms", stats["p99_ms"], "ms", "lower")
+                results.add(f"api.{name}.errors", stats["errors"], "requests", "lower")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"Comma-separated groups: {', '.join(GROUPS)}")
+    parser.add_argument("--output", help="Defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Engine runs per micro-benchmark; the best counts")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Monitor portfolio sizes (locations)")
+    parser.add_argument("--api-locations", type=int, default=1000)
+    parser.add_argument("--api-alerts", type=int, default=50000)
+    parser.add_argument("--api-duration", type=float, default=5.0, help="Seconds of load per endpoint")
+    parser.add_argument("--api-concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    groups = [group for group in args.only.split(",") if group]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    results = Results()
+    if "engine" in groups:
+        print("RiskEngine:")
+        bench_engine(results, args.repeat)
+    if "monitor" in groups:
+        print("Monitor cycles:")
+        bench_monitor(results, [int(size) for size in args.sizes.split(",") if size])
+    if "api" in groups:
+        print(f"API load ({args.api_concurrency} concurrent clients, {args.api_duration:g}s per endpoint):")
+        bench_api(results, args.api_locations, args.api_alerts, args.api_duration, args.api_concurrency)
+    results.dump(args.output or os.path.join(RESULTS_DIR, f"{git_commit()}.json"), args)
+
+if __name__ == "__main__":
+    main()
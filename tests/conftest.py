@@ -0,0 +1,10 @@
+import asyncio
+import pytest
+from backend.database import Database
+
+@pytest.fixture
+def database(tmp_path):
+    db = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    asyncio.run(db.create_tables())
+    yield db
+    asyncio.run(db.dispose())
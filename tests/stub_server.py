@@ -0,0 +1,178 @@
+"""Local stand-in for the OpenWeatherMap endpoints used by WeatherService"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class StubWeatherServer:
+    """Threaded HTTP server answering /weather and /forecast with canned data.
+
+    ``fail_first`` requests get a 503, ``delay`` seconds are slept before
+    every response, and ``weather`` overrides the current observation.
+    """
+
+    def __init__(self, weather=None, fail_first=0, delay=0.0):
+        self.weather = weather or {"temp": 25.0, "rain": 0.0, "wind": 5.0}
+        self.fail_first = fail_first
+        self.delay = delay
+        self.requests = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def current_payload(self):
+        return {
+            "main": {"temp": self.weather["temp"], "humidity": 70, "pressure": 1013},
+            "wind": {"speed": self.weather["wind"]},
+            "rain": {"1h": self.weather["rain"]},
+        }
+
+    def forecast_payload(self):
+        now = int(time.time())
+        return {
+            "list": [
+                {
+                    "dt": now + i * 10800,
+                    "main": {"temp": self.weather["temp"]},
+                    "wind": {"speed": self.weather["wind"]},
+                    "rain": {"3h": self.weather["rain"]},
+                    "pop": 0.5,
+                }
+                for i in range(40)
+            ]
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    stub.concurrent += 1
+                    stub.max_concurrent = max(stub.max_concurrent, stub.concurrent)
+                    failing = stub.requests <= stub.fail_first
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    path = urlparse(self.path).path
+                    if failing:
+                        self._send(503, {"message": "unavailable"})
+                    elif path.endswith("/weather"):
+                        self._send(200, stub.current_payload())
+                    elif path.endswith("/forecast"):
+                        self._send(200, stub.forecast_payload())
+                    else:
+                        self._send(404, {"message": "not found"})
+                finally:
+                    with stub._lock:
+                        stub.concurrent -= 1
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StubWebhookReceiver:
+    """Threaded HTTP server that records the alert batches POSTed to it.
+
+    ``fail_first`` requests get a 503, ``status`` overrides the status of
+    every later response and ``delay`` seconds are slept before each reply.
+    """
+
+    def __init__(self, fail_first=0, status=200, delay=0.0):
+        self.fail_first = fail_first
+        self.status = status
+        self.delay = delay
+        self.requests = 0
+        self.batches = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/alerts"
+
+    @property
+    def alerts(self):
+        return [alert for batch in self.batches for alert in batch]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests += 1
+                    status = 503 if stub.requests <= stub.fail_first else stub.status
+                    if status < 300:
+                        stub.batches.append(body["alerts"])
+                if stub.delay:
+                    time.sleep(stub.delay)
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
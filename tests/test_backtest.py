@@ -0,0 +1,83 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from backend.models.schemas import ParametricTrigger, TriggerType
+from backend.services.backtest import Backtester, Series, load_series, replay
+from backend.services.risk_engine import OPERATORS
+from backend.services.trigger_state import OPENED, TriggerStateEngine
+
+T0 = datetime(2020, 1, 1)
+
+def scalar_opens(times, values, threshold, operator, duration_hours, hysteresis, max_gap):
+    """Sample indices at which TriggerStateEngine opens an alert"""
+    engine = TriggerStateEngine(hysteresis_ratio=hysteresis, max_gap_seconds=max_gap)
+    trigger = ParametricTrigger(
+        id="t", location_id="l", trigger_type=TriggerType.RAINFALL, threshold_value=threshold,
+        threshold_operator=operator, duration_hours=duration_hours
+    )
+    compare = OPERATORS[operator]
+    return [
+        i for i, (t, v) in enumerate(zip(times, values))
+        if engine.observe(trigger, compare(v, threshold), v, T0 + timedelta(seconds=int(t))) == OPENED
+    ]
+
+@pytest.mark.parametrize("operator", ["gt", "gte", "lt", "eq"])
+@pytest.mark.parametrize("duration_hours", [0, 1, 3])
+def test_replay_matches_trigger_state_engine(operator, duration_hours):
+    rng = random.Random(f"{operator}{duration_hours}")
+    # 30-minute samples with occasional multi-hour gaps; rounded values so "eq" fires too
+    steps = [rng.choice([1800] * 20 + [4 * 3600]) for _ in range(600)]
+    times = np.cumsum(steps).astype(np.int64)
+    values = np.round([max(0.0, 30 + 25 * np.sin(i / 9) + rng.gauss(0, 8)) for i in range(600)])
+    thresholds = np.arange(5.0, 70.0, 2.5)
+
+    opened = replay(times, values, thresholds, operator, duration_hours, hysteresis_ratio=0.1, max_gap_seconds=3 * 3600)
+    for k, threshold in enumerate(thresholds):
+        expected = scalar_opens(times, values, threshold, operator, duration_hours, 0.1, 3 * 3600)
+        assert np.flatnonzero(opened[k]).tolist() == expected, threshold
+
+def test_run_reports_frequency_and_annual_payouts():
+    # Hourly rainfall over two calendar years with storms of a given length
+    hours = 2 * 365 * 24
+    times = (np.arange(hours) * 3600 + int(T0.timestamp())).astype(np.int64)
+    rain = np.zeros(hours)
+    for start, length in ((100, 2), (500, 6), (9000, 6), (9500, 1)):
+        rain[start:start + length] = 80.0
+    series = [Series("a", times, {"rainfall": rain}), Series("b", times, {"rainfall": np.zeros(hours)})]
+
+    rows = Backtester(hysteresis_ratio=0.1, max_gap_seconds=3 * 3600).run(
+        series, TriggerType.RAINFALL, [50.0, 100.0], operator="gt", duration_hours=3, payout_amount=1000.0
+    )
+    assert rows[0]["events"] == 2  # Only the two 6-hour storms last 3 hours
+    assert rows[0]["events_per_year"] == 0.5  # Over four location-years
+    assert rows[0]["years_with_event"] == 0.5
+    assert rows[0]["payout_mean"] == 500.0
+    assert rows[0]["payout_max"] == 1000.0
+    assert rows[1]["events"] == 0
+
+    with pytest.raises(ValueError):
+        Backtester().run(series, TriggerType.FLOOD_RISK, [1.0])
+
+def test_multiprocess_matches_single_process():
+    rng = np.random.default_rng(3)
+    times = np.arange(5000, dtype=np.int64) * 3600
+    series = [Series(f"s{i}", times, {"wind_speed": rng.gamma(2.0, 6.0, 5000)}) for i in range(4)]
+    thresholds = np.linspace(10, 40, 61)
+    single = Backtester(workers=1).annual_events(series, TriggerType.WIND_SPEED, thresholds, "gt", 2)
+    multi = Backtester(workers=2).annual_events(series, TriggerType.WIND_SPEED, thresholds, "gt", 2)
+    assert single.sum() > 0
+    assert np.array_equal(single, multi)
+
+def test_load_series_from_csv(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text(
+        "location_id,timestamp,rainfall,wind_speed\n"
+        "b,2024-01-01T01:00:00,2.0,5.0\n"
+        "a,2024-01-01T01:00:00,1.0,4.0\n"
+        "a,2024-01-01T00:00:00,0.5,3.0\n"
+    )
+    series = {s.key: s for s in load_series(str(path))}
+    assert series["a"].times.tolist() == [1704067200, 1704070800]
+    assert series["a"].values["rainfall"].tolist() == [0.5, 1.0]
+    assert "temperature" not in series["b"].values
@@ -0,0 +1,137 @@
+import asyncio
+import dataclasses
+from datetime import datetime
+from backend.config import settings
+from backend.models.records import AlertRecord, LocationRecord, TriggerRecord
+from backend.models.schemas import RiskLevel, TriggerType
+from backend.routers import stream
+from backend.services.broadcaster import (
+    ALERT_OPENED, OVERFLOW, RISK_CHANGED, Broadcaster, Event
+)
+from backend.services.monitor import ParametricMonitor
+from backend.services.relay import EventRelay, LocalEventChannel, RelayBroadcaster
+from tests.stub_server import StubWeatherServer
+
+def risk_event(location_id, insurer_id, level, score=0.5):
+    return Event(RISK_CHANGED, f"risk:{location_id}", {"risk_score": score}, insurer_id, location_id, level)
+
+def test_publish_respects_subscriber_filters():
+    broadcaster = Broadcaster()
+    everyone = broadcaster.subscribe()
+    insurer = broadcaster.subscribe(insurer_id="INS-1")
+    location = broadcaster.subscribe(location_id="b")
+    severe = broadcaster.subscribe(insurer_id="INS-1", min_risk_level=RiskLevel.HIGH)
+
+    broadcaster.publish(risk_event("a", "INS-1", RiskLevel.MEDIUM))
+    broadcaster.publish(risk_event("b", "INS-2", RiskLevel.CRITICAL))
+
+    assert list(everyone.pending) == ["risk:a", "risk:b"]
+    assert list(insurer.pending) == ["risk:a"]
+    assert list(location.pending) == ["risk:b"]
+    assert list(severe.pending) == []
+    assert broadcaster.wants("b", None) and len(broadcaster) == 4
+
+    broadcaster.unsubscribe(location)
+    broadcaster.unsubscribe(everyone)
+    assert not broadcaster.wants("b", "INS-2")
+
+def test_slow_subscribers_coalesce_and_report_overflow():
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe(max_pending=2)
+    for score in (0.2, 0.4, 0.6):
+        broadcaster.publish(risk_event("a", "INS-1", RiskLevel.LOW, score))
+    broadcaster.publish(risk_event("b", "INS-1", RiskLevel.LOW))
+    broadcaster.publish(risk_event("c", "INS-1", RiskLevel.LOW))
+
+    events = asyncio.run(subscription.next_batch(0))
+    assert [e.kind for e in events] == [OVERFLOW, RISK_CHANGED, RISK_CHANGED]
+    assert events[0].data == {"dropped": 1}
+    assert [e.key for e in events[1:]] == ["risk:b", "risk:c"]
+    assert asyncio.run(subscription.next_batch(0.01)) == []
+
+def test_event_stream_frames():
+    broadcaster = Broadcaster()
+    alert = AlertRecord(
+        id="x", location_id="a", trigger_id="t", risk_level=RiskLevel.HIGH, message="m",
+        current_value=1.0, threshold_value=1.0, triggered_at=datetime(2024, 1, 1)
+    )
+
+    async def run():
+        # A stream closed before its first frame never subscribes
+        await stream.event_stream(broadcaster).aclose()
+        assert len(broadcaster) == 0
+        frames = stream.event_stream(broadcaster, insurer_id="INS-1", heartbeat=0.01)
+        connected = await frames.__anext__()
+        assert len(broadcaster) == 1
+        keepalive = await frames.__anext__()
+        broadcaster.publish(Event.for_alert(alert, "INS-1"))
+        event = await frames.__anext__()
+        await frames.aclose()
+        return connected, keepalive, event
+
+    connected, keepalive, event = asyncio.run(run())
+    assert connected.startswith(":") and keepalive.startswith(":")
+    assert event.startswith(f"event: {ALERT_OPENED}\ndata: ") and '"id": "x"' in event
+    assert len(broadcaster) == 0
+
+def test_worker_events_are_relayed_to_api_subscribers():
+    alert = AlertRecord(
+        id="x", location_id="a", trigger_id="t", risk_level=RiskLevel.HIGH, message="m",
+        current_value=1.0, threshold_value=1.0, triggered_at=datetime(2024, 1, 1)
+    )
+
+    async def run():
+        channel = LocalEventChannel()
+        api = Broadcaster()
+        relay = EventRelay(channel, api)
+        worker = RelayBroadcaster(channel)
+        subscription = api.subscribe(insurer_id="INS-1")
+        relay.start()
+        worker.start()
+        await asyncio.sleep(0)
+        # Nobody is subscribed on the worker's side, but it relays regardless
+        assert worker.wants("a", "INS-1")
+        worker.publish(Event.for_alert(alert, "INS-1"))
+        worker.publish(Event.for_alert(dataclasses.replace(alert, id="y"), "INS-2"))
+        events = await subscription.next_batch(1)
+        await worker.stop()
+        await relay.stop()
+        return events
+
+    events = asyncio.run(run())
+    assert [(e.kind, e.insurer_id, e.risk_level) for e in events] == [(ALERT_OPENED, "INS-1", RiskLevel.HIGH)]
+    assert events[0].data["id"] == "x"
+
+def make_monitor(database, broadcaster):
+    monitor = ParametricMonitor(database=database, broadcaster=broadcaster)
+    for loc_id, insurer in (("a", "INS-1"), ("b", "INS-2")):
+        monitor.locations[loc_id] = LocationRecord(id=loc_id, latitude=6.5, longitude=3.4, insurer_id=insurer)
+        monitor.triggers.add(TriggerRecord(
+            id=f"t-{loc_id}", location_id=loc_id, trigger_type=TriggerType.RAINFALL,
+            threshold_value=25.0, threshold_operator="gt", duration_hours=0
+        ))
+    return monitor
+
+def test_monitor_pushes_alerts_and_risk_changes(monkeypatch, database):
+    broadcaster = Broadcaster()
+    watching = broadcaster.subscribe(insurer_id="INS-1")
+
+    async def run(monitor):
+        try:
+            await monitor._check_all_locations()
+            first = await watching.next_batch(0)
+            await monitor._check_all_locations()
+            return first, await watching.next_batch(0)
+        finally:
+            await monitor.weather_service.aclose()
+
+    with StubWeatherServer(weather={"temp": 25.0, "rain": 40.0, "wind": 5.0}) as server:
+        monkeypatch.setattr(settings, "weather_api_base_url", server.base_url)
+        first, second = asyncio.run(run(make_monitor(database, broadcaster)))
+
+    assert sorted(e.kind for e in first) == [ALERT_OPENED, RISK_CHANGED]
+    assert all(e.location_id == "a" for e in first)
+    risk = next(e for e in first if e.kind == RISK_CHANGED)
+    assert risk.data["risk_score"] == 0.5  # 40mm rain (+0.2) within 70% of the 25mm trigger (+0.3)
+    # Unchanged risk and an already-open alert push nothing
+    assert second == []
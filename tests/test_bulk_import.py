@@ -0,0 +1,85 @@
+import asyncio
+import json
+from backend.models.schemas import Location, ParametricTrigger
+import pytest
+from backend.services.bulk_import import CSV, NDJSON, BulkImportError, import_stream, iter_records, prepare_location
+from backend.services.repository import LocationRepository, TriggerRepository
+
+async def byte_chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def test_ndjson_import_reports_per_row_errors(database):
+    repository = LocationRepository(database)
+    rows = [
+        {"name": "a", "latitude": 6.5, "longitude": 3.4, "insurer_id": "INS-1"},
+        {"name": "b", "latitude": 123.0, "longitude": 3.4, "insurer_id": "INS-1"},
+        {"name": "c", "latitude": 6.6, "longitude": 3.5, "insurer_id": "INS-2", "policy_ids": ["P1"]},
+    ]
+    body = ("\n".join(json.dumps(r) for r in rows) + "\n{not json}\n").encode()
+
+    async def run():
+        result = await import_stream(byte_chunks(body), NDJSON, Location, repository.bulk_upsert, chunk_size=1)
+        return result, await repository.list()
+
+    result, stored = asyncio.run(run())
+    assert (result["total"], result["inserted"], result["failed"]) == (4, 2, 2)
+    assert [e["row"] for e in result["errors"]] == [2, 4]
+    assert "latitude" in result["errors"][0]["error"]
+    assert sorted(loc.name for loc in stored) == ["a", "c"]
+
+def test_csv_import_applies_defaults_and_truncates_errors(database):
+    repository = TriggerRepository(database)
+    body = (
+        "id,location_id,trigger_type,threshold_value,threshold_operator,payout_amount\n"
+        "t1,loc-1,rainfall,50,gt,1000\n"
+        "t2,loc-1,wind_speed,20,gte,\n"
+        "t3,loc-1,hail,20,gte,\n"
+        "t4,loc-1,rainfall,oops,gt,\n"
+        "t1,loc-1,rainfall,60,gt,1000\n"
+    ).encode()
+
+    async def run():
+        result = await import_stream(byte_chunks(body), CSV, ParametricTrigger, repository.bulk_upsert, max_errors=1)
+        return result, await repository.list_for_location("loc-1")
+
+    result, stored = asyncio.run(run())
+    assert (result["total"], result["failed"]) == (5, 2)
+    assert result["errors_truncated"] is True and len(result["errors"]) == 1
+    by_id = {t.id: t for t in stored}
+    assert set(by_id) == {"t1", "t2"}
+    assert by_id["t1"].threshold_value == 60.0
+    assert by_id["t2"].payout_amount is None and by_id["t2"].duration_hours == 1
+
+def test_overlong_lines_fail_alone_and_bad_headers_fail_the_upload():
+    async def records(body, fmt):
+        return [record async for record in iter_records(byte_chunks(body, size=4), fmt, max_line=16)]
+
+    body = b'{"a": 1}\n{"b": "' + b"x" * 100 + b'"}\n{"c": 3}'
+    rows = asyncio.run(records(body, NDJSON))
+    assert [row for row, _ in rows] == [1, 2, 3]
+    assert rows[0][1] == {"a": 1} and rows[2][1] == {"c": 3}
+    assert "longer than 16 bytes" in str(rows[1][1])
+
+    with pytest.raises(BulkImportError):
+        asyncio.run(records(b"id,na\xffme\nt1,x\n", CSV))
+
+def test_deeply_nested_rows_fail_alone(database):
+    repository = LocationRepository(database)
+    row = {"name": "a", "latitude": 6.5, "longitude": 3.4, "insurer_id": "INS-1"}
+    nested = {**row, "policy_ids": "[" * 5000 + "]" * 5000}
+    body = "\n".join([
+        "[" * 30000 + "]" * 30000,
+        json.dumps(row),
+        json.dumps(nested).replace('"[', "[").replace(']"', "]"),
+    ]).encode()
+
+    async def run():
+        return await import_stream(byte_chunks(body), NDJSON, Location, repository.bulk_upsert)
+
+    result = asyncio.run(run())
+    assert (result["total"], result["inserted"], result["failed"]) == (3, 1, 2)
+    assert [e["row"] for e in result["errors"]] == [1, 3]
+
+def test_prepare_location_splits_policy_ids():
+    assert prepare_location({"policy_ids": "P1;P2;"})["policy_ids"] == ["P1", "P2"]
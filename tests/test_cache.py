@@ -0,0 +1,82 @@
+import asyncio
+import time
+from backend.config import settings
+from backend.services.cache import (
+    CachedWeatherService, LocalSharedCache, LRUCache, TieredCache, _MISSING
+)
+from tests.stub_server import StubWeatherServer
+
+def test_lru_evicts_least_recently_used_and_expires():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is _MISSING
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is _MISSING
+    assert cache.expirations == 1
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TieredCache(max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def burst():
+        return await asyncio.gather(*(
+            cache.get_or_fetch("k", fetch, 60, str, str) for _ in range(20)
+        ))
+
+    assert asyncio.run(burst()) == ["value"] * 20
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 19
+
+def test_cancelled_leader_does_not_cancel_followers():
+    cache = TieredCache(max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_fetch("k", fetch, 60, str, str))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("k", fetch, 60, str, str))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(run()) == ("value", True)
+    assert len(calls) == 2
+
+def test_cached_weather_service_uses_shared_tier(monkeypatch):
+    with StubWeatherServer() as server:
+        monkeypatch.setattr(settings, "weather_api_base_url", server.base_url)
+        shared = LocalSharedCache()
+        first = CachedWeatherService(cache=TieredCache(shared=shared))
+        second = CachedWeatherService(cache=TieredCache(shared=shared))
+
+        async def fetch():
+            a = await first.get_forecast(6.5, 3.4, "loc-a")
+            b = await first.get_forecast(6.5, 3.4, "loc-b")
+            c = await second.get_forecast(6.5, 3.4, "loc-c")
+            await first.aclose()
+            await second.aclose()
+            return a, b, c
+
+        a, b, c = asyncio.run(fetch())
+
+    assert server.requests == 1
+    assert {a[0].location_id, b[0].location_id, c[0].location_id} == {"loc-a", "loc-b", "loc-c"}
+    assert first.cache.stats()["hits"] == 1
+    assert second.cache.stats()["shared_hits"] == 1
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from backend.config import settings
+from backend.models.records import LocationRecord, TriggerRecord
+from backend.models.schemas import TriggerType
+from backend.services.cadence import CadenceScheduler
+from backend.services.monitor import ParametricMonitor
+from backend.services.scheduler import FetchScheduler
+from tests.stub_server import StubWeatherServer
+
+def test_cells_poll_on_their_own_interval():
+    cadence = CadenceScheduler(min_interval=10, max_interval=1000, budget_per_minute=0)
+    cadence.track(["calm", "hot"], now=0)
+    assert sorted(cadence.pop_due(now=0)) == ["calm", "hot"]
+    cadence.observe("calm", 0.0, now=1)
+    cadence.observe("hot", 1.0, now=1)
+    assert cadence.interval_for(0.5) == pytest.approx(100)
+
+    polls = {"calm": 0, "hot": 0}
+    for now in range(2, 1000):
+        for cell in cadence.pop_due(now=now):
+            polls[cell] += 1
+            cadence.observe(cell, cadence.cells[cell].urgency, now=now)
+    assert polls == {"calm": 0, "hot": 99}
+    assert cadence.wake_at(now=1000) == 1001
+
+    # Dropped cells stop coming due, even with stale heap entries left behind
+    cadence.track(["calm"], now=1000)
+    assert cadence.pop_due(now=5000) == ["calm"]
+    assert cadence.describe("hot") is None
+
+def test_budget_serves_most_overdue_first():
+    cadence = CadenceScheduler(min_interval=10, max_interval=100, budget_per_minute=6)
+    cadence.track([f"c{i}" for i in range(8)], now=0)
+    for cell in cadence.cells:
+        cadence.observe(cell, 1.0, now=int(cell[1:]))  # Due at 10..17
+
+    first = cadence.pop_due(now=20)
+    assert first == ["c0", "c1", "c2", "c3", "c4", "c5"]
+    assert cadence.pop_due(now=20) == []
+    assert cadence.wake_at(now=20) == pytest.approx(30)  # One poll per 10s of budget
+    assert cadence.pop_due(now=30) == ["c6"]
+    assert cadence.cells["c6"].lag == 14
+    assert cadence.stats(now=30)["budget_waits"] == 3  # c7 is still waiting
+
+def test_budget_stretches_calm_cells_first():
+    cadence = CadenceScheduler(min_interval=60, max_interval=600, budget_per_minute=15)
+    cadence.track([f"c{i}" for i in range(100)], now=0)
+    for i in range(100):
+        cadence.observe(f"c{i}", 1.0 if i < 10 else 0.0, now=0)
+    cadence.track(cadence.cells, now=0)  # Refits the budget, as each re-plan does
+
+    assert cadence.interval_for(1.0) == pytest.approx(60)
+    assert cadence.interval_for(0.0) == pytest.approx(90 * 60 / 5)  # 90 calm cells share the 5/min left
+    cadence.track([f"c{i}" for i in range(40)], now=0)
+    assert cadence.interval_for(0.0) == pytest.approx(600)  # Fits again
+
+def make_monitor(database, cadence):
+    monitor = ParametricMonitor(
+        scheduler=FetchScheduler(max_in_flight=4, rate_limit=0), database=database, cadence=cadence
+    )
+    # Stub rain is 20: "near" sits at 80% of its threshold, "far" at 10%, "wet" past it
+    for name, threshold in (("near", 25.0), ("far", 200.0), ("wet", 10.0)):
+        monitor.locations[name] = LocationRecord(
+            id=name, latitude={"near": 6.5, "far": 7.5, "wet": 8.5}[name], longitude=3.4, insurer_id="INS-1"
+        )
+        monitor.triggers.add(TriggerRecord(
+            id=f"t-{name}", location_id=name, trigger_type=TriggerType.RAINFALL,
+            threshold_value=threshold, threshold_operator="gt", duration_hours=6
+        ))
+    return monitor
+
+def test_monitor_polls_cells_near_thresholds_more_often(monkeypatch, database):
+    async def run(monitor):
+        monitor.running = True
+        task = asyncio.create_task(monitor._adaptive_loop())
+        await asyncio.sleep(1.5)
+        monitor.running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await monitor.weather_service.aclose()
+
+    monkeypatch.setattr("backend.services.monitor.POLL_TICK_SECONDS", 0.01)
+    with StubWeatherServer(weather={"temp": 25.0, "rain": 20.0, "wind": 5.0}) as stub:
+        monkeypatch.setattr(settings, "weather_api_base_url", stub.base_url)
+        monitor = make_monitor(database, CadenceScheduler(min_interval=0.05, max_interval=5, budget_per_minute=0))
+        asyncio.run(run(monitor))
+
+    cadence = {row["location_id"]: row for row in monitor.location_cadence()}
+    assert list(cadence) == ["wet", "near", "far"]
+    assert cadence["wet"]["urgency"] == 1.0  # Sustained run in progress
+    assert cadence["far"]["urgency"] == 0.0
+    assert 0.0 < cadence["near"]["urgency"] < 1.0
+    assert cadence["far"]["polls"] == 1
+    assert cadence["wet"]["polls"] > cadence["near"]["polls"] > 1
+    assert monitor.location_cadence("near", 10) == [cadence["near"]]
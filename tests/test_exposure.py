@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from backend.models.schemas import ForecastData, Location, ParametricTrigger, TriggerType
+from backend.services.exposure import ExposureEngine
+
+def forecast(rain, wind, pop):
+    start = datetime(2024, 1, 1)
+    return [
+        ForecastData(
+            location_id="cell", forecast_time=start + timedelta(hours=3 * i), temperature=25.0,
+            rainfall_probability=p, rainfall_amount=r, wind_speed=w, risk_score=0.0
+        )
+        for i, (r, w, p) in enumerate(zip(rain, wind, pop))
+    ]
+
+def trigger(trigger_id, location_id, trigger_type, threshold, payout, duration=1):
+    return ParametricTrigger(
+        id=trigger_id, location_id=location_id, trigger_type=trigger_type, threshold_value=threshold,
+        threshold_operator="gt", duration_hours=duration, payout_amount=payout
+    )
+
+@pytest.fixture
+def engine(database):
+    engine = ExposureEngine(database=database, horizon_hours=12)
+
+    async def seed():
+        await engine.location_repository.bulk_upsert([
+            Location(id="a", latitude=6.5, longitude=3.4, name="a", insurer_id="INS-1"),
+            Location(id="b", latitude=6.5, longitude=3.4, name="b", insurer_id="INS-2"),
+        ])
+        await engine.trigger_repository.bulk_upsert([
+            trigger("rain", "a", TriggerType.RAINFALL, 30.0, 1000.0),
+            # Needs two consecutive windy slots; only one is forecast
+            trigger("wind", "a", TriggerType.WIND_SPEED, 15.0, 500.0, duration=6),
+            trigger("flood", "b", TriggerType.FLOOD_RISK, 1.0, 200.0),
+        ])
+        await engine.sync()
+
+    asyncio.run(seed())
+    return engine
+
+def test_expected_and_worst_case_by_group(engine):
+    cell = engine._cell_of["a"]
+    engine.update_forecast(cell, forecast(rain=[40, 10, 40, 40], wind=[5, 20, 5, 5], pop=[50, 90, 50, 0]))
+    engine.recompute()
+
+    groups = {g["trigger_type"]: g for g in engine.totals()}
+    # Two rainy slots at 50% (the third has no chance of rain): 1 - 0.5 * 0.5
+    assert groups["rainfall"]["expected"] == pytest.approx(750.0)
+    assert groups["rainfall"]["worst_case"] == 1000.0
+    assert groups["wind_speed"]["worst_case"] == 0.0
+    assert groups["flood_risk"] == {
+        "insurer_id": "INS-2", "region": cell[:3], "trigger_type": "flood_risk",
+        "triggers": 1, "limit": 200.0, "expected": 0.0, "worst_case": 0.0
+    }
+    assert engine.totals(["insurer_id"], insurer_id="INS-1") == [
+        {"insurer_id": "INS-1", "triggers": 2, "limit": 1500.0, "expected": pytest.approx(750.0), "worst_case": 1000.0}
+    ]
+
+def test_updates_only_recompute_what_changed(engine):
+    cell = engine._cell_of["a"]
+    engine.update_forecast(cell, forecast(rain=[40] * 4, wind=[20] * 4, pop=[100] * 4))
+    assert engine.recompute() == 3
+
+    assert not engine.update_forecast(cell, forecast(rain=[40] * 4, wind=[20] * 4, pop=[100] * 4))
+    assert engine.recompute() == 0
+
+    async def deactivate():
+        await engine.trigger_repository.toggle("rain")
+        await engine.sync()
+
+    asyncio.run(deactivate())
+    assert engine.recompute() == 2  # Overlapping sync re-reads the other two; "rain" drops out
+    totals = {g["trigger_type"]: g for g in engine.totals(["trigger_type"])}
+    assert "rainfall" not in totals
+    assert totals["wind_speed"]["worst_case"] == 500.0
+
+def test_background_refresh_runs_only_in_the_shard_zero_owner(database):
+    async def refreshes(owned):
+        engine = ExposureEngine(database=database, coordinator=SimpleNamespace(owned=owned))
+        calls = []
+
+        async def refresh(force=False):
+            calls.append(force)
+
+        engine.refresh = refresh
+        engine.start(interval=0.01)
+        await asyncio.sleep(0.05)
+        await engine.stop()
+        return calls
+
+    assert asyncio.run(refreshes(set())) == []
+    assert asyncio.run(refreshes({0})) and all(asyncio.run(refreshes({0, 3})))
@@ -0,0 +1,111 @@
+import asyncio
+import math
+import random
+import pytest
+from geopy.distance import great_circle
+from backend.models.records import LocationRecord
+from backend.models.schemas import Location
+from backend.services.location_index import LocationIndex
+
+def scatter(n, seed=0):
+    rng = random.Random(seed)
+    records = [LocationRecord(f"u-{i}", rng.uniform(-89, 89), rng.uniform(-180, 180), f"INS-{i % 3}") for i in range(n)]
+    # A dense cluster forces deep splits
+    records += [
+        LocationRecord(f"c-{i}", 6.5 + rng.gauss(0, 0.05), 3.4 + rng.gauss(0, 0.05), f"INS-{i % 3}")
+        for i in range(n)
+    ]
+    return records
+
+@pytest.fixture
+def indexed():
+    records = scatter(3000)
+    index = LocationIndex(leaf_size=16)
+    index.add_many(records[:3000])
+    for record in records[3000:]:
+        index.add(record)
+    return index, records
+
+def ids(rows):
+    return {row["id"] for row in rows}
+
+def test_bbox_matches_full_scan(indexed):
+    index, records = indexed
+    assert len(index) == len(records)
+    for min_lat, min_lon, max_lat, max_lon in [(6.4, 3.3, 6.55, 3.5), (-30, -60, 40, 20), (-10, 170, 50, -170)]:
+        def inside(r):
+            in_lon = min_lon <= r.longitude <= max_lon if min_lon <= max_lon else r.longitude >= min_lon or r.longitude <= max_lon
+            return min_lat <= r.latitude <= max_lat and in_lon and r.insurer_id == "INS-1"
+        expected = {r.id for r in records if inside(r)}
+        count, rows = index.bbox(min_lat, min_lon, max_lat, max_lon, insurer_id="INS-1")
+        assert count == len(expected) and ids(rows) == expected
+    count, rows = index.bbox(6.4, 3.3, 6.55, 3.5, limit=5)
+    assert count > 5 and len(rows) == 5
+
+def test_radius_is_nearest_first_with_distances(indexed):
+    index, records = indexed
+    for (lat, lon), radius_km in [((6.5, 3.4), 3.0), ((0.0, 179.9), 800.0), ((88.5, 0.0), 400.0)]:
+        distances = {r.id: great_circle((lat, lon), (r.latitude, r.longitude)).km for r in records}
+        expected = {location_id for location_id, d in distances.items() if d <= radius_km}
+        count, rows = index.radius(lat, lon, radius_km)
+        assert count == len(expected) and ids(rows) == expected
+        assert [row["distance_km"] for row in rows] == sorted(row["distance_km"] for row in rows)
+        assert all(row["distance_km"] == pytest.approx(distances[row["id"]], abs=1e-6) for row in rows)
+    count, rows = index.radius(6.5, 3.4, 3.0, limit=10)
+    nearest = sorted(records, key=lambda r: great_circle((6.5, 3.4), (r.latitude, r.longitude)).km)[:10]
+    assert count > 10 and [row["id"] for row in rows] == [r.id for r in nearest]
+
+def test_polygon_excludes_holes_and_unions_parts(indexed):
+    index, records = indexed
+    outer = [[3.4 + 0.1 * math.cos(a), 6.5 + 0.1 * math.sin(a)] for a in (i * math.pi / 8 for i in range(16))]
+    hole = [[3.38, 6.48], [3.42, 6.48], [3.42, 6.52], [3.38, 6.52]]
+    far = [[-60, -30], [-10, -30], [-10, 40], [-60, 40], [-60, -30]]
+
+    def in_ring(ring, x, y):
+        inside = False
+        for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+            if (y1 > y) != (y0 > y) and x < (x0 - x1) * (y - y1) / (y0 - y1) + x1:
+                inside = not inside
+        return inside
+
+    expected = {
+        r.id for r in records
+        if (in_ring(outer, r.longitude, r.latitude) and not in_ring(hole, r.longitude, r.latitude))
+        or in_ring(far, r.longitude, r.latitude)
+    }
+    count, rows = index.polygon([[outer, hole], [far]])
+    assert count == len(expected) and ids(rows) == expected
+    assert not any(3.38 < row["longitude"] < 3.42 and 6.48 < row["latitude"] < 6.52 for row in rows)
+    with pytest.raises(ValueError):
+        index.polygon([[[[0, 0], [1, 1]]]])
+
+def test_moves_and_removals_update_the_index():
+    index = LocationIndex(leaf_size=4)
+    index.add_many([LocationRecord(f"l-{i}", 10.0 + i * 0.01, 10.0, "INS-1") for i in range(20)])
+    index.add(LocationRecord("l-0", -10.0, -10.0, "INS-2"))
+    assert index.bbox(9.9, 9.9, 10.3, 10.1)[0] == 19
+    assert index.bbox(-11, -11, -9, -9, insurer_id="INS-2")[1] == [
+        {"id": "l-0", "latitude": -10.0, "longitude": -10.0, "insurer_id": "INS-2"}
+    ]
+    assert index.remove("l-1") and not index.remove("l-1")
+    index.add(LocationRecord("l-20", 10.01, 10.0, "INS-1"))
+    assert len(index) == 20 and ids(index.bbox(10.005, 9.9, 10.015, 10.1)[1]) == {"l-20"}
+
+def test_refresh_picks_up_repository_writes(database):
+    index = LocationIndex(database=database)
+
+    async def run():
+        await index.location_repository.bulk_upsert([
+            Location(id="a", latitude=6.5, longitude=3.4, name="a", insurer_id="INS-1"),
+            Location(id="b", latitude=-1.29, longitude=36.82, name="b", insurer_id="INS-1"),
+        ])
+        await index.refresh()
+        await index.location_repository.bulk_upsert([Location(id="a", latitude=6.6, longitude=3.4, name="a", insurer_id="INS-1")])
+        await index.refresh()  # Throttled: the move isn't seen yet
+        first = index.radius(6.5, 3.4, 1.0)[0]
+        await index.refresh(force=True)
+        return first, index.radius(6.5, 3.4, 1.0)[0], index.radius(6.6, 3.4, 1.0)[0]
+
+    assert len(index) == 0
+    assert asyncio.run(run()) == (1, 0, 1)
+    assert len(index) == 2
@@ -0,0 +1,113 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from backend.config import settings
+from backend.models.records import LocationRecord, TriggerRecord
+from backend.models.schemas import TriggerType
+from backend.services import metrics
+from backend.services.monitor import ParametricMonitor
+from backend.services.scheduler import FetchScheduler
+from tests.stub_server import StubWeatherServer
+
+def count(histogram, *labels):
+    return sum(histogram.labels(*labels).counts)
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.Registry()
+    latency = registry.histogram("fetch_seconds", "Fetches", ("outcome",), buckets=(0.1, 1.0))
+    latency.labels("ok").observe(0.05)
+    latency.labels("ok").observe(0.5)
+    latency.labels("ok").observe(5.0)
+    registry.counter("retries", "Retries").inc(3)
+    registry.add_collector(lambda: [("queue_depth", "gauge", "Queued", {"queue": 'a"b'}, 7)])
+
+    text = registry.render()
+    assert 'fetch_seconds_bucket{outcome="ok",le="0.1"} 1\n' in text
+    assert 'fetch_seconds_bucket{outcome="ok",le="1"} 2\n' in text
+    assert 'fetch_seconds_bucket{outcome="ok",le="+Inf"} 3\n' in text
+    assert 'fetch_seconds_count{outcome="ok"} 3\n' in text
+    assert "# TYPE retries counter\nretries_total 3\n" in text
+    assert '# TYPE queue_depth gauge\nqueue_depth{queue="a\\"b"} 7\n' in text
+    with pytest.raises(ValueError):
+        registry.counter("retries", "Again")
+
+def test_monitor_pass_records_timings_and_profile(monkeypatch, database, tmp_path):
+    server = StubWeatherServer(weather={"temp": 25.0, "rain": 40.0, "wind": 5.0}).start()
+    monkeypatch.setattr(settings, "weather_api_base_url", server.base_url)
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    monitor = ParametricMonitor(scheduler=FetchScheduler(max_in_flight=2, rate_limit=0), database=database)
+    for i in range(4):
+        monitor.locations[f"loc-{i}"] = LocationRecord(f"loc-{i}", 6.5 + i * 0.01, 3.4, "INS-1")
+        monitor.triggers.add(TriggerRecord(f"t-{i}", f"loc-{i}", TriggerType.RAINFALL, 25.0, "gt", duration_hours=0))
+    before = (
+        count(metrics.UPSTREAM_FETCH_SECONDS, "ok"), count(metrics.EVALUATE_SECONDS),
+        count(metrics.ALERT_WRITE_SECONDS), metrics.ALERTS.labels("opened").value
+    )
+
+    async def run():
+        monitor.request_profile()
+        try:
+            with monitor._profiled():
+                await monitor._check_all_locations()
+        finally:
+            await monitor.weather_service.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.stop()
+
+    assert count(metrics.UPSTREAM_FETCH_SECONDS, "ok") - before[0] == 4
+    assert count(metrics.EVALUATE_SECONDS) - before[1] == 4
+    assert count(metrics.ALERT_WRITE_SECONDS) - before[2] == 4
+    assert metrics.ALERTS.labels("opened").value - before[3] == 4
+
+    profile = monitor.last_profile
+    assert profile["samples"] > 0 and not monitor._profile_requested
+    with open(profile["path"]) as f:
+        lines = f.read().splitlines()
+    # Folded stacks: frames root-first, separated by ';', then a sample count
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profile["samples"]
+    assert any("run_until_complete (asyncio/base_events.py:" in line for line in lines)
+
+def test_middleware_times_requests_by_route_template():
+    router = APIRouter()
+
+    @router.get("/{item_id}/parts/{part}")
+    async def part(item_id: str, part: int):
+        return {"id": item_id, "part": part}
+
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(router, prefix="/items")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            # "art" also occurs inside the literal "parts" segment
+            for path in ("/items/1/parts/1", "/items/2/parts/7", "/items/art/parts/3", "/missing"):
+                await client.get(path)
+
+    before = count(metrics.HTTP_REQUEST_SECONDS, "GET", "/items/{item_id}/parts/{part}", "200")
+    missing = count(metrics.HTTP_REQUEST_SECONDS, "GET", "unmatched", "404")
+    asyncio.run(run())
+    assert count(metrics.HTTP_REQUEST_SECONDS, "GET", "/items/{item_id}/parts/{part}", "200") - before == 3
+    assert count(metrics.HTTP_REQUEST_SECONDS, "GET", "unmatched", "404") - missing == 1
+    rendered = metrics.registry.render()
+    assert 'route="/items/{item_id}/parts/{part}"' in rendered and "/p{item_id}" not in rendered
+
+def test_middleware_leaves_out_untimed_routes():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware, untimed={"/stream/"})
+
+    @app.get("/stream/")
+    async def stream():
+        return {}
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/stream/")
+
+    before = count(metrics.HTTP_REQUEST_SECONDS, "GET", "/stream/", "200")
+    asyncio.run(run())
+    assert count(metrics.HTTP_REQUEST_SECONDS, "GET", "/stream/", "200") == before
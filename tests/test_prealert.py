@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from backend.models.schemas import ForecastData, Location, ParametricTrigger, RiskLevel, TriggerType
+from backend.services.broadcaster import Broadcaster, EARLY_WARNING, EARLY_WARNING_CLEARED
+from backend.services.exposure import ExposureEngine
+from backend.services.prealert import PreAlerter
+
+START = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+def forecast(rain, wind):
+    return [
+        ForecastData(
+            location_id="cell", forecast_time=START + timedelta(hours=3 * i), temperature=25.0,
+            rainfall_probability=80.0, rainfall_amount=r, wind_speed=w, risk_score=0.0
+        )
+        for i, (r, w) in enumerate(zip(rain, wind))
+    ]
+
+def trigger(trigger_id, location_id, trigger_type, threshold, duration=1):
+    return ParametricTrigger(
+        id=trigger_id, location_id=location_id, trigger_type=trigger_type, threshold_value=threshold,
+        threshold_operator="gt", duration_hours=duration, payout_amount=1000.0
+    )
+
+@pytest.fixture
+def pipeline(database, monkeypatch):
+    broadcaster = Broadcaster()
+    prealerter = PreAlerter(broadcaster=broadcaster)
+    engine = ExposureEngine(database=database, horizon_hours=12, stages=[prealerter.update])
+    forecasts = {}
+
+    async def fetch_forecasts():
+        for location_id, cell in engine._cell_of.items():
+            if location_id in forecasts:
+                engine.update_forecast(cell, forecasts[location_id])
+
+    monkeypatch.setattr(engine, "fetch_forecasts", fetch_forecasts)
+
+    async def seed():
+        await engine.location_repository.bulk_upsert([
+            Location(id="a", latitude=6.5, longitude=3.4, name="a", insurer_id="INS-1"),
+            Location(id="b", latitude=-1.29, longitude=36.82, name="b", insurer_id="INS-2"),
+        ])
+        await engine.trigger_repository.bulk_upsert([
+            trigger("rain", "a", TriggerType.RAINFALL, 30.0),
+            trigger("wind", "a", TriggerType.WIND_SPEED, 10.0, duration=6),  # Two consecutive slots
+            trigger("storm", "b", TriggerType.RAINFALL, 20.0),
+        ])
+
+    asyncio.run(seed())
+    return engine, prealerter, broadcaster, forecasts
+
+def refresh(engine):
+    asyncio.run(engine.refresh(force=True))
+
+def test_warnings_are_ranked_by_lead_time_then_severity(pipeline):
+    engine, prealerter, _, forecasts = pipeline
+    forecasts["a"] = forecast(rain=[0, 40, 42, 0], wind=[12, 5, 12, 13])
+    forecasts["b"] = forecast(rain=[0, 36, 0, 0], wind=[0] * 4)
+    refresh(engine)
+
+    ranked = prealerter.ranked()
+    assert [w.trigger_id for w in ranked] == ["storm", "rain", "wind"]
+    storm, rain, wind = ranked
+    # Both start in the second slot; 36/20 is further past its threshold than 42/30
+    assert storm.starts_at == rain.starts_at == START + timedelta(hours=3)
+    assert storm.risk_level == RiskLevel.CRITICAL and rain.risk_level == RiskLevel.HIGH
+    assert (rain.peak_at, rain.peak_value, rain.severity) == (START + timedelta(hours=6), 42.0, pytest.approx(42 / 30))
+    assert rain.probability == pytest.approx(0.8)
+    # The wind only holds for two slots in a row at the end
+    assert wind.starts_at == START + timedelta(hours=9) and wind.lead_time_hours(START) == 9.0
+    assert [w.trigger_id for w in prealerter.ranked(insurer_id="INS-1", limit=1)] == ["rain"]
+    assert [w.trigger_id for w in prealerter.ranked(min_risk_level=RiskLevel.CRITICAL)] == ["storm"]
+
+    potential = [prealerter.potential_triggers("a", START + timedelta(hours=3 * i)) for i in range(4)]
+    assert potential == [[], ["rain"], ["rain"], ["wind"]]
+
+def test_only_changed_forecasts_are_rescanned(pipeline, monkeypatch):
+    engine, prealerter, broadcaster, forecasts = pipeline
+    subscription = broadcaster.subscribe(insurer_id="INS-1")
+    forecasts["a"] = forecast(rain=[40, 0, 0, 0], wind=[0] * 4)
+    forecasts["b"] = forecast(rain=[0] * 4, wind=[0] * 4)
+    refresh(engine)
+    events = asyncio.run(subscription.next_batch(0))
+    assert [(e.kind, e.data["trigger_id"]) for e in events] == [(EARLY_WARNING, "rain")]
+    assert events[0].data["lead_time_hours"] >= 0
+
+    scanned = []
+    update = prealerter.update
+    monkeypatch.setattr(engine, "stages", [lambda engine, dirty: scanned.append(set(dirty)) or update(engine, dirty)])
+    monkeypatch.setattr(engine, "sync", lambda: asyncio.sleep(0))  # No portfolio changes
+    refresh(engine)
+    assert scanned == [set()] and not subscription.pending
+
+    forecasts["a"] = forecast(rain=[0] * 4, wind=[0] * 4)
+    refresh(engine)
+    assert scanned[-1] == {"rain", "wind"}
+    events = asyncio.run(subscription.next_batch(0))
+    assert [(e.kind, e.data["trigger_id"]) for e in events] == [(EARLY_WARNING_CLEARED, "rain")]
+    assert prealerter.ranked(location_id="a") == [] and prealerter.potential_triggers("a", START) == []
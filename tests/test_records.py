@@ -0,0 +1,51 @@
+import asyncio
+import json
+from datetime import datetime
+from backend.models.records import AlertRecord, LocationRecord, Observation, TriggerRecord
+from backend.models.schemas import Alert, Location, ParametricTrigger, RiskLevel, TriggerType, WeatherData
+from backend.services.repository import LocationRepository, TriggerRepository
+from backend.services.risk_engine import RiskEngine
+
+def test_records_serialise_like_the_api_models():
+    weather = WeatherData(
+        location_id="cell", timestamp=datetime(2024, 1, 1, 12, 30, 15, 250), temperature=25.0,
+        rainfall=40.0, wind_speed=5.0, humidity=70.0, pressure=1013.0
+    )
+    observation = Observation.from_json(json.loads(weather.model_dump_json()))
+    assert observation.to_json() == weather.model_dump(mode="json")
+    assert observation.to_schema() == weather
+
+    trigger = ParametricTrigger(
+        id="t", location_id="a", trigger_type=TriggerType.RAINFALL, threshold_value=25.0,
+        threshold_operator="gt", payout_amount=100.0
+    )
+    record = TriggerRecord.from_schema(trigger)
+    assert record.to_schema() == trigger
+
+    alert = RiskEngine().create_alert(observation, record)
+    assert isinstance(alert, AlertRecord) and alert.risk_level == RiskLevel.CRITICAL
+    assert alert.to_json() == alert.to_schema().model_dump(mode="json")
+    assert AlertRecord.from_schema(Alert(**alert.to_dict())) == alert
+    assert not hasattr(alert, "__dict__")
+
+def test_repositories_load_records_without_models(database):
+    async def run():
+        await LocationRepository(database).add(Location(
+            id="a", latitude=6.5, longitude=3.4, name="A", insurer_id="INS-1", policy_ids=["P-1"]
+        ))
+        await TriggerRepository(database).bulk_upsert([
+            ParametricTrigger(
+                id=f"t{i}", location_id="a", trigger_type=TriggerType.WIND_SPEED, threshold_value=20.0,
+                threshold_operator="gte", duration_hours=2, payout_amount=5000.0
+            )
+            for i in range(2)
+        ])
+        return (
+            await LocationRepository(database).records_changed_since(None),
+            await TriggerRepository(database).records_changed_since(None),
+        )
+
+    locations, triggers = asyncio.run(run())
+    assert locations == [LocationRecord("a", 6.5, 3.4, "INS-1")]
+    assert triggers[0] == TriggerRecord("t0", "a", TriggerType.WIND_SPEED, 20.0, "gte", 2, True, 5000.0)
+    assert triggers[0].location_id is triggers[1].location_id
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from backend.models.records import AlertRecord
+from backend.models.schemas import Location, ParametricTrigger, RiskLevel, TriggerType
+from backend.services.monitor import ParametricMonitor
+from backend.services.repository import AlertRepository, LocationRepository, TriggerRepository
+
+def make_location(location_id, insurer_id="INS-1"):
+    return Location(id=location_id, latitude=6.5, longitude=3.4, name=location_id, insurer_id=insurer_id)
+
+def make_trigger(trigger_id, location_id):
+    return ParametricTrigger(
+        id=trigger_id,
+        location_id=location_id,
+        trigger_type=TriggerType.WIND_SPEED,
+        threshold_value=20.0,
+        threshold_operator="gte",
+        payout_amount=5000.0
+    )
+
+def test_location_and_trigger_round_trip(database):
+    locations = LocationRepository(database)
+    triggers = TriggerRepository(database)
+
+    async def run():
+        await locations.bulk_upsert([make_location("a"), make_location("b", "INS-2")])
+        await locations.add(make_location("a", "INS-3"))  # Upsert replaces
+        await triggers.add(make_trigger("t1", "a"))
+        toggled = await triggers.toggle("t1")
+        return (
+            await locations.get("a"),
+            await locations.list("INS-2"),
+            await triggers.list_for_location("a"),
+            toggled,
+            await triggers.toggle("missing"),
+        )
+
+    a, ins2, a_triggers, toggled, missing = asyncio.run(run())
+    assert a.insurer_id == "INS-3"
+    assert [loc.id for loc in ins2] == ["b"]
+    assert a_triggers[0].trigger_type == TriggerType.WIND_SPEED
+    assert a_triggers[0].payout_amount == 5000.0
+    assert toggled.active is False
+    assert missing is None
+
+def test_alert_filters_and_resolve(database):
+    alerts = AlertRepository(database)
+
+    def alert(alert_id, location_id, level):
+        return AlertRecord(
+            id=alert_id, location_id=location_id, trigger_id="t", risk_level=level, message="m",
+            current_value=1.0, threshold_value=1.0, triggered_at=datetime.utcnow()
+        )
+
+    async def run():
+        await alerts.bulk_add([alert("1", "a", RiskLevel.HIGH), alert("2", "b", RiskLevel.LOW)])
+        resolved = await alerts.resolve(["1", "missing"])
+        return (
+            resolved,
+            await alerts.list(),
+            await alerts.list(location_id="a", active_only=False),
+            await alerts.list(risk_level=RiskLevel.LOW),
+        )
+
+    resolved, active, location_a, low = asyncio.run(run())
+    assert resolved == 1
+    assert [a.id for a in active] == ["2"]
+    assert location_a[0].resolved is True
+    assert [a.id for a in low] == ["2"]
+
+def test_monitor_syncs_from_shared_repositories(database):
+    monitor = ParametricMonitor(database=database)
+
+    async def run():
+        await monitor.location_repository.add(make_location("a"))
+        await monitor.trigger_repository.add(make_trigger("t1", "a"))
+        await monitor.sync()
+        await monitor.trigger_repository.toggle("t1")
+        await monitor.sync()
+
+    asyncio.run(run())
+    assert set(monitor.locations) == {"a"}
+    assert monitor.triggers["t1"].active is False
+    assert monitor.triggers.active_for_location("a") == []
+
+def test_alert_keyset_pages_and_compaction(database):
+    alerts = AlertRepository(database)
+    start = datetime(2024, 1, 1)
+
+    def alert(i):
+        # Pairs share a timestamp so the id tiebreak is exercised
+        return AlertRecord(
+            id=f"{i:03d}", location_id="a", trigger_id="t", risk_level=RiskLevel.HIGH, message="m",
+            current_value=1.0, threshold_value=1.0, triggered_at=start + timedelta(minutes=i // 2)
+        )
+
+    async def run():
+        await alerts.bulk_add([alert(i) for i in range(25)])
+        pages, cursor = [], None
+        while True:
+            page, cursor = await alerts.page(cursor=cursor, limit=10)
+            pages.append([a.id for a in page])
+            if cursor is None:
+                break
+        window, _ = await alerts.page(since=start + timedelta(minutes=2), until=start + timedelta(minutes=4))
+        await alerts.resolve(["000", "001", "024"])
+        kept = await alerts.compact(datetime.utcnow() - timedelta(days=1))
+        deleted = await alerts.compact(datetime.utcnow() + timedelta(seconds=1))
+        remaining, _ = await alerts.page(active_only=False, limit=100)
+        return pages, window, kept, deleted, remaining
+
+    pages, window, kept, deleted, remaining = asyncio.run(run())
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert sum(pages, []) == [f"{i:03d}" for i in reversed(range(25))]
+    assert [a.id for a in window] == ["007", "006", "005", "004"]
+    assert (kept, deleted) == (0, 3)
+    assert len(remaining) == 22
+    with pytest.raises(ValueError):
+        asyncio.run(alerts.page(cursor="not-a-cursor"))
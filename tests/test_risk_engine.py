@@ -56,3 +56,94 @@ def test_create_alert(risk_engine, sample_weather, rainfall_trigger):
     assert alert.trigger_id == "trigger-1"
     assert alert.current_value == 30.0
     assert len(alert.prescriptive_actions) > 0
+
+def test_evaluate_batch_matches_scalar_path(risk_engine):
+    import random
+    import numpy as np
+    rng = random.Random(42)
+    observations = [
+        WeatherData(
+            location_id=f"loc-{i}",
+            timestamp=datetime.utcnow(),
+            temperature=rng.choice([rng.uniform(-10, 45), 30.0]),
+            rainfall=rng.choice([rng.uniform(0, 100), 25.0, 0.0]),
+            wind_speed=rng.choice([rng.uniform(0, 40), 15.0]),
+            humidity=70.0,
+            pressure=1013.0
+        )
+        for i in range(50)
+    ]
+    triggers = [
+        ParametricTrigger(
+            id=f"t-{i}",
+            location_id=f"loc-{i % 50}",
+            trigger_type=rng.choice(list(TriggerType)),
+            threshold_value=rng.choice([25.0, 15.0, 30.0, 0.0, rng.uniform(-10, 100)]),
+            threshold_operator=rng.choice(["gt", "lt", "gte", "lte", "eq"])
+        )
+        for i in range(5000)
+    ]
+    index = np.array([i % 50 for i in range(len(triggers))])
+
+    fired = risk_engine.evaluate_portfolio(
+        risk_engine.observation_matrix(observations),
+        index,
+        risk_engine.trigger_columns(triggers)
+    )
+
+    expected = [risk_engine.evaluate_trigger(observations[i % 50], t) for i, t in enumerate(triggers)]
+    assert fired.tolist() == expected
+    assert risk_engine.evaluate_triggers(observations[0], triggers[::50]).tolist() == expected[::50]
+
+def test_score_batch_matches_calculate_risk_score(risk_engine):
+    import random
+    import numpy as np
+    rng = random.Random(7)
+    n_locations = 40
+    forecasts = [
+        [
+            ForecastData(
+                location_id=f"loc-{i}",
+                forecast_time=datetime.utcnow(),
+                temperature=20.0,
+                rainfall_probability=50.0,
+                rainfall_amount=rng.choice([0.0, 25.0, 50.0, 35.0, rng.uniform(0, 120)]),
+                wind_speed=rng.choice([15.0, 20.0, 14.0, rng.uniform(0, 40)]),
+                risk_score=0.0
+            )
+            for _ in range(16)
+        ]
+        for i in range(n_locations)
+    ]
+    triggers = [
+        ParametricTrigger(
+            id=f"t-{j}",
+            location_id=f"loc-{j % n_locations}",
+            trigger_type=rng.choice(list(TriggerType)),
+            threshold_value=rng.choice([50.0, 20.0, rng.uniform(1, 80)]),
+            threshold_operator="gt"
+        )
+        for j in range(200)
+    ]
+    trigger_location = np.array([j % n_locations for j in range(len(triggers))])
+
+    rainfall, wind = risk_engine.forecast_matrix(forecasts)
+    scores = risk_engine.score_batch(rainfall, wind, risk_engine.trigger_columns(triggers), trigger_location)
+
+    for i, location_forecasts in enumerate(forecasts):
+        location_triggers = [t for t in triggers if t.location_id == f"loc-{i}"]
+        expected = [risk_engine.calculate_risk_score(f, location_triggers) for f in location_forecasts]
+        assert scores[i].tolist() == expected
+        assert risk_engine.score_forecasts(location_forecasts, location_triggers).tolist() == expected
+
+def test_threshold_proximity(risk_engine, sample_weather):
+    import numpy as np
+    triggers = [
+        ParametricTrigger(id="rain", location_id="l", trigger_type=TriggerType.RAINFALL, threshold_value=60.0, threshold_operator="gt"),
+        ParametricTrigger(id="cold", location_id="l", trigger_type=TriggerType.TEMPERATURE, threshold_value=20.0, threshold_operator="lt"),
+        ParametricTrigger(id="frost", location_id="l", trigger_type=TriggerType.TEMPERATURE, threshold_value=-5.0, threshold_operator="lt"),
+        ParametricTrigger(id="flood", location_id="l", trigger_type=TriggerType.FLOOD_RISK, threshold_value=1.0, threshold_operator="gt"),
+    ]
+    proximity = risk_engine.threshold_proximity(sample_weather, triggers)
+    assert proximity[:3].tolist() == [0.5, 0.8, 0.0]
+    assert np.isnan(proximity[3])
@@ -0,0 +1,180 @@
+import asyncio
+import time
+import pytest
+from backend.config import settings
+from backend.services.monitor import ParametricMonitor
+from backend.services.scheduler import FetchScheduler, TokenBucket
+from backend.models.records import LocationRecord, TriggerRecord
+from backend.models.schemas import ParametricTrigger, TriggerType
+from tests.stub_server import StubWeatherServer
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    server = StubWeatherServer(weather={"temp": 25.0, "rain": 40.0, "wind": 5.0}).start()
+    monkeypatch.setattr(settings, "weather_api_base_url", server.base_url)
+    yield server
+    server.stop()
+
+def make_monitor(scheduler, n_locations, database, spacing=0.01):
+    monitor = ParametricMonitor(scheduler=scheduler, database=database)
+    for i in range(n_locations):
+        loc_id = f"loc-{i}"
+        monitor.locations[loc_id] = LocationRecord(
+            id=loc_id, latitude=6.5 + i * spacing, longitude=3.4, insurer_id="INS-1"
+        )
+        monitor.triggers.add(TriggerRecord(
+            id=f"t-{i}",
+            location_id=loc_id,
+            trigger_type=TriggerType.RAINFALL,
+            threshold_value=25.0,
+            threshold_operator="gt",
+            duration_hours=0
+        ))
+    return monitor
+
+async def run_cycle(monitor):
+    try:
+        await monitor._check_all_locations()
+    finally:
+        await monitor.weather_service.aclose()
+
+def test_cycle_fetches_all_locations_with_bounded_concurrency(stub_api, database):
+    stub_api.delay = 0.02
+    monitor = make_monitor(FetchScheduler(max_in_flight=4, rate_limit=0), 20, database)
+
+    asyncio.run(run_cycle(monitor))
+
+    stats = monitor.scheduler.last_cycle
+    assert stats["completed"] == 20
+    assert stats["failed"] == 0
+    assert stub_api.max_concurrent <= 4
+    assert len(monitor.open_alerts) == 20
+    assert len(asyncio.run(monitor.alert_repository.list(active_only=False))) == 20
+
+def test_retries_upstream_errors_with_backoff(stub_api, database):
+    stub_api.fail_first = 2
+    scheduler = FetchScheduler(max_in_flight=1, rate_limit=0, max_retries=3, backoff_base=0.01)
+    monitor = make_monitor(scheduler, 1, database)
+
+    asyncio.run(run_cycle(monitor))
+
+    assert scheduler.last_cycle["completed"] == 1
+    assert scheduler.last_cycle["retries"] == 2
+    assert stub_api.requests == 3
+
+def test_deadline_cancels_pending_fetches():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def noop(key, result):
+        pass
+
+    scheduler = FetchScheduler(max_in_flight=2, rate_limit=0, cycle_deadline=0.05)
+    stats = asyncio.run(scheduler.run_cycle({str(i): slow for i in range(5)}, noop))
+
+    assert stats["timed_out"] == 5
+    assert stats["duration_seconds"] < 0.5
+
+def test_token_bucket_limits_rate():
+    async def drain():
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(drain()) >= 0.09
+
+def test_token_bucket_spends_only_its_share():
+    async def drain():
+        bucket = TokenBucket(rate=100, capacity=1)
+        bucket.share = 0.5
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(drain()) >= 0.09
+
+def test_nearby_locations_share_one_fetch(stub_api, database):
+    monitor = make_monitor(FetchScheduler(rate_limit=0), 10, database, spacing=0.0001)
+
+    asyncio.run(run_cycle(monitor))
+
+    assert stub_api.requests == 1
+    assert monitor.scheduler.last_cycle["jobs"] == 1
+    assert {a.location_id for a in monitor.open_alerts.values()} == set(monitor.locations)
+
+def test_open_alert_is_not_refired_on_later_cycles(stub_api, database):
+    monitor = make_monitor(FetchScheduler(rate_limit=0), 3, database)
+
+    asyncio.run(run_cycle(monitor))
+    asyncio.run(run_cycle(monitor))
+
+    assert len(monitor.open_alerts) == 3
+    assert len(asyncio.run(monitor.alert_repository.list())) == 3
+
+def test_deadline_does_not_cut_alert_writes_short(stub_api, database, monkeypatch):
+    monitor = make_monitor(FetchScheduler(rate_limit=0, cycle_deadline=0.5), 3, database, spacing=0.0001)
+    bulk_add = monitor.alert_repository.bulk_add
+
+    async def slow_bulk_add(alerts):
+        await asyncio.sleep(1.0)  # Still writing when the deadline passes
+        return await bulk_add(alerts)
+
+    monkeypatch.setattr(monitor.alert_repository, "bulk_add", slow_bulk_add)
+    asyncio.run(run_cycle(monitor))
+
+    assert monitor.scheduler.last_cycle["duration_seconds"] >= 1.0
+    assert len(monitor.open_alerts) == 3
+    assert len(asyncio.run(monitor.alert_repository.list())) == 3
+
+def test_failed_alert_write_fires_again_next_cycle(stub_api, database, monkeypatch):
+    monitor = make_monitor(FetchScheduler(rate_limit=0), 3, database, spacing=0.0001)
+    bulk_add = monitor.alert_repository.bulk_add
+    failures = [OSError("database is locked")]
+
+    async def flaky_bulk_add(alerts):
+        if failures:
+            raise failures.pop()
+        return await bulk_add(alerts)
+
+    monkeypatch.setattr(monitor.alert_repository, "bulk_add", flaky_bulk_add)
+    asyncio.run(run_cycle(monitor))
+    stored = len(asyncio.run(monitor.alert_repository.list()))
+    # 3 nearby locations share a cell, so one failed write covers every alert
+    assert (len(monitor.open_alerts), stored) == (0, 0)
+
+    asyncio.run(run_cycle(monitor))
+    assert len(monitor.open_alerts) == 3
+    assert len(asyncio.run(monitor.alert_repository.list())) == 3
+
+def test_deactivating_a_trigger_resolves_its_alert(stub_api, database):
+    monitor = make_monitor(FetchScheduler(rate_limit=0), 1, database)
+    sent = []
+
+    async def record(alerts):
+        sent.extend((a.trigger_id, a.resolved) for a in alerts)
+
+    monitor._send_alert_notifications = record
+
+    def set_active(active):
+        trigger = ParametricTrigger(
+            id="t-0", location_id="loc-0", trigger_type=TriggerType.RAINFALL,
+            threshold_value=25.0, threshold_operator="gt", duration_hours=0, active=active
+        )
+        asyncio.run(monitor.trigger_repository.bulk_upsert([trigger]))
+
+    asyncio.run(run_cycle(monitor))
+    set_active(False)
+    asyncio.run(monitor.sync())
+    assert monitor.open_alerts == {}
+    assert asyncio.run(monitor.alert_repository.list(active_only=True)) == []
+    assert sent == [("t-0", False), ("t-0", True)]
+
+    # Still raining: reactivating opens a fresh alert
+    set_active(True)
+    asyncio.run(run_cycle(monitor))
+    assert list(monitor.open_alerts) == ["t-0"]
+    assert len(asyncio.run(monitor.alert_repository.list(active_only=False))) == 2
+    assert sent[-1] == ("t-0", False)
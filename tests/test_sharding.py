@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from backend.config import settings
+from backend.models.records import LocationRecord, TriggerRecord
+from backend.models.schemas import TriggerType
+from backend.services.leases import DatabaseLeaseStore, LocalLeaseStore
+from backend.services.monitor import ParametricMonitor
+from backend.services.scheduler import FetchScheduler
+from backend.services.sharding import HashRing, ShardCoordinator
+from tests.stub_server import StubWeatherServer
+
+def test_hash_ring_moves_only_the_new_members_share():
+    keys = [f"cell-{i}" for i in range(2000)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    moved = [k for k in keys if before.owner(k) != after.owner(k)]
+    assert all(after.owner(k) == "d" for k in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+    assert HashRing().owner("x") is None
+
+@pytest.mark.parametrize("backend", ["local", "database"])
+def test_leases_are_exclusive_until_released_or_expired(backend, database):
+    store = LocalLeaseStore() if backend == "local" else DatabaseLeaseStore(database)
+
+    async def run():
+        results = [
+            await store.acquire("shard:1", "a", 60),
+            await store.acquire("shard:1", "b", 60),
+            await store.acquire("shard:1", "a", 60),  # Renewal
+        ]
+        await store.release("shard:1", "b")  # Not b's to release
+        results.append(await store.acquire("shard:1", "b", 60))
+        await store.release("shard:1", "a")
+        results.append(await store.acquire("shard:1", "b", 60))
+        await store.acquire("shard:2", "c", 0.05)
+        await asyncio.sleep(0.1)
+        results.append(await store.acquire("shard:2", "b", 60))
+        return results, await store.holders("shard:")
+
+    results, holders = asyncio.run(run())
+    assert results == [True, False, True, False, True, True]
+    assert holders == {"shard:1": "b", "shard:2": "b"}
+
+def test_coordinators_partition_shards_and_rebalance():
+    store = LocalLeaseStore()
+    workers = [ShardCoordinator(store, f"w{i}", shards=32, lease_ttl=60) for i in range(3)]
+
+    async def rounds(coordinators, n=3):
+        for _ in range(n):
+            for coordinator in coordinators:
+                await coordinator.heartbeat()
+
+    async def run():
+        await rounds(workers)
+        split = [set(w.owned) for w in workers]
+        await workers[2].leave()
+        await rounds(workers[:2])
+        return split, [set(w.owned) for w in workers[:2]]
+
+    split, after_leave = asyncio.run(run())
+    for owned in (split, after_leave):
+        assert set().union(*owned) == set(range(32))
+        assert sum(map(len, owned)) == 32  # Disjoint
+    assert all(owned for owned in split)
+
+def make_monitor(database, coordinator, n_locations):
+    monitor = ParametricMonitor(
+        scheduler=FetchScheduler(max_in_flight=8, rate_limit=0), database=database, coordinator=coordinator
+    )
+    for i in range(n_locations):
+        monitor.locations[f"loc-{i}"] = LocationRecord(
+            id=f"loc-{i}", latitude=6.5 + i * 0.01, longitude=3.4, insurer_id="INS-1"
+        )
+        monitor.triggers.add(TriggerRecord(
+            id=f"t-{i}", location_id=f"loc-{i}", trigger_type=TriggerType.RAINFALL,
+            threshold_value=25.0, threshold_operator="gt", duration_hours=0
+        ))
+    return monitor
+
+def test_sharded_monitors_never_evaluate_a_cell_twice(monkeypatch, database):
+    store = LocalLeaseStore()
+
+    async def run(monitors):
+        try:
+            # Converge membership first, then count one cycle's work
+            for monitor in monitors:
+                await monitor.coordinator.heartbeat()
+            for monitor in monitors:
+                await monitor.coordinator.heartbeat()
+            requests = stub.requests
+            await asyncio.gather(*(m._check_all_locations() for m in monitors))
+            await asyncio.gather(*(m._check_all_locations() for m in monitors))
+            return stub.requests - requests, await monitors[0].alert_repository.list()
+        finally:
+            for monitor in monitors:
+                await monitor.weather_service.aclose()
+
+    with StubWeatherServer(weather={"temp": 25.0, "rain": 40.0, "wind": 5.0}) as stub:
+        monkeypatch.setattr(settings, "weather_api_base_url", stub.base_url)
+        monitors = [
+            make_monitor(database, ShardCoordinator(store, f"w{i}", shards=16, lease_ttl=60), 40)
+            for i in range(2)
+        ]
+        fetches, alerts = asyncio.run(run(monitors))
+
+    assert fetches == 2 * 40
+    assert all(m.scheduler.last_cycle["jobs"] for m in monitors)
+    assert [m.scheduler.rate_limiter.share for m in monitors] == [0.5, 0.5]
+    assert len(alerts) == 40
+    assert len({a.trigger_id for a in alerts}) == 40
@@ -0,0 +1,21 @@
+from backend.services.spatial import SpatialGrid, cell_center, geohash_bounds, geohash_encode
+from backend.models.schemas import Location
+
+def test_geohash_round_trip():
+    cell = geohash_encode(57.64911, 10.40744, 11)
+    assert cell == "u4pruydqqvj"
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(cell)
+    assert min_lat <= 57.64911 <= max_lat
+    assert min_lon <= 10.40744 <= max_lon
+    lat, lon = cell_center(cell)
+    assert abs(lat - 57.64911) < 1e-5 and abs(lon - 10.40744) < 1e-5
+
+def test_group_buckets_nearby_locations():
+    grid = SpatialGrid(precision=6)
+    locations = [
+        Location(id="a", latitude=6.4500, longitude=3.3880, name="a", insurer_id="i"),
+        Location(id="b", latitude=6.4510, longitude=3.3890, name="b", insurer_id="i"),
+        Location(id="c", latitude=-1.2921, longitude=36.8219, name="c", insurer_id="i"),
+    ]
+    cells = grid.group(locations)
+    assert sorted(len(group) for group in cells.values()) == [1, 2]
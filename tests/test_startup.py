@@ -0,0 +1,22 @@
+import json
+import subprocess
+import sys
+
+def loaded(module, candidates):
+    code = (
+        f"import json, sys, {module}; "
+        f"print(json.dumps([m for m in {list(candidates)!r} if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_api_import_defers_heavy_modules():
+    # Built on first use by the lifespan's Services, or only needed by `python -m backend.main`
+    assert loaded("backend.main", ["numpy", "geopy", "pandas", "uvicorn"]) == []
+
+def test_worker_does_not_load_the_web_stack():
+    assert loaded("backend.worker", ["fastapi", "starlette", "uvicorn", "geopy"]) == []
+
+def test_location_routes_do_not_load_the_monitor():
+    assert loaded("backend.services.location_index", ["backend.services.monitor"]) == []
+    assert loaded("backend.services.exposure", ["backend.services.monitor"]) == []
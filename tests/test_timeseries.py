@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from backend.config import settings
+from backend.models.schemas import ForecastData, WeatherData
+from backend.services.timeseries import DAY_SECONDS, TimeSeriesStore, to_epoch
+
+START = datetime(2024, 3, 1)
+
+def observation(minutes, rain):
+    return WeatherData(
+        location_id="cell", timestamp=START + timedelta(minutes=minutes), temperature=20.0 + minutes / 60,
+        rainfall=rain, wind_speed=5.0, humidity=70.0, pressure=1013.0
+    )
+
+def test_range_queries_span_segments_days_and_the_buffer(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    # Two days of 10-minute samples for two cells, flushed in several segments
+    for minutes in range(0, 2 * 24 * 60, 10):
+        store.record_observation("a", observation(minutes, rain=minutes % 50))
+        store.record_observation("b", observation(minutes, rain=-1.0))
+        if minutes % 600 == 0:
+            store.observations.flush()
+
+    rows = store.observations.query("a", START + timedelta(hours=23), START + timedelta(hours=25))
+    assert len(rows["time"]) == 12
+    assert (rows["rainfall"] >= 0).all()  # Nothing from cell "b"
+    assert list(rows["time"]) == sorted(rows["time"])
+    assert rows["temperature"][0] == pytest.approx(43.0)
+
+    hourly = store.observations.query("a", START, START + timedelta(hours=2), resolution=3600)
+    assert hourly["rainfall"].tolist() == [40.0, 40.0]  # Max of the hour
+    assert hourly["temperature"].tolist() == pytest.approx([20.4166, 21.4166], abs=1e-3)  # Mean
+
+def test_query_relists_a_day_merged_while_reading(tmp_path, monkeypatch):
+    table = TimeSeriesStore(str(tmp_path)).observations
+    for minutes in range(0, 120, 10):
+        table.append("a", START + timedelta(minutes=minutes), (20.0, 1.0, 5.0, 70.0, 1013.0))
+        if minutes % 30 == 0:
+            table.flush()
+    day = to_epoch(START) // DAY_SECONDS
+    stale = table._live_segments(day)
+    table._rewrite(day, None)  # Lands between the query listing the day and opening its segments
+
+    live_segments = table._live_segments
+    listings = iter([stale])
+    monkeypatch.setattr(table, "_live_segments", lambda day: next(listings, None) or live_segments(day))
+    rows = table.query("a", START, START + timedelta(hours=2))
+    assert len(rows["time"]) == 12
+
+def test_failed_flush_keeps_the_rows(tmp_path, monkeypatch):
+    table = TimeSeriesStore(str(tmp_path)).observations
+    for minutes in range(0, 120, 10):
+        table.append("a", START + timedelta(minutes=minutes), (20.0, 1.0, 5.0, 70.0, 1013.0))
+
+    def disk_full(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    write_segment = table._write_segment
+    monkeypatch.setattr(table, "_write_segment", disk_full)
+    with pytest.raises(OSError):
+        table.flush()
+    assert len(table) == 12
+    monkeypatch.setattr(table, "_write_segment", write_segment)
+    assert table.flush() == 12
+    assert len(table.query("a", START, START + timedelta(hours=2))["time"]) == 12
+
+def test_maintenance_merges_downsamples_and_expires(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "timeseries_downsample_after_days", 5)
+    monkeypatch.setattr(settings, "timeseries_downsample_seconds", 3600)
+    monkeypatch.setattr(settings, "timeseries_retention_days", 25)
+    store = TimeSeriesStore(str(tmp_path))
+
+    async def run():
+        for day in (0, 10, 30):
+            for minutes in range(0, 120, 10):
+                store.record_observation("a", observation(day * 1440 + minutes, rain=minutes))
+                await store.flush(force=True)
+        issued = START + timedelta(days=31)
+        store.record_forecasts("a", [
+            ForecastData(
+                location_id="a", forecast_time=issued + timedelta(hours=3), temperature=25.0,
+                rainfall_probability=40.0, rainfall_amount=12.0, wind_speed=6.0, risk_score=0.0
+            )
+        ], issued=issued)
+        await store.flush(force=True)
+        return await store.maintain(now=START + timedelta(days=31))
+
+    stats = asyncio.run(run())
+    assert stats["observations"] == {"merged": 1, "downsampled": 1, "expired": 1}
+
+    days = sorted(p.name for p in (tmp_path / "observations").iterdir())
+    assert days == ["2024-03-11", "2024-03-31"]
+    assert all(len(list((tmp_path / "observations" / d).iterdir())) == 1 for d in days)
+
+    old = store.observations.query("a", START, START + timedelta(days=11))
+    assert old["rainfall"].tolist() == [50.0, 110.0]  # Hourly maxima
+    recent = store.observations.query("a", START + timedelta(days=30), START + timedelta(days=31))
+    assert len(recent["time"]) == 12
+
+    forecast = store.forecasts.query("a", START + timedelta(days=31), START + timedelta(days=32))
+    assert forecast["rainfall_amount"].tolist() == [12.0]
+    assert forecast["issued"].tolist() == [to_epoch(START + timedelta(days=31))]
+
+def test_late_rows_do_not_outweigh_a_downsampled_bucket(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "timeseries_downsample_after_days", 5)
+    monkeypatch.setattr(settings, "timeseries_downsample_seconds", 3600)
+    store = TimeSeriesStore(str(tmp_path))
+    now = START + timedelta(days=10)
+
+    async def run():
+        for minutes in range(0, 60, 10):
+            store.record_observation("a", observation(minutes, rain=1.0))
+        await store.flush(force=True)
+        await store.maintain(now=now)
+        # Arrives after the day was downsampled
+        store.record_observation("a", observation(55, rain=1.0))
+        await store.flush(force=True)
+        return await store.maintain(now=now)
+
+    assert asyncio.run(run())["observations"]["downsampled"] == 1
+    hour = store.observations.query("a", START, START + timedelta(days=1))
+    minutes = [0, 10, 20, 30, 40, 50, 55]
+    assert hour["temperature"].tolist() == [pytest.approx(20.0 + sum(minutes) / 60 / 7, rel=1e-6)]
@@ -0,0 +1,33 @@
+from backend.services.trigger_registry import TriggerRegistry
+from backend.models.schemas import ParametricTrigger, TriggerType
+
+def make_trigger(trigger_id, location_id, trigger_type=TriggerType.RAINFALL, active=True):
+    return ParametricTrigger(
+        id=trigger_id,
+        location_id=location_id,
+        trigger_type=trigger_type,
+        threshold_value=10.0,
+        threshold_operator="gt",
+        active=active
+    )
+
+def test_indexes_follow_add_toggle_and_remove():
+    registry = TriggerRegistry([
+        make_trigger("t1", "loc-1"),
+        make_trigger("t2", "loc-1", TriggerType.WIND_SPEED),
+        make_trigger("t3", "loc-2", active=False),
+    ])
+
+    assert {t.id for t in registry.for_location("loc-1")} == {"t1", "t2"}
+    assert [t.id for t in registry.active_for_location("loc-1", [TriggerType.WIND_SPEED])] == ["t2"]
+    assert registry.active_for_location("loc-2") == []
+
+    registry.set_active("t3", True)
+    registry.set_active("t1", False)
+    assert [t.id for t in registry.active_for_location("loc-2")] == ["t3"]
+    assert [t.id for t in registry.active_for_location("loc-1")] == ["t2"]
+
+    registry.remove("t2")
+    assert registry.active_for_location("loc-1") == []
+    assert [t.id for t in registry.of_type(TriggerType.RAINFALL)] == ["t1", "t3"]
+    assert len(registry) == 2 and "t2" not in registry
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from backend.services.trigger_state import TriggerStateEngine, OPENED, CLOSED
+from backend.models.schemas import ParametricTrigger, TriggerType
+
+T0 = datetime(2024, 1, 1)
+
+def rainfall_trigger(duration_hours=1):
+    return ParametricTrigger(
+        id="t-1",
+        location_id="loc-1",
+        trigger_type=TriggerType.RAINFALL,
+        threshold_value=50.0,
+        threshold_operator="gt",
+        duration_hours=duration_hours
+    )
+
+def feed(engine, trigger, values, step_minutes=15, start=T0):
+    return [
+        engine.observe(trigger, value > trigger.threshold_value, value, start + timedelta(minutes=i * step_minutes))
+        for i, value in enumerate(values)
+    ]
+
+def test_opens_once_after_sustained_exceedance():
+    engine = TriggerStateEngine(hysteresis_ratio=0.1, max_gap_seconds=3600)
+    events = feed(engine, rainfall_trigger(), [60, 60, 60, 60, 60, 70, 80])
+    assert events == [None, None, None, None, OPENED, None, None]
+
+def test_short_spike_does_not_open():
+    engine = TriggerStateEngine(hysteresis_ratio=0.1, max_gap_seconds=3600)
+    events = feed(engine, rainfall_trigger(), [60, 60, 40, 60, 60, 60])
+    assert OPENED not in events
+    assert "t-1" in engine
+
+def test_hysteresis_keeps_alert_open_until_value_clears_band():
+    engine = TriggerStateEngine(hysteresis_ratio=0.1, max_gap_seconds=3600)
+    events = feed(engine, rainfall_trigger(duration_hours=0), [60, 48, 55, 46, 44, 60])
+    assert events == [OPENED, None, None, None, CLOSED, OPENED]
+
+def test_sample_gap_breaks_sustained_run():
+    engine = TriggerStateEngine(hysteresis_ratio=0.1, max_gap_seconds=1800)
+    trigger = rainfall_trigger()
+    feed(engine, trigger, [60, 60, 60])
+    later = feed(engine, trigger, [60, 60], start=T0 + timedelta(hours=2))
+    assert later == [None, None]
+
+def test_idle_triggers_hold_no_state():
+    engine = TriggerStateEngine(hysteresis_ratio=0.1, max_gap_seconds=3600)
+    feed(engine, rainfall_trigger(duration_hours=0), [60, 40])
+    assert len(engine) == 0
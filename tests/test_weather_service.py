@@ -0,0 +1,24 @@
+import asyncio
+from backend.config import settings
+from backend.services.weather_service import WeatherService
+from tests.stub_server import StubWeatherServer
+
+def test_requests_reuse_pooled_connection(monkeypatch):
+    with StubWeatherServer() as server:
+        monkeypatch.setattr(settings, "weather_api_base_url", server.base_url)
+        service = WeatherService()
+
+        async def fetch():
+            for i in range(5):
+                await service.get_current_weather(6.5, 3.4, f"loc-{i}")
+            forecasts = await service.get_forecast(6.5, 3.4, "loc-0")
+            client = service.client
+            await service.aclose()
+            return forecasts, client
+
+        forecasts, client = asyncio.run(fetch())
+
+    assert len(forecasts) == 16
+    assert server.requests == 6
+    assert len(server.connections) == 1
+    assert client.is_closed
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+from backend.models.records import AlertRecord
+from backend.models.schemas import RiskLevel
+from backend.services.repository import DeadLetterRepository
+from backend.services.webhooks import SHED, WebhookDispatcher
+from tests.stub_server import StubWebhookReceiver
+
+def make_alerts(n):
+    return [
+        AlertRecord(
+            id=f"a-{i}", location_id=f"loc-{i}", trigger_id=f"t-{i}", risk_level=RiskLevel.HIGH,
+            message="Rainfall exceeded threshold", current_value=60.0, threshold_value=50.0,
+            triggered_at=datetime.utcnow()
+        )
+        for i in range(n)
+    ]
+
+def dispatch(dispatcher, alerts):
+    async def run():
+        dispatcher.start()
+        accepted = await dispatcher.submit(alerts)
+        await dispatcher.stop()
+        return accepted, await dispatcher.dead_letters.list()
+    return asyncio.run(run())
+
+def test_batches_alerts_per_destination(database):
+    with StubWebhookReceiver() as receiver:
+        dispatcher = WebhookDispatcher(
+            receiver.url, dead_letters=DeadLetterRepository(database), workers=2, batch_size=50
+        )
+        accepted, dead = dispatch(dispatcher, make_alerts(230))
+
+    assert accepted == 230
+    assert sorted(a["id"] for a in receiver.alerts) == sorted(f"a-{i}" for i in range(230))
+    assert receiver.requests < 230 / 10
+    assert all(len(batch) <= 50 for batch in receiver.batches)
+    assert dead == []
+
+def test_retries_then_dead_letters(database):
+    with StubWebhookReceiver(fail_first=2) as receiver:
+        dispatcher = WebhookDispatcher(
+            receiver.url, dead_letters=DeadLetterRepository(database), workers=1, backoff_base=0.01
+        )
+        dispatch(dispatcher, make_alerts(3))
+    assert dispatcher.stats["retries"] == 2
+    assert len(receiver.alerts) == 3
+
+    with StubWebhookReceiver(status=400) as receiver:
+        dispatcher = WebhookDispatcher(
+            receiver.url, dead_letters=DeadLetterRepository(database), workers=1, backoff_base=0.01
+        )
+        _, dead = dispatch(dispatcher, make_alerts(3))
+    # Client errors aren't retried
+    assert receiver.requests == 1
+    assert [len(letter.alerts) for letter in dead] == [3]
+    assert dead[0].attempts == 1
+
+def test_cancelled_submit_dead_letters_what_was_not_queued(database):
+    dispatcher = WebhookDispatcher(
+        "http://127.0.0.1:9/alerts", dead_letters=DeadLetterRepository(database), queue_size=2
+    )
+
+    async def run():
+        # No workers, so the third alert waits for room until the deadline cancels it
+        try:
+            await asyncio.wait_for(dispatcher.submit(make_alerts(5)), 0.05)
+        except asyncio.TimeoutError:
+            pass
+        return dispatcher.queue.qsize(), await dispatcher.dead_letters.list()
+
+    queued, dead = asyncio.run(run())
+    assert queued == 2
+    assert [a["id"] for letter in dead for a in letter.alerts] == ["a-2", "a-3", "a-4"]
+
+def test_stop_mid_batch_only_dead_letters_undelivered_destinations(database):
+    with StubWebhookReceiver() as fast, StubWebhookReceiver(delay=1.0) as slow:
+        dispatcher = WebhookDispatcher(dead_letters=DeadLetterRepository(database), workers=1, batch_wait=0.05)
+
+        async def run():
+            dispatcher.start()
+            await dispatcher.submit(make_alerts(2), url=fast.url)
+            await dispatcher.submit(make_alerts(3), url=slow.url)
+            await asyncio.sleep(0.3)  # Delivered to fast, still waiting on slow
+            await dispatcher.stop(timeout=0)
+            return await dispatcher.dead_letters.list()
+
+        dead = asyncio.run(run())
+    assert len(fast.alerts) == 2
+    assert [(letter.url, len(letter.alerts)) for letter in dead] == [(slow.url, 3)]
+
+def test_sheds_overflow_to_dead_letters(database):
+    with StubWebhookReceiver() as receiver:
+        dispatcher = WebhookDispatcher(
+            receiver.url, dead_letters=DeadLetterRepository(database), queue_size=10, overflow=SHED
+        )
+        # Workers aren't started, so nothing drains the queue during submit
+        accepted = asyncio.run(dispatcher.submit(make_alerts(25)))
+        dead = asyncio.run(dispatcher.dead_letters.list())
+
+    assert accepted == 10
+    assert dispatcher.stats["shed"] == 15
+    assert dead[0].error == "queue full"
+    assert len(dead[0].alerts) == 15